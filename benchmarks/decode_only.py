@@ -0,0 +1,44 @@
+import json
+from timeit import Timer
+from pathlib import Path as PathLibPath
+
+from click import Path as ClickPath
+from click import option
+from click import command
+from jwcrypto.jwt import JWT
+
+from jwt_debugger.decoder import decode_token
+
+
+DEFAULT_TOKEN_PATH = PathLibPath('tests') / 'examples' / 'encoded_token-example_rsa256.txt'
+
+
+def decode_token_with_jwcrypto(token: str) -> None:
+    '''Decode-only path used before the lean decoder, kept here as the baseline'''
+    jwt = JWT(jwt=token)
+    json.loads(jwt.token.objects.get('protected'))
+    json.loads(jwt.token.objects.get('payload', b'').decode())
+
+
+@command()
+@option('--token', 'token_path', type=ClickPath(exists=True, dir_okay=False, path_type=PathLibPath), default=DEFAULT_TOKEN_PATH, help='File containing an encoded token.')
+@option('--number', type=int, default=10000, help='Number of decodes per measurement.')
+@option('--repeat', type=int, default=5, help='Number of measurements, the best is reported.')
+def cli(token_path: PathLibPath, number: int, repeat: int) -> None:
+    '''Compares decoding without a key through jwcrypto against the lean decoder.'''
+    token = token_path.read_text().strip()
+
+    results = {}
+    for name, function in (('jwcrypto', decode_token_with_jwcrypto), ('lean', decode_token)):
+        best = min(Timer(lambda f=function: f(token)).repeat(repeat=repeat, number=number))
+        results[name] = best / number * 1e6
+
+    print(json.dumps({
+        'number': number,
+        'us_per_token': results,
+        'speedup': results['jwcrypto'] / results['lean'],
+    }, indent=4))
+
+
+if __name__ == '__main__':
+    cli(None)
@@ -0,0 +1,263 @@
+import sys
+import json
+import platform
+import subprocess
+from io import BytesIO
+from io import StringIO
+from timeit import Timer
+from typing import Dict
+from typing import List
+from typing import Callable
+from typing import Optional
+from pathlib import Path as PathLibPath
+from functools import partial
+from tempfile import TemporaryDirectory
+from threading import Thread
+from statistics import median
+
+from click import Path as ClickPath
+from click import Choice
+from click import option
+from click import command
+from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWKSet
+from rich.console import Console
+
+from toolbox.create_token import create_token
+from toolbox.create_private_jwk import KEY_PARAMETERS
+from toolbox.create_private_jwk import generate_jwk
+from jwt_debugger.console import JSONDecodedToken
+from jwt_debugger.console import PrettyDecodedToken
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.decoder import load_jwk_from_file
+from jwt_debugger.decoder import load_jwks_from_oidc_url
+from jwt_debugger.decoder import resolve_jwks_uri_from_oidc_provider
+from jwt_debugger.keyring import prepare_key
+from jwt_debugger.keyring import read_keyring
+from jwt_debugger.keyring import write_keyring
+from jwt_debugger.keystore import KeyStore
+from jwt_debugger.mockidp import MockIdentityProvider
+from jwt_debugger.serialize import dumps_compact
+
+
+# Approximate encoded payload sizes in bytes
+PAYLOAD_SIZES = {
+    'small': 0,
+    'medium': 2048,
+    'large': 65536,
+}
+
+KEY_SET_SIZE = 16
+
+
+def create_claims(size: int) -> Dict:
+    claims = {'iss': 'https://issuer.example.com', 'sub': '1234567890', 'name': 'Marty Byrde', 'iat': 1516239022}
+    if size:
+        claims['groups'] = [f'group-{x:06d}' for x in range(size // 16)]
+    return claims
+
+
+def measure(function: Callable[[], object], repeat: int, min_time: float) -> Dict:
+    '''Time a function returning per call statistics in microseconds'''
+    timer = Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    timings = [x / number * 1e6 for x in timer.repeat(repeat=repeat, number=number)]
+
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_us': min(timings),
+        'median_us': median(timings),
+        'max_us': max(timings),
+    }
+
+
+def benchmark_decode(repeat: int, min_time: float, algorithms: List[str]) -> List[Dict]:
+    results = []
+    for algorithm in algorithms:
+        private_key = generate_jwk(algorithm, kid='benchmark')
+        public_key = private_key if private_key.get('kty') == 'oct' else JWK(**private_key.export_public(as_dict=True))
+
+        key_set = JWKSet()
+        for index in range(KEY_SET_SIZE - 1):
+            key_set.add(generate_jwk(algorithm, kid=f'decoy-{index}'))
+        key_set.add(public_key)
+
+        for payload_size, size in PAYLOAD_SIZES.items():
+            token = create_token(private_key, create_claims(size), include_kid=True)
+            for key_name, key in (('none', None), ('jwk', public_key), ('jwkset', key_set)):
+                result = measure(lambda t=token, k=key: decode_token(t, k), repeat, min_time)
+                result.update({
+                    'benchmark': 'decode_token',
+                    'algorithm': algorithm,
+                    'payload_size': payload_size,
+                    'token_bytes': len(token),
+                    'key': key_name,
+                })
+                results.append(result)
+
+    return results
+
+
+def benchmark_load_jwk(repeat: int, min_time: float, algorithms: List[str]) -> List[Dict]:
+    results = []
+    with TemporaryDirectory() as directory:
+        # Symmetric keys have no PEM encoding and nothing to prepare
+        for algorithm in (x for x in algorithms if KEY_PARAMETERS[x]['kty'] != 'oct'):
+            private_key = generate_jwk(algorithm)
+            contents = {
+                'json': private_key.export_public(),
+                'pem': private_key.export_to_pem().decode(),
+            }
+            # Keys are prepared as they would be before their first verification
+            for key_format, content in contents.items():
+                result = measure(lambda c=content: prepare_key(load_jwk_from_file(StringIO(c))), repeat, min_time)
+                result.update({'benchmark': 'load_jwk_from_file', 'algorithm': algorithm, 'format': key_format})
+                results.append(result)
+
+            keyring_path = PathLibPath(directory) / f'{algorithm}.jwtkr'
+            write_keyring(JWK(**private_key.export_public(as_dict=True)), keyring_path)
+            result = measure(lambda p=keyring_path: read_keyring(p), repeat, min_time)
+            result.update({'benchmark': 'load_jwk_from_file', 'algorithm': algorithm, 'format': 'keyring'})
+            results.append(result)
+
+    return results
+
+
+def benchmark_render(repeat: int, min_time: float) -> List[Dict]:
+    results = []
+    private_key = generate_jwk('RS256')
+    for payload_size, size in PAYLOAD_SIZES.items():
+        decoded_token = decode_token(create_token(private_key, create_claims(size)), private_key)
+        json_decoded_token = JSONDecodedToken(decoded_token.header, decoded_token.payload)
+        console = Console(file=StringIO(), width=120)
+        stream = BytesIO()
+
+        # Per token cost of pretty output (shortened and in full), writing JSON through rich, as pretty printed text and as raw compact bytes
+        renderers = {
+            'pretty': partial(console.print, PrettyDecodedToken(decoded_token.token, decoded_token.header, decoded_token.payload, decoded_token.verified)),
+            'pretty_full': partial(console.print, PrettyDecodedToken(decoded_token.token, decoded_token.header, decoded_token.payload, decoded_token.verified, full=True)),
+            'json': partial(console.print, json_decoded_token),
+            'json_text': lambda t=json_decoded_token: console.file.write(f'{t}\n'),
+            'raw': lambda t=json_decoded_token: stream.write(dumps_compact(t.as_dict()) + b'\n'),
+        }
+        for output_format, render in renderers.items():
+            result = measure(render, repeat, min_time)
+            result.update({'benchmark': 'render', 'format': output_format, 'payload_size': payload_size})
+            results.append(result)
+
+            # Keep buffers from growing across measurements
+            console.file.seek(0)
+            console.file.truncate()
+            stream.seek(0)
+            stream.truncate()
+
+    return results
+
+
+def benchmark_oidc(repeat: int, min_time: float) -> List[Dict]:
+    '''Discovery, key set download and first verification against a local OpenID Connect Provider'''
+    private_key = generate_jwk('RS256', kid='benchmark')
+    token = create_token(private_key, create_claims(0), include_kid=True)
+
+    results = []
+    for key_count in (1, KEY_SET_SIZE):
+        server = MockIdentityProvider(('127.0.0.1', 0), [private_key], key_count - 1)
+        Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            jwks_uri = resolve_jwks_uri_from_oidc_provider(server.issuer)
+            stages = {
+                'discovery': partial(resolve_jwks_uri_from_oidc_provider, server.issuer),
+                'jwks_fetch': partial(load_jwks_from_oidc_url, jwks_uri),
+                'first_verification': lambda u=jwks_uri: decode_token(token, KeyStore(partial(load_jwks_from_oidc_url, u))),
+            }
+            for stage, function in stages.items():
+                result = measure(function, repeat, min_time)
+                result.update({'benchmark': 'oidc', 'stage': stage, 'key_count': key_count})
+                results.append(result)
+
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return results
+
+
+def benchmark_cli(repeat: int, cli_runs: int) -> List[Dict]:
+    private_key = generate_jwk('RS256')
+    token = create_token(private_key, create_claims(0))
+
+    results = []
+    for output_format in ('raw', 'json', 'pretty'):
+        command_ = [sys.executable, '-m', 'jwt_debugger', '--format', output_format, token]
+        run_ = partial(subprocess.run, command_, stdout=subprocess.DEVNULL, check=True)
+        timings = [x / cli_runs * 1e6 for x in Timer(run_).repeat(repeat=repeat, number=cli_runs)]
+        results.append({
+            'benchmark': 'cli',
+            'format': output_format,
+            'number': cli_runs,
+            'repeat': repeat,
+            'min_us': min(timings),
+            'median_us': median(timings),
+            'max_us': max(timings),
+        })
+
+    return results
+
+
+def result_key(result: Dict) -> str:
+    return json.dumps({k: v for k, v in result.items() if not k.endswith('_us') and k not in ('number', 'repeat')}, sort_keys=True)
+
+
+def compare(results: List[Dict], baseline: Dict) -> List[Dict]:
+    '''Annotate results with the ratio of their median against a previous run'''
+    baseline_results = {result_key(x): x for x in baseline.get('results', [])}
+    for result in results:
+        previous = baseline_results.get(result_key(result))
+        if previous is not None:
+            result['baseline_median_us'] = previous['median_us']
+            result['ratio'] = result['median_us'] / previous['median_us']
+    return results
+
+
+@command()
+@option('--only', type=Choice(['decode', 'load_jwk', 'render', 'oidc', 'cli']), multiple=True, help='Only run these benchmarks (decode, load_jwk, render, oidc, cli).')
+@option('--algorithm', 'algorithms', type=Choice(list(KEY_PARAMETERS)), multiple=True, help='Only benchmark decoding and key loading for these signing algorithms (all by default).')
+@option('--repeat', type=int, default=5, help='Number of measurements for each benchmark.')
+@option('--min-time', type=float, default=0.2, help='Approximate seconds for each measurement.')
+@option('--cli-runs', type=int, default=5, help='Number of cli invocations for each end to end measurement.')
+@option('--output', 'output_path', type=ClickPath(dir_okay=False, path_type=PathLibPath), help='Write results as JSON to this file.')
+@option('--compare', 'baseline_path', type=ClickPath(exists=True, dir_okay=False, path_type=PathLibPath), help='Previous results to compare against.')
+def cli(only: List[str], algorithms: List[str], repeat: int, min_time: float, cli_runs: int, output_path: Optional[PathLibPath] = None, baseline_path: Optional[PathLibPath] = None) -> None:
+    '''Benchmarks decoding, verification, key loading, rendering, OpenID Connect discovery and end to end cli latency.'''
+    benchmarks = {
+        'decode': lambda: benchmark_decode(repeat, min_time, algorithms or list(KEY_PARAMETERS)),
+        'load_jwk': lambda: benchmark_load_jwk(repeat, min_time, algorithms or list(KEY_PARAMETERS)),
+        'render': lambda: benchmark_render(repeat, min_time),
+        'oidc': lambda: benchmark_oidc(repeat, min_time),
+        'cli': lambda: benchmark_cli(repeat, cli_runs),
+    }
+
+    results = []
+    for name, benchmark in benchmarks.items():
+        if not only or name in only:
+            results.extend(benchmark())
+
+    if baseline_path is not None:
+        results = compare(results, json.loads(baseline_path.read_text()))
+
+    report = json.dumps({
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }, indent=4)
+
+    if output_path is not None:
+        output_path.write_text(report)
+
+    print(report)
+
+
+if __name__ == '__main__':
+    cli(None)
@@ -1 +1,4 @@
 from .command import cli
+from .decoder import DecodedToken
+from .decoder import MalformedToken
+from .verifier import Verifier
@@ -0,0 +1,166 @@
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+from typing import TextIO
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TYPE_CHECKING
+from threading import Event
+from threading import Semaphore
+
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.decoder import EXIT_INVALID_CLAIMS
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+from jwt_debugger.timings import StageTimer
+from jwt_debugger.serialize import dumps_compact
+
+
+if TYPE_CHECKING:
+    from jwcrypto.jwk import JWK
+    from jwcrypto.jwk import JWKSet
+
+    from jwt_debugger.claims import ClaimValidator
+    from jwt_debugger.decrypter import Decrypter
+    from jwt_debugger.keystore import KeyStore
+    from jwt_debugger.registry import IssuerRegistry
+    from jwt_debugger.results import VerificationCache
+
+
+# Public key, verification cache, claim validator and decrypter loaded once per worker process by the pool initializer
+_worker_public_key: Optional[Union['JWK', 'JWKSet', 'KeyStore', 'IssuerRegistry']] = None
+_worker_verification_cache: Optional['VerificationCache'] = None
+_worker_claim_validator: Optional['ClaimValidator'] = None
+_worker_decrypter: Optional['Decrypter'] = None
+_worker_timer: Optional[StageTimer] = None
+
+
+def read_tokens(stream: TextIO) -> Iterator[str]:
+    '''Read newline-delimited tokens from a stream one line at a time'''
+    for line in iter(stream.readline, ''):
+        token = line.strip()
+        if token:
+            yield token
+
+
+def decode_token_as_record(token: str, public_key: Optional[Union['JWK', 'JWKSet', 'KeyStore', 'IssuerRegistry']] = None, verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, decrypter: Optional['Decrypter'] = None) -> Dict:
+    '''Decode a token into a JSON serializable record, capturing decoding errors instead of raising them'''
+    from jwcrypto.common import JWException # pylint: disable=import-outside-toplevel
+
+    try:
+        decoded_token = decode_token(token, public_key, verification_cache, claim_validator, decrypter)
+
+    except (JWException, ValueError) as e:
+        return {'token': token, 'error': str(e)}
+
+    record = {
+        'header': decoded_token.header,
+        'payload': decoded_token.payload,
+        'verified': decoded_token.verified,
+    }
+    if decoded_token.encryption_header is not None:
+        record['encryption_header'] = decoded_token.encryption_header
+    if decoded_token.claim_errors is not None:
+        record['claims'] = {'valid': decoded_token.claims_valid, 'errors': decoded_token.claim_errors}
+
+    return record
+
+
+def decode_tokens(tokens: Iterable[str], public_key: Optional[Union['JWK', 'JWKSet', 'KeyStore', 'IssuerRegistry']] = None, verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, decrypter: Optional['Decrypter'] = None) -> Iterator[Dict]:
+    '''Lazily decode tokens so that only a single record is held in memory at a time'''
+    for token in tokens:
+        yield decode_token_as_record(token, public_key, verification_cache, claim_validator, decrypter)
+
+
+def _initialize_worker(public_key: Optional[Union['JWK', 'JWKSet', 'KeyStore', 'IssuerRegistry']], verification_cache: Optional['VerificationCache'], claim_validator: Optional['ClaimValidator'], profile: bool = False, decrypter: Optional['Decrypter'] = None) -> None:
+    global _worker_public_key, _worker_verification_cache, _worker_claim_validator, _worker_decrypter, _worker_timer # pylint: disable=global-statement
+    _worker_public_key = public_key
+    _worker_verification_cache = verification_cache
+    _worker_claim_validator = claim_validator
+    _worker_decrypter = decrypter
+    if profile:
+        # Stays active for the lifetime of the worker process
+        _worker_timer = StageTimer().start()
+
+
+def _decode_token_as_record_in_worker(token: str) -> Dict:
+    return decode_token_as_record(token, _worker_public_key, _worker_verification_cache, _worker_claim_validator, _worker_decrypter)
+
+
+def _decode_token_as_timed_record_in_worker(token: str) -> Tuple[Dict, Dict[str, List[float]]]:
+    record = _decode_token_as_record_in_worker(token)
+    return record, _worker_timer.drain()
+
+
+def _bounded(tokens: Iterable[str], in_flight: Semaphore, stopped: Event) -> Iterator[str]:
+    # The pool reads its input from a separate thread as fast as it can so each token waits for a record to be handed out first
+    for token in tokens:
+        in_flight.acquire() # pylint: disable=consider-using-with
+        if stopped.is_set():
+            return
+        yield token
+
+
+def decode_tokens_in_parallel(tokens: Iterable[str], public_key: Optional[Union['JWK', 'JWKSet', 'KeyStore', 'IssuerRegistry']] = None, workers: int = 1, ordered: bool = True, chunk_size: int = 64, verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, timer: Optional[StageTimer] = None, decrypter: Optional['Decrypter'] = None) -> Iterator[Dict]:
+    '''Decode tokens across a pool of worker processes
+
+    The public key, verification cache, claim validator and decrypter are shipped to each worker once when the pool starts rather than with every token.
+    Each worker keeps its own cache of unwrapped content encryption keys.
+    Tokens are streamed through a single imap with a bounded number in flight so that memory use stays flat regardless of input size without workers waiting on each other.
+    Stage timings recorded by the workers are sent back with each record and collected by the timer.
+    '''
+    if workers <= 1:
+        yield from decode_tokens(tokens, public_key, verification_cache, claim_validator, decrypter)
+        return
+
+    from multiprocessing import Pool # pylint: disable=import-outside-toplevel
+
+    max_in_flight = workers * chunk_size * 4
+    in_flight = Semaphore(max_in_flight)
+    stopped = Event()
+    with Pool(workers, initializer=_initialize_worker, initargs=(public_key, verification_cache, claim_validator, timer is not None, decrypter)) as pool:
+        imap_ = pool.imap if ordered else pool.imap_unordered
+        function = _decode_token_as_record_in_worker if timer is None else _decode_token_as_timed_record_in_worker
+        try:
+            for result in imap_(function, _bounded(tokens, in_flight, stopped), chunksize=chunk_size):
+                in_flight.release()
+                if timer is None:
+                    yield result
+                    continue
+
+                record, samples = result
+                timer.extend(samples)
+                yield record
+
+        finally:
+            # Unblock the pool's input thread when results are abandoned so that the pool can shut down
+            stopped.set()
+            for _ in range(max_in_flight):
+                in_flight.release()
+
+
+def update_exit_code(exit_code: int, record: Dict) -> int:
+    '''Exit code for the worst token seen so far
+
+    Tokens that could not be decoded or verified take precedence over tokens with invalid claims.
+    '''
+    if 'error' in record or record.get('verified') is False:
+        return EXIT_INVALID_SIGNATURE
+
+    if exit_code == 0 and record.get('claims', {}).get('valid') is False:
+        return EXIT_INVALID_CLAIMS
+
+    return exit_code
+
+
+def write_records(records: Iterable[Dict], stream: BinaryIO) -> int:
+    '''Write records as newline-delimited JSON straight to a binary stream returning an exit code for the worst token'''
+    exit_code = 0
+    for record in records:
+        exit_code = update_exit_code(exit_code, record)
+        stream.write(dumps_compact(record) + b'\n')
+
+    stream.flush()
+    return exit_code
@@ -0,0 +1,115 @@
+import os
+import re
+import json
+import time
+from typing import Dict
+from typing import Optional
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import requests
+
+from jwt_debugger.decoder import HTTP_TIMEOUT
+
+
+MAX_AGE_PATTERN = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?', flags=re.IGNORECASE)
+
+
+class OfflineCacheMiss(Exception):
+    pass
+
+
+def default_cache_directory() -> Path:
+    '''Resolve cache directory following the XDG Base Directory Specification'''
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'jwt-debugger'
+
+
+def parse_cache_control(value: Optional[str]) -> Dict:
+    '''Parse the Cache-Control directives relevant to caching OpenID Connect documents'''
+    value = value or ''
+    directives = {x.strip().lower() for x in value.split(',')}
+    match = MAX_AGE_PATTERN.search(value)
+
+    return {
+        'max_age': int(match.group(1)) if match else 0,
+        'no_store': 'no-store' in directives,
+        'no_cache': 'no-cache' in directives,
+    }
+
+
+class HTTPCache:
+    '''Persistent cache for OpenID Connect discovery documents and JSON Web Key Sets
+
+    Entries are considered fresh for the max-age advertised by the server. Stale
+    entries are revalidated with If-None-Match/If-Modified-Since so that unchanged
+    documents are not downloaded again.
+    '''
+    def __init__(self, directory: Optional[Path] = None, refresh: bool = False, offline: bool = False, timeout: float = HTTP_TIMEOUT):
+        self.directory = default_cache_directory() if directory is None else Path(directory)
+        self.refresh = refresh
+        self.offline = offline
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def _entry_path(self, url: str) -> Path:
+        return self.directory / f'{sha256(url.encode()).hexdigest()}.json'
+
+    def _read_entry(self, url: str) -> Optional[Dict]:
+        try:
+            with self._entry_path(url).open() as f:
+                entry = json.load(f)
+
+        except (OSError, ValueError):
+            return None
+
+        return entry if entry.get('url') == url else None
+
+    def _write_entry(self, entry: Dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False) as f:
+            json.dump(entry, f)
+
+        os.replace(f.name, self._entry_path(entry['url']))
+
+    def get_text(self, url: str) -> str:
+        entry = self._read_entry(url)
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f'Url({url}) is not available in the cache.')
+            return entry['body']
+
+        if entry is not None and not self.refresh and entry.get('expires', 0) > time.time():
+            return entry['body']
+
+        headers = {}
+        if entry is not None and not self.refresh:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self._session.get(url, headers=headers, timeout=self.timeout)
+        cache_control = parse_cache_control(response.headers.get('Cache-Control'))
+        expires = 0 if cache_control['no_cache'] else time.time() + cache_control['max_age']
+
+        if response.status_code == 304 and entry is not None:
+            entry['expires'] = expires
+            self._write_entry(entry)
+            return entry['body']
+
+        response.raise_for_status()
+        if not cache_control['no_store']:
+            self._write_entry({
+                'url': url,
+                'body': response.text,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'expires': expires,
+            })
+
+        return response.text
+
+    def get_json(self, url: str) -> Dict:
+        return json.loads(self.get_text(url))
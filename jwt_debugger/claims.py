@@ -0,0 +1,183 @@
+import re
+import json
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+from typing import Iterable
+from typing import Optional
+from pathlib import Path
+from datetime import datetime
+from datetime import timezone
+
+from jwt_debugger.timings import timed
+
+
+class InvalidClaimPolicy(ValueError):
+    pass
+
+
+# Operators available to custom claim rules in policy files
+OPERATORS = ('equals', 'one_of', 'contains', 'pattern')
+
+
+def _format_timestamp(timestamp: float) -> str:
+    try:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+    except (OverflowError, OSError, ValueError):
+        return str(timestamp) # dates outside of the range datetime supports
+
+
+def _as_tuple(value: Optional[Union[str, Iterable[str]]]) -> Tuple:
+    if value is None:
+        return ()
+    return (value,) if isinstance(value, str) else tuple(value)
+
+
+class ClaimValidator:
+    '''Claim rules compiled once into a list of checks applied to every decoded payload
+
+    Only the checks for configured rules are kept, allowed values are turned into sets
+    and patterns are compiled up front so that validating a token is a handful of
+    lookups. Validation returns a description of every failed rule.
+    '''
+    def __init__(self, leeway: float = 0, verify_exp: bool = True, verify_nbf: bool = True, issuers: Iterable[str] = (), audiences: Iterable[str] = (), required: Iterable[str] = (), rules: Optional[Dict[str, Dict]] = None):
+        self.leeway = leeway
+        self.issuers = frozenset(issuers)
+        self.audiences = frozenset(audiences)
+        self.required = tuple(dict.fromkeys(required))
+        self.rules = tuple(self._compile_rule(name, rule) for name, rule in (rules or {}).items())
+
+        self._checks = []
+        if verify_exp:
+            self._checks.append(self._check_exp)
+        if verify_nbf:
+            self._checks.append(self._check_nbf)
+        if self.issuers:
+            self._checks.append(self._check_iss)
+        if self.audiences:
+            self._checks.append(self._check_aud)
+        if self.required:
+            self._checks.append(self._check_required)
+        if self.rules:
+            self._checks.append(self._check_rules)
+
+    @classmethod
+    def from_policy(cls, policy: Dict, **overrides) -> 'ClaimValidator':
+        '''Compile a policy document (e.g. {"iss": [...], "aud": [...], "require": [...], "claims": {...}})'''
+        if not isinstance(policy, dict):
+            raise InvalidClaimPolicy('Claim policy must be a JSON object.')
+
+        parameters = {
+            'leeway': policy.get('leeway', 0),
+            'verify_exp': policy.get('verify_exp', True),
+            'verify_nbf': policy.get('verify_nbf', True),
+            'issuers': _as_tuple(policy.get('iss')),
+            'audiences': _as_tuple(policy.get('aud')),
+            'required': _as_tuple(policy.get('require')),
+            'rules': policy.get('claims', {}),
+        }
+        for name, value in overrides.items():
+            parameters[name] = parameters[name] + tuple(value) if isinstance(parameters[name], tuple) else value
+
+        return cls(**parameters)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], **overrides) -> 'ClaimValidator':
+        try:
+            policy = json.loads(Path(path).read_text())
+
+        except ValueError as e:
+            raise InvalidClaimPolicy(f'Claim policy({path}) is not valid JSON.') from e
+
+        return cls.from_policy(policy, **overrides)
+
+    @staticmethod
+    def _compile_rule(name: str, rule: Dict) -> Tuple[str, str, Any]:
+        if not isinstance(rule, dict) or len(rule) != 1 or next(iter(rule)) not in OPERATORS:
+            raise InvalidClaimPolicy(f'Claim({name}) rule must have exactly one of ({", ".join(OPERATORS)}).')
+
+        operator, operand = next(iter(rule.items()))
+        if operator == 'one_of':
+            # A string would otherwise allow any of its characters
+            if not isinstance(operand, list):
+                raise InvalidClaimPolicy(f'Claim({name}) one_of must be a list of values.')
+            operand = tuple(operand)
+
+        elif operator == 'pattern':
+            try:
+                operand = re.compile(operand)
+            except re.error as e:
+                raise InvalidClaimPolicy(f'Claim({name}) pattern is not a valid regular expression.') from e
+
+        return name, operator, operand
+
+    @timed('claims')
+    def validate(self, payload: Dict, now: Optional[float] = None) -> List[str]:
+        '''Check a payload returning the reasons it failed, which is empty for valid claims'''
+        now = time.time() if now is None else now
+        errors = []
+        for check in self._checks:
+            check(payload, now, errors)
+        return errors
+
+    def _check_exp(self, payload: Dict, now: float, errors: List[str]) -> None:
+        exp = payload.get('exp')
+        if exp is None:
+            return
+        if not isinstance(exp, (int, float)):
+            errors.append('Claim(exp) is not a numeric date.')
+        elif exp + self.leeway <= now:
+            errors.append(f'Claim(exp) token expired at {_format_timestamp(exp)}.')
+
+    def _check_nbf(self, payload: Dict, now: float, errors: List[str]) -> None:
+        nbf = payload.get('nbf')
+        if nbf is None:
+            return
+        if not isinstance(nbf, (int, float)):
+            errors.append('Claim(nbf) is not a numeric date.')
+        elif nbf - self.leeway > now:
+            errors.append(f'Claim(nbf) token is not valid before {_format_timestamp(nbf)}.')
+
+    def _check_iss(self, payload: Dict, unused_now: float, errors: List[str]) -> None:
+        iss = payload.get('iss')
+        if not isinstance(iss, str) or iss not in self.issuers:
+            errors.append(f'Claim(iss) {json.dumps(iss)} is not an expected issuer.')
+
+    def _check_aud(self, payload: Dict, unused_now: float, errors: List[str]) -> None:
+        aud = payload.get('aud')
+        audiences = [aud] if isinstance(aud, str) else aud if isinstance(aud, list) else []
+        if self.audiences.isdisjoint(x for x in audiences if isinstance(x, str)):
+            errors.append(f'Claim(aud) {json.dumps(aud)} does not contain an expected audience.')
+
+    def _check_required(self, payload: Dict, unused_now: float, errors: List[str]) -> None:
+        for name in self.required:
+            if name not in payload:
+                errors.append(f'Claim({name}) is required.')
+
+    def _check_rules(self, payload: Dict, unused_now: float, errors: List[str]) -> None:
+        for name, operator, operand in self.rules:
+            if name not in payload:
+                errors.append(f'Claim({name}) is required.')
+                continue
+
+            value = payload[name]
+            if operator == 'equals':
+                valid = value == operand
+
+            elif operator == 'one_of':
+                valid = value in operand
+
+            elif operator == 'contains':
+                # Scopes are commonly a space-delimited string rather than a list
+                values = value.split() if isinstance(value, str) else value
+                valid = isinstance(values, list) and operand in values
+
+            else:
+                valid = isinstance(value, str) and operand.fullmatch(value) is not None
+
+            if not valid:
+                errors.append(f'Claim({name}) {json.dumps(value)} does not satisfy {operator} {json.dumps(operand if operator != "pattern" else operand.pattern)}.')
@@ -0,0 +1,14 @@
+import json
+import socket
+from typing import Dict
+
+from jwt_debugger.serialize import dumps_compact
+
+
+def request_decode(socket_path: str, token: str) -> Dict:
+    '''Ask a running server to decode a token returning the same record as batch mode'''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(dumps_compact({'token': token}) + b'\n')
+        with client.makefile('rb') as response:
+            return json.loads(response.readline())
@@ -1,68 +1,653 @@
+import os
 import sys
+import time
 from io import TextIOWrapper
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
 from typing import Optional
+from typing import TYPE_CHECKING
+from functools import wraps
 from functools import partial
+from contextlib import nullcontext
 
-from rich import print  # pylint: disable=redefined-builtin
 from click import File
+from click import Path
+from click import Group
+from click import echo
 from click import Choice
+from click import IntRange
+from click import FloatRange
 from click import option
 from click import command
 from click import argument
 from click import get_text_stream
+from click import get_binary_stream
+from click import get_current_context
 from click.core import Context
 from click.core import Argument
 from click.exceptions import UsageError
+from click.exceptions import ClickException
 
-from jwt_debugger.console import JSONDecodedToken
-from jwt_debugger.console import PrettyDecodedToken
+from jwt_debugger.decoder import ParsedToken
+from jwt_debugger.decoder import DecodedToken
+from jwt_debugger.decoder import MalformedToken
+from jwt_debugger.decoder import DecryptionFailed
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+from jwt_debugger.decoder import parse_token
 from jwt_debugger.decoder import decode_token
+from jwt_debugger.decoder import is_encrypted_token
 from jwt_debugger.decoder import load_jwk_from_file
-from jwt_debugger.decoder import load_jwkset_from_oidc_url
+from jwt_debugger.decoder import load_jwk_from_secret
+from jwt_debugger.decoder import load_jwks_from_oidc_url
 from jwt_debugger.decoder import resolve_jwks_uri_from_oidc_provider
+from jwt_debugger.timings import timed
+from jwt_debugger.timings import TIMINGS_FORMATS
 
 
-def read_token_argument(unused_context: Context, unused_argument: Argument, value: Optional[str]) -> str:
+# Each path only imports what it needs (e.g. requests for OpenID Connect, rich tables
+# for pretty output and jwcrypto for verification) to keep startup fast
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:
+    from jwcrypto.jwk import JWK
+
+    from jwt_debugger.claims import ClaimValidator
+    from jwt_debugger.keystore import KeyStore
+    from jwt_debugger.decrypter import Decrypter
+    from jwt_debugger.registry import IssuerRegistry
+    from jwt_debugger.results import VerificationCache
+    from jwt_debugger.timings import StageTimer
+
+
+def read_token_argument(context: Context, unused_argument: Argument, value: Optional[str]) -> Optional[str]:
+    # Batch mode streams tokens from standard input line by line while extraction and following read them from files instead
+    if context.params.get('batch') or context.params.get('extract') or context.params.get('follow_path'):
+        return value
+
     if value is None:
         stdin_stream = get_text_stream('stdin')
         return stdin_stream.read().strip()
     return value
 
 
-@command()
-@option('--public-key', type=File(), help='JSON Web Key in JSON or PEM format for signature verification.')
-@option('--oidc-provider-url', help='OpenID Connect Provider URL where JSON Web Key Set can be pulled for signature verification.')
-@option('--format', 'output_format', type=Choice(['pretty', 'json']), default='pretty', help='Output format')
-@argument('token', required=False, callback=read_token_argument)
-def cli(token: str, output_format: str, public_key: Optional[TextIOWrapper] = None, oidc_provider_url: str = None) -> None:
+class DefaultCommandGroup(Group):
+    '''Command group that falls back to a default command so that tokens can be passed without naming a command'''
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: Context, args: List[str]) -> List[str]:
+        # Help for the group is kept so that every command is listed, tokens and decode options fall through
+        if not args or args[0] not in self.commands and args[0] not in self.get_help_option_names(ctx):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+def key_options(function: Callable) -> Callable:
+    '''Options shared by every command that verifies signatures'''
+    options = [
+        option('--public-key', type=File(), help='JSON Web Key in JSON or PEM format for signature verification.'),
+        option('--secret', envvar='JWT_DEBUGGER_SECRET', help='Shared secret for HMAC (HS256, HS384, HS512) signature verification, also read from JWT_DEBUGGER_SECRET.'),
+        option('--private-key', type=File(), help='Private JSON Web Key or JSON Web Key Set in JSON or PEM format for decrypting encrypted tokens (JWE).'),
+        option('--oidc-provider-url', help='OpenID Connect Provider URL where JSON Web Key Set can be pulled for signature verification.'),
+        option('--keyring', 'keyring_path', type=Path(exists=True, dir_okay=False), help='Keyring created with the keyring command for signature verification.'),
+        option('--issuers', 'issuers_path', type=Path(exists=True, dir_okay=False), help='JSON file mapping token issuers to OpenID Connect Provider URLs or key files.'),
+        option('--cache', 'use_cache', is_flag=True, help='Cache OpenID Connect configuration and JSON Web Key Sets on disk.'),
+        option('--refresh-cache', is_flag=True, help='Ignore cached OpenID Connect documents and fetch them again.'),
+        option('--offline', is_flag=True, help='Only use cached OpenID Connect documents without making network requests.'),
+    ]
+    for option_ in reversed(options):
+        function = option_(function)
+    return function
+
+
+def result_cache_options(function: Callable) -> Callable:
+    '''Options for caching signature verification results of repeated tokens, passed on as verification_cache'''
+    @wraps(function)
+    def wrapper(*args, result_cache: bool = False, result_cache_file: Optional[str] = None, result_cache_size: int = 100000, **kwargs):
+        return function(*args, verification_cache=load_verification_cache(result_cache, result_cache_file, result_cache_size), **kwargs)
+
+    options = [
+        option('--result-cache', is_flag=True, help='Remember signature verification results of repeated tokens in memory.'),
+        option('--result-cache-file', type=Path(dir_okay=False), help='Persist signature verification results to this file between runs.'),
+        option('--result-cache-size', type=IntRange(min=1), default=100000, help='Maximum number of remembered verification results.'),
+    ]
+    for option_ in reversed(options):
+        wrapper = option_(wrapper)
+    return wrapper
+
+
+def claim_options(function: Callable) -> Callable:
+    '''Options for validating claims of decoded tokens, passed on as claim_validator'''
+    @wraps(function)
+    def wrapper(*args, validate_claims: bool = False, claims_policy_path: Optional[str] = None, expected_issuers: Tuple[str, ...] = (), expected_audiences: Tuple[str, ...] = (), required_claims: Tuple[str, ...] = (), leeway: Optional[int] = None, **kwargs):
+        return function(*args, claim_validator=load_claim_validator(validate_claims, claims_policy_path, expected_issuers, expected_audiences, required_claims, leeway), **kwargs)
+
+    options = [
+        option('--validate-claims', is_flag=True, help='Validate exp and nbf claims.'),
+        option('--claims-policy', 'claims_policy_path', type=Path(exists=True, dir_okay=False), help='JSON file with claim rules to validate.'),
+        option('--expected-issuer', 'expected_issuers', multiple=True, help='Issuer the iss claim must match (repeatable).'),
+        option('--expected-audience', 'expected_audiences', multiple=True, help='Audience the aud claim must contain (repeatable).'),
+        option('--require-claim', 'required_claims', multiple=True, help='Claim that must be present (repeatable).'),
+        option('--leeway', type=IntRange(min=0), help='Seconds of clock skew allowed when validating exp and nbf.'),
+    ]
+    for option_ in reversed(options):
+        wrapper = option_(wrapper)
+    return wrapper
+
+
+def load_claim_validator(validate_claims: bool = False, claims_policy_path: Optional[str] = None, expected_issuers: Tuple[str, ...] = (), expected_audiences: Tuple[str, ...] = (), required_claims: Tuple[str, ...] = (), leeway: Optional[int] = None) -> Optional['ClaimValidator']:
+    if not any([validate_claims, claims_policy_path, expected_issuers, expected_audiences, required_claims, leeway is not None]):
+        return None
+
+    from jwt_debugger.claims import ClaimValidator # pylint: disable=redefined-outer-name
+    from jwt_debugger.claims import InvalidClaimPolicy
+
+    overrides = {'issuers': expected_issuers, 'audiences': expected_audiences, 'required': required_claims}
+    if leeway is not None:
+        overrides['leeway'] = leeway
+
+    try:
+        if claims_policy_path is not None:
+            return ClaimValidator.from_file(claims_policy_path, **overrides)
+        return ClaimValidator.from_policy({}, **overrides)
+
+    except InvalidClaimPolicy as e:
+        raise ClickException(str(e)) from e
+
+
+def load_verification_cache(result_cache: bool = False, result_cache_file: Optional[str] = None, result_cache_size: int = 100000) -> Optional['VerificationCache']:
+    if not result_cache and result_cache_file is None:
+        return None
+
+    from jwt_debugger.results import VerificationCache # pylint: disable=redefined-outer-name
+
+    return VerificationCache(result_cache_size, result_cache_file)
+
+
+def save_verification_cache(verification_cache: Optional['VerificationCache']) -> None:
+    if verification_cache is not None and verification_cache.path is not None:
+        verification_cache.save()
+
+
+def load_decrypter(private_key: Optional[TextIOWrapper] = None) -> Optional['Decrypter']:
+    if private_key is None:
+        return None
+
+    from jwt_debugger.decrypter import Decrypter # pylint: disable=redefined-outer-name
+    from jwt_debugger.decrypter import load_private_key
+
+    try:
+        return Decrypter(load_private_key(private_key))
+
+    except ValueError as e:
+        raise UsageError(f'Private key could not be loaded ({e}).') from e
+
+
+def load_public_key(public_key: Optional[TextIOWrapper] = None, secret: Optional[str] = None, oidc_provider_url: str = None, keyring_path: Optional[str] = None, issuers_path: Optional[str] = None, use_cache: bool = False, refresh_cache: bool = False, offline: bool = False) -> Optional[Union['JWK', 'KeyStore', 'IssuerRegistry']]:
     if all([public_key, oidc_provider_url]):
         raise UsageError('The following options can not be used together (--public-key, --oidc-provider-url).')
 
-    token_parts = token.split('.')
-    if len(token_parts) != 3:
-        raise UsageError('Token must consist of a header, payload, and signature all separated by periods.')
+    if keyring_path is not None and any([public_key, oidc_provider_url]):
+        raise UsageError('The following options can not be used together (--keyring, --public-key, --oidc-provider-url).')
+
+    if issuers_path is not None and any([public_key, oidc_provider_url, keyring_path]):
+        raise UsageError('The following options can not be used together (--issuers, --public-key, --oidc-provider-url, --keyring).')
+
+    if secret is not None and any([public_key, oidc_provider_url, keyring_path, issuers_path]):
+        raise UsageError('The following options can not be used together (--secret, --public-key, --oidc-provider-url, --keyring, --issuers).')
+
+    if all([refresh_cache, offline]):
+        raise UsageError('The following options can not be used together (--refresh-cache, --offline).')
+
+    if public_key is not None:
+        return load_jwk_from_file(public_key)
+
+    if secret is not None:
+        return load_jwk_from_secret(secret)
+
+    if keyring_path is not None:
+        from jwt_debugger.keyring import InvalidKeyring
+        from jwt_debugger.keyring import read_keyring
+        from jwt_debugger.keystore import KeyStore # pylint: disable=redefined-outer-name
+
+        try:
+            return KeyStore.from_prepared_keys(read_keyring(keyring_path))
+
+        except InvalidKeyring as e:
+            raise ClickException(str(e)) from e
+
+    if oidc_provider_url is None and issuers_path is None:
+        return None
+
+    from jwt_debugger.cache import HTTPCache
+    from jwt_debugger.cache import OfflineCacheMiss
+    from jwt_debugger.keystore import KeyStore # pylint: disable=redefined-outer-name
+    from jwt_debugger.registry import IssuerRegistry # pylint: disable=redefined-outer-name
+
+    cache = HTTPCache(refresh=refresh_cache, offline=offline) if any([use_cache, refresh_cache, offline]) else None
+    if issuers_path is not None:
+        return IssuerRegistry.from_file(issuers_path, cache=cache)
+
+    try:
+        jwks_uri = resolve_jwks_uri_from_oidc_provider(oidc_provider_url, cache=cache)
+        return KeyStore(partial(load_jwks_from_oidc_url, jwks_uri, cache=cache))
+
+    except OfflineCacheMiss as e:
+        raise ClickException(str(e)) from e
+
+
+def follow_tokens(path: str, public_key: Optional[Union['JWK', 'KeyStore', 'IssuerRegistry']] = None, verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, decrypter: Optional['Decrypter'] = None) -> int:
+    '''Verify tokens appended to a log with a live report until interrupted, returning an exit code'''
+    from rich.live import Live
+
+    from jwt_debugger.batch import decode_tokens
+    from jwt_debugger.follow import FRAME_RATE
+    from jwt_debugger.follow import follow_file
+    from jwt_debugger.report import TokenReport
+    from jwt_debugger.console import LiveTokenReport
+    from jwt_debugger.extract import extract_tokens_from_chunks
+
+    token_report = TokenReport(top=5)
+    live_report = LiveTokenReport(token_report, path)
+    tokens = token_report.count(extract_tokens_from_chunks(follow_file(path)))
+    try:
+        with Live(live_report, refresh_per_second=FRAME_RATE):
+            for record in decode_tokens(tokens, public_key, verification_cache, claim_validator, decrypter):
+                with live_report.lock:
+                    token_report.now = time.time() # expiry is relative to when a token was seen
+                    token_report.add(record)
+
+    except KeyboardInterrupt:
+        pass
+
+    return token_report.exit_code
+
+
+def finish_profile(timer: 'StageTimer', profile: bool, profile_file: Optional[str], profile_format: str) -> None:
+    from jwt_debugger.timings import write_timings
+
+    timer.stop()
+    summary = timer.summary()
+    if profile_file is not None:
+        write_timings(summary, profile_file, profile_format)
+
+    if profile:
+        from rich.console import Console
+
+        from jwt_debugger.console import PrettyTimings
+
+        Console(stderr=True).print(PrettyTimings(summary))
+
+
+def start_profile(profile: bool = False, profile_file: Optional[str] = None, profile_format: str = 'json') -> Optional['StageTimer']:
+    '''Time each stage until the command finishes, including when it exits with an error code'''
+    if not profile and profile_file is None:
+        return None
+
+    from jwt_debugger.timings import StageTimer # pylint: disable=redefined-outer-name
+
+    timer = StageTimer().start()
+    get_current_context().call_on_close(partial(finish_profile, timer, profile, profile_file, profile_format))
+    return timer
+
+
+@timed('render')
+def print_decoded_token(decoded_token: DecodedToken, output_format: str, full: bool = False, pager: bool = False) -> None:
+    if output_format in ('json', 'raw'):
+        from jwt_debugger.console import JSONDecodedToken
+
+        console_renderable = JSONDecodedToken(decoded_token.header, decoded_token.payload, decoded_token.claim_errors, decoded_token.encryption_header)
+
+    else:
+        from jwt_debugger.console import PrettyDecodedToken
+
+        console_renderable = PrettyDecodedToken(decoded_token.token, decoded_token.header, decoded_token.payload, decoded_token.verified, decoded_token.segments, decoded_token.claim_errors, full, decoded_token.encryption_header)
+
+    # Rich is only needed for pretty output or highlighting JSON in a terminal
+    if output_format == 'raw':
+        from jwt_debugger.serialize import dumps_compact
+
+        stdout = get_binary_stream('stdout')
+        stdout.write(dumps_compact(console_renderable.as_dict()) + b'\n')
+        stdout.flush()
+
+    elif output_format == 'json' and not pager and not get_text_stream('stdout').isatty():
+        echo(str(console_renderable))
+
+    else:
+        from rich import get_console
+
+        console = get_console()
+        with console.pager(styles=True) if pager else nullcontext():
+            console.print(console_renderable)
+
+
+@timed('render')
+def print_report(summary: Dict, output_format: str) -> None:
+    if output_format == 'raw':
+        from jwt_debugger.serialize import dumps_compact
+
+        get_binary_stream('stdout').write(dumps_compact(summary) + b'\n')
+        return
+
+    if output_format == 'json':
+        import json
+
+        echo(json.dumps(summary, indent=4))
+        return
+
+    from rich import print # pylint: disable=redefined-builtin
 
-    if any([public_key, oidc_provider_url]):
-        if public_key is not None:
-            load_public_key_ = partial(load_jwk_from_file, public_key)
+    from jwt_debugger.console import PrettyTokenReport
 
-        else:
-            jwks_uri = resolve_jwks_uri_from_oidc_provider(oidc_provider_url)
-            load_public_key_ = partial(load_jwkset_from_oidc_url, jwks_uri)
+    print(PrettyTokenReport(summary))
 
-        decode_token_ = partial(decode_token, public_key=load_public_key_())
+
+def load_export_options(export_format: str, columns: Tuple[str, ...], sample_size: int, record_batch_size: int) -> Dict:
+    '''Check export options before any token is decoded returning the keyword arguments of export_records'''
+    from jwt_debugger.export import parse_column
+    from jwt_debugger.export import load_pyarrow
+
+    try:
+        columns = [parse_column(x) for x in columns] or None
+        if export_format != 'csv':
+            load_pyarrow()
+
+    except (ValueError, ImportError) as e:
+        raise UsageError(str(e)) from e
+
+    return {'export_format': export_format, 'columns': columns, 'sample_size': sample_size, 'batch_size': record_batch_size}
+
+
+def parse_token_argument(token: str, decrypt: bool = False) -> Union[str, ParsedToken]:
+    try:
+        # Encrypted tokens are left as they are when they can be decrypted
+        return token if decrypt and is_encrypted_token(token) else parse_token(token)
+
+    except MalformedToken as e:
+        raise UsageError(str(e)) from e
+
+
+def decode_with_server(socket_path: str, token: str, claim_validator: Optional['ClaimValidator'] = None) -> DecodedToken:
+    '''Decode a token with a server started by the serve command'''
+    from jwt_debugger.client import request_decode
+
+    # Encrypted tokens are decrypted by the server
+    parsed_token = parse_token_argument(token, decrypt=True)
+    record = request_decode(socket_path, token)
+    if 'error' in record:
+        raise ClickException(record['error'])
+
+    # Claims are validated locally so that each client can apply its own rules
+    claim_errors = None if claim_validator is None else claim_validator.validate(record['payload'])
+    segments = None if isinstance(parsed_token, str) else parsed_token.segments
+    return DecodedToken(token, record['header'], record['payload'], record['verified'], segments, claim_errors, record.get('encryption_header'))
+
+
+def decode_token_argument(token: Union[str, ParsedToken], public_key: Optional[Union['JWK', 'KeyStore', 'IssuerRegistry']] = None, verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, decrypter: Optional['Decrypter'] = None) -> DecodedToken:
+    try:
+        return decode_token(token, public_key, verification_cache, claim_validator, decrypter)
+
+    except MalformedToken as e:
+        raise UsageError(str(e)) from e
+
+    except DecryptionFailed as e:
+        raise ClickException(str(e)) from e
+
+
+def read_tokens_from_input(token: Optional[str], batch: bool = False) -> Iterator[str]:
+    '''Read newline-delimited tokens from standard input or extract tokens from a file or standard input'''
+    if batch:
+        from jwt_debugger.batch import read_tokens
+
+        return read_tokens(get_text_stream('stdin'))
+
+    from jwt_debugger.extract import extract_tokens_from_path
+    from jwt_debugger.extract import extract_tokens_from_stream
+
+    return extract_tokens_from_stream(get_binary_stream('stdin')) if token in (None, '-') else extract_tokens_from_path(token)
+
+
+def write_batch_results(tokens: Iterable[str], decoder: Callable[[Iterable[str]], Iterator[Dict]], output_format: str, report: bool = False, export: Optional[Dict] = None, output_path: Optional[str] = None) -> int:
+    '''Decode tokens and write them as newline-delimited JSON, a report or an export returning an exit code for the worst token'''
+    if report:
+        from jwt_debugger.report import TokenReport
+
+        token_report = TokenReport()
+        exit_code = token_report.add_records(decoder(token_report.deduplicate(tokens))).exit_code
+        print_report(token_report.summary(), output_format)
+        return exit_code
+
+    if export is not None:
+        from jwt_debugger.export import export_records
+
+        with open(output_path, 'wb') if output_path else nullcontext(get_binary_stream('stdout')) as stream:
+            export_summary = export_records(decoder(tokens), stream, **export)
+
+        if export_summary.mismatched_values:
+            echo(f'Warning: {export_summary.mismatched_values} values did not match the column types inferred from the sample and were exported as null (increase --sample-size).', err=True)
+        return export_summary.exit_code
+
+    from jwt_debugger.batch import write_records
+
+    return write_records(decoder(tokens), get_binary_stream('stdout'))
+
+
+def check_decode_options(token: Optional[str], batch: bool = False, extract: bool = False, follow_path: Optional[str] = None, report: bool = False, export_format: Optional[str] = None, output_path: Optional[str] = None, columns: Tuple[str, ...] = (), workers: int = 1, unordered: bool = False, socket_path: Optional[str] = None, keys_loaded: bool = False) -> None:
+    '''Reject combinations of decode options that can not be used together'''
+    if batch and extract:
+        raise UsageError('The following options can not be used together (--batch, --extract).')
+
+    if batch and token is not None:
+        raise UsageError('Tokens are read from standard input when using --batch.')
+
+    if not (batch or extract) and (workers > 1 or unordered or report or export_format):
+        raise UsageError('The following options can only be used with --batch or --extract (--workers, --unordered, --report, --export).')
+
+    if report and export_format:
+        raise UsageError('The following options can not be used together (--report, --export).')
+
+    if not export_format and (output_path or columns):
+        raise UsageError('The following options can only be used with --export (--output, --column).')
+
+    if follow_path is not None and (batch or extract or socket_path or token is not None):
+        raise UsageError('The following options can not be used together (--follow, --batch, --extract, --connect, TOKEN).')
+
+    if extract and token not in (None, '-') and not os.path.isfile(token):
+        raise UsageError(f'Path({token}) does not exist or is not a file.')
+
+    if socket_path is not None and (batch or extract or keys_loaded):
+        raise UsageError('Keys are loaded by the server when using --connect.')
+
+
+def decode_many(token: Optional[str], output_format: str, batch: bool = False, follow_path: Optional[str] = None, report: bool = False, export: Optional[Dict] = None, output_path: Optional[str] = None, workers: int = 1, unordered: bool = False, verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, timer: Optional['StageTimer'] = None, **key_kwargs) -> int:
+    '''Follow a log file or decode tokens from --batch or --extract returning the exit code'''
+    decrypter = load_decrypter(key_kwargs.pop('private_key'))
+    loaded_public_key = load_public_key(**key_kwargs)
+    if follow_path is not None:
+        exit_code = follow_tokens(follow_path, loaded_public_key, verification_cache, claim_validator, decrypter)
+
+    else:
+        from jwt_debugger.batch import decode_tokens_in_parallel
+
+        # Fetch every issuer concurrently up front rather than once per worker process
+        if hasattr(loaded_public_key, 'prefetch'):
+            loaded_public_key.prefetch()
+
+        tokens = read_tokens_from_input(token, batch)
+        decoder = partial(decode_tokens_in_parallel, public_key=loaded_public_key, workers=workers, ordered=not unordered, verification_cache=verification_cache, claim_validator=claim_validator, timer=timer, decrypter=decrypter)
+        exit_code = write_batch_results(tokens, decoder, output_format, report, export, output_path)
+
+    # Worker processes keep their own caches so only single process results are persisted
+    if workers == 1:
+        save_verification_cache(verification_cache)
+
+    return exit_code
+
+
+@command()
+@key_options
+@claim_options
+@result_cache_options
+@option('--format', 'output_format', type=Choice(['pretty', 'json', 'raw']), default='pretty', help='Output format (raw is compact single line JSON)')
+@option('--full', is_flag=True, help='Show large claims and long tokens in full instead of shortening them in pretty output.')
+@option('--pager', is_flag=True, help='Show pretty or json output in a pager.')
+@option('--batch', is_flag=True, is_eager=True, help='Decode newline-delimited tokens from standard input as newline-delimited JSON.')
+@option('--extract', is_flag=True, is_eager=True, help='Decode every token found in logs, HAR files or header dumps given as TOKEN or standard input as newline-delimited JSON.')
+@option('--follow', 'follow_path', type=Path(exists=True, dir_okay=False), is_eager=True, help='Verify tokens appended to a log file (surviving log rotation) with a live dashboard.')
+@option('--report', is_flag=True, help='Summarize unique tokens from --batch or --extract instead of writing each one.')
+@option('--export', 'export_format', type=Choice(['csv', 'parquet', 'arrow']), help='Write header and payload fields with verification results from --batch or --extract as columns instead of JSON (parquet and arrow require pyarrow).')
+@option('--output', 'output_path', type=Path(dir_okay=False), help='File --export writes to instead of standard output.')
+@option('--column', 'columns', multiple=True, help='Column to --export such as verified, error, header.alg or payload.sub (repeatable, defaults to every field in the sample).')
+@option('--sample-size', type=IntRange(min=1), default=1000, help='Number of tokens that --export infers columns and their types from.')
+@option('--record-batch-size', type=IntRange(min=1), default=65536, help='Number of tokens --export converts and writes at a time.')
+@option('--workers', type=IntRange(min=1), default=1, help='Number of processes used for decoding tokens in batch mode.')
+@option('--unordered', is_flag=True, help='Write batch results as soon as they are ready instead of in input order.')
+@option('--connect', 'socket_path', type=Path(dir_okay=False), help='Decode using a server started with the serve command listening on this socket.')
+@option('--profile', is_flag=True, help='Print time spent in each stage (with latency percentiles in batch mode) to standard error.')
+@option('--profile-file', type=Path(dir_okay=False), help='Write stage timings to this file.')
+@option('--profile-format', type=Choice(TIMINGS_FORMATS), default='json', help='Format of --profile-file (prometheus is the text exposition format).')
+@argument('token', required=False, callback=read_token_argument)
+def decode(token: Optional[str], output_format: str, full: bool = False, pager: bool = False, batch: bool = False, extract: bool = False, follow_path: Optional[str] = None, report: bool = False, export_format: Optional[str] = None, output_path: Optional[str] = None, columns: Tuple[str, ...] = (), sample_size: int = 1000, record_batch_size: int = 65536, workers: int = 1, unordered: bool = False, socket_path: Optional[str] = None, profile: bool = False, profile_file: Optional[str] = None, profile_format: str = 'json', verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, **key_kwargs) -> None:
+    '''Decode and verify JSON Web Tokens.
+
+    Exits with 1 when a signature is invalid and 3 when claims are invalid.
+    '''
+    check_decode_options(token, batch, extract, follow_path, report, export_format, output_path, columns, workers, unordered, socket_path, keys_loaded=verification_cache is not None or any(key_kwargs.values()))
+    export = None if not export_format else load_export_options(export_format, columns, sample_size, record_batch_size)
+
+    timer = start_profile(profile, profile_file, profile_format)
+
+    if socket_path is not None:
+        decoded_token = decode_with_server(socket_path, token, claim_validator)
+
+    elif follow_path is None and not (batch or extract):
+        # Encrypted tokens are parsed once they have been decrypted
+        parsed_token = parse_token_argument(token, decrypt=key_kwargs['private_key'] is not None)
+        decrypter = load_decrypter(key_kwargs.pop('private_key'))
+        decoded_token = decode_token_argument(parsed_token, load_public_key(**key_kwargs), verification_cache, claim_validator, decrypter)
+        save_verification_cache(verification_cache)
 
     else:
-        decode_token_ = partial(decode_token, public_key=None)
+        exit_code = decode_many(token, output_format, batch, follow_path, report, export, output_path, workers, unordered, verification_cache, claim_validator, timer, **key_kwargs)
+        if exit_code:
+            sys.exit(exit_code)
+        return
+
+    print_decoded_token(decoded_token, output_format, full, pager)
+
+    if decoded_token.exit_code:
+        sys.exit(decoded_token.exit_code)
+
+
+@command()
+@key_options
+@result_cache_options
+@option('--socket', 'socket_path', type=Path(dir_okay=False), required=True, help='Unix domain socket to listen on.')
+def serve(socket_path: str, verification_cache: Optional['VerificationCache'] = None, **key_kwargs) -> None:
+    '''Keep keys loaded and answer decode requests over a Unix domain socket.'''
+    from jwt_debugger.server import DecodeServer
+
+    decrypter = load_decrypter(key_kwargs.pop('private_key'))
+    server = DecodeServer(socket_path, load_public_key(**key_kwargs), verification_cache, decrypter)
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()
+        save_verification_cache(verification_cache)
+
+
+@command()
+@option('--output', 'output_path', type=Path(dir_okay=False), required=True, help='Keyring file to write.')
+@argument('key_paths', metavar='KEY...', nargs=-1, required=True, type=Path(exists=True, dir_okay=False))
+def keyring(output_path: str, key_paths: Tuple[str, ...]) -> None:
+    '''Prepare JSON Web Keys, Key Sets or PEM files as a keyring that loads quickly.'''
+    from jwcrypto.jwk import JWK # pylint: disable=redefined-outer-name
+
+    from jwt_debugger.decoder import load_jwks_from_path
+    from jwt_debugger.keyring import write_keyring
+
+    keys = [JWK(**x) for path in key_paths for x in load_jwks_from_path(path)['keys']]
+    write_keyring(keys, output_path)
+
+
+@command('find-key')
+@option('--format', 'output_format', type=Choice(['pretty', 'json']), default='pretty', help='Output format.')
+@option('--workers', type=IntRange(min=1), default=8, help='Number of threads used for trying candidate keys.')
+@option('--no-cache', is_flag=True, help='Index every key file again instead of reusing the index kept on disk.')
+@argument('directory', type=Path(exists=True, file_okay=False))
+@argument('token', required=False, callback=read_token_argument)
+def find_key(directory: str, token: Optional[str], output_format: str, workers: int = 8, no_cache: bool = False) -> None:
+    '''Find which JSON Web Key, Key Set or PEM file in DIRECTORY signed TOKEN.'''
+    from jwt_debugger.keyindex import KeyIndex
+    from jwt_debugger.keyindex import find_signing_keys
+
+    key_index = KeyIndex.load(directory, use_cache=not no_cache)
+    try:
+        result = find_signing_keys(token, key_index, workers)
+
+    except MalformedToken as e:
+        raise UsageError(str(e)) from e
 
-    decoded_token = decode_token_(token)
     if output_format == 'json':
-        console_renderable = JSONDecodedToken(decoded_token.header, decoded_token.payload)
+        import json
+
+        echo(json.dumps(result, indent=4))
 
     else:
-        console_renderable = PrettyDecodedToken(decoded_token.token, decoded_token.header, decoded_token.payload, decoded_token.verified)
+        from rich import print # pylint: disable=redefined-builtin
+
+        from jwt_debugger.console import PrettyKeySearch
+
+        print(PrettyKeySearch(result))
+
+    if not result['matches']:
+        sys.exit(EXIT_INVALID_SIGNATURE)
+
+
+@command('mock-idp')
+@option('--host', default='127.0.0.1', help='Address to listen on.')
+@option('--port', type=IntRange(0, 65535), default=8080, help='Port to listen on (0 picks a free port).')
+@option('--key', 'key_paths', multiple=True, type=Path(exists=True, dir_okay=False), help='JSON Web Key, Key Set or PEM file to publish (repeatable). Private keys also sign tokens from /token.')
+@option('--key-count', type=IntRange(min=0), default=0, help='Number of generated RSA keys to publish in addition to --key.')
+@option('--rotate-every', type=FloatRange(min=0, min_open=True), help='Replace the oldest generated key with a new one every this many seconds.')
+@option('--latency', type=FloatRange(min=0), default=0.0, help='Seconds to wait before answering each request.')
+@option('--max-age', type=IntRange(min=0), help='Cache-Control max-age of discovery and key set responses (no-cache when omitted).')
+@option('--verbose', is_flag=True, help='Log every request to standard error.')
+def mock_idp(host: str, port: int, key_paths: Tuple[str, ...], key_count: int, rotate_every: Optional[float], latency: float, max_age: Optional[int], verbose: bool) -> None:
+    '''Serve OpenID Connect discovery and a JSON Web Key Set locally for offline testing and benchmarks.'''
+    from jwcrypto.jwk import JWK # pylint: disable=redefined-outer-name
+
+    from jwt_debugger.decoder import load_jwks_from_path
+    from jwt_debugger.mockidp import MockIdentityProvider
+
+    keys = [JWK(**x) for path in key_paths for x in load_jwks_from_path(path)['keys']]
+    if any(x.get('kty') == 'oct' for x in keys):
+        raise UsageError('Symmetric keys can not be published in a JSON Web Key Set.')
+
+    server = MockIdentityProvider((host, port), keys, key_count, rotate_every, latency, max_age, verbose)
+    echo(f'Serving OpenID Connect Provider {server.issuer}', err=True)
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()
 
-    print(console_renderable)
 
-    if decoded_token.verified is False:
-        sys.exit(1)
+cli = DefaultCommandGroup(
+    commands=[decode, serve, keyring, find_key, mock_idp],
+    default_command='decode',
+    help='Decode and verify JSON Web Tokens.\n\nTokens and options given without a command are passed to the decode command.'
+)
@@ -0,0 +1,114 @@
+import json
+from typing import Any
+from typing import Dict
+from typing import Tuple
+from typing import Iterable
+from typing import Optional
+from base64 import urlsafe_b64decode
+
+from jwt_debugger.decoder import DecodedToken
+from jwt_debugger.decoder import EXIT_INVALID_CLAIMS
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+from jwt_debugger.serialize import dumps_compact
+
+
+def _decode_segment(segment: str) -> bytes:
+    return urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+class CompactDecodedToken:
+    '''Decoded token holding only the JSON bytes of its header and payload
+
+    Results are a fixed size object plus a single bytes object, compared to the token
+    string and two dictionaries of a DecodedToken, so millions of them fit in memory for
+    aggregation or sorting. The signature segment is dropped once it has been verified
+    and the header and payload are decoded again each time they are accessed. Projecting
+    onto the claims that are actually needed shrinks results further.
+    '''
+    __slots__ = ('_data', '_split', '_encryption_header', 'verified', 'claim_errors')
+
+    def __init__(self, header: bytes, payload: bytes, verified: Optional[bool] = None, claim_errors: Optional[Tuple[str, ...]] = None, encryption_header: Optional[bytes] = None):
+        self._data = header + payload
+        self._split = len(header)
+        self._encryption_header = encryption_header
+        self.verified = verified
+        self.claim_errors = claim_errors
+
+    @classmethod
+    def from_decoded_token(cls, decoded_token: DecodedToken, claims: Optional[Iterable[str]] = None) -> 'CompactDecodedToken':
+        '''Keep the original JSON bytes of a decoded token (re-encoding only the payload when projecting claims)'''
+        claim_errors = None if decoded_token.claim_errors is None else tuple(decoded_token.claim_errors)
+        if decoded_token.segments is None:
+            header = dumps_compact(decoded_token.header)
+            payload = dumps_compact(decoded_token.payload)
+
+        else:
+            header = _decode_segment(decoded_token.segments[0])
+            payload = _decode_segment(decoded_token.segments[1])
+
+        if claims is not None:
+            payload = dumps_compact({x: decoded_token.payload[x] for x in claims if x in decoded_token.payload})
+
+        encryption_header = None if decoded_token.encryption_header is None else dumps_compact(decoded_token.encryption_header)
+        return cls(header, payload, decoded_token.verified, claim_errors, encryption_header)
+
+    @classmethod
+    def from_record(cls, record: Dict, claims: Optional[Iterable[str]] = None) -> 'CompactDecodedToken':
+        '''Compact a record produced by decoding a token in batch mode'''
+        if 'error' in record:
+            raise ValueError(f'Record of a token that could not be decoded ({record["error"]}).')
+
+        payload = record['payload']
+        if claims is not None:
+            payload = {x: payload[x] for x in claims if x in payload}
+
+        claim_errors = tuple(record['claims']['errors']) if 'claims' in record else None
+        encryption_header = dumps_compact(record['encryption_header']) if 'encryption_header' in record else None
+        return cls(dumps_compact(record['header']), dumps_compact(payload), record['verified'], claim_errors, encryption_header)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(header={self.header!r}, payload={self.payload!r}, verified={self.verified!r}, claim_errors={self.claim_errors!r}, encryption_header={self.encryption_header!r})'
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, CompactDecodedToken):
+            return NotImplemented
+        return (self.header, self.payload, self.verified, self.claim_errors, self.encryption_header) == (other.header, other.payload, other.verified, other.claim_errors, other.encryption_header)
+
+    __hash__ = None
+
+    @property
+    def header(self) -> Dict:
+        return json.loads(self._data[:self._split])
+
+    @property
+    def payload(self) -> Dict:
+        return json.loads(self._data[self._split:])
+
+    @property
+    def encryption_header(self) -> Optional[Dict]:
+        return None if self._encryption_header is None else json.loads(self._encryption_header)
+
+    @property
+    def size(self) -> int:
+        '''Number of bytes held for the header, payload and encryption header'''
+        return len(self._data) + len(self._encryption_header or b'')
+
+    def claim(self, name: str, default: Any = None) -> Any:
+        return self.payload.get(name, default)
+
+    def project(self, claims: Iterable[str]) -> 'CompactDecodedToken':
+        '''Copy keeping only the selected payload claims'''
+        payload = self.payload
+        return type(self)(self._data[:self._split], dumps_compact({x: payload[x] for x in claims if x in payload}), self.verified, self.claim_errors, self._encryption_header)
+
+    @property
+    def claims_valid(self) -> Optional[bool]:
+        return None if self.claim_errors is None else not self.claim_errors
+
+    @property
+    def exit_code(self) -> int:
+        if self.verified is False:
+            return EXIT_INVALID_SIGNATURE
+        if self.claim_errors:
+            return EXIT_INVALID_CLAIMS
+        return 0
@@ -1,13 +1,27 @@
 import json
+from typing import Any
 from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Deque
 from typing import Optional
+from typing import TYPE_CHECKING
+from time import monotonic
 from functools import partial
+from threading import Lock
+from itertools import islice
+from collections import deque
 from dataclasses import dataclass
 
-from rich.text import Text
-from rich.emoji import Emoji
-from rich.table import Table
-from rich.console import RenderResult
+
+# Rich tables are only imported when pretty output is rendered
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:
+    from rich.text import Text
+    from rich.table import Table
+    from rich.console import RenderResult
+
+    from jwt_debugger.report import TokenReport
 
 
 HEADER_COLOR = '#fb015b'
@@ -17,31 +31,107 @@ DELIMITER_COLOR = '#000000'
 SIGANTURE_VALID_COLOR = SIGNATURE_COLOR
 SIGNATURE_INVALID_COLOR = '#ff0000'
 SIGNATURE_SKIP_COLOR = '#aaaaaa'
+CLAIMS_VALID_COLOR = SIGNATURE_COLOR
+CLAIMS_INVALID_COLOR = SIGNATURE_INVALID_COLOR
+ENCRYPTION_HEADER_COLOR = '#ff8c00'
+
+# Colors of the header, encrypted key, initialization vector, ciphertext and authentication tag of encrypted tokens
+ENCRYPTED_SEGMENT_COLORS = (ENCRYPTION_HEADER_COLOR, SIGNATURE_SKIP_COLOR, SIGNATURE_SKIP_COLOR, PAYLOAD_COLOR, SIGNATURE_COLOR)
+
+
+# Pretty output shortens values past these sizes since laying out very large text in a terminal takes seconds
+MAX_ENCODED_TOKEN_LENGTH = 2048
+MAX_COLLECTION_ITEMS = 25
+MAX_STRING_LENGTH = 512
 
 
 pretty_json_dumps_ = partial(json.dumps, indent=4)
 
 
+def shorten_json(value: Any, max_items: int = MAX_COLLECTION_ITEMS, max_string_length: int = MAX_STRING_LENGTH) -> Tuple[Any, bool]:
+    '''Collapse the tail of long arrays, objects and strings into a summary returning whether anything was collapsed
+
+    Only the items that are kept are visited so the cost does not depend on how large the value is.
+    Markers are plain ASCII since the JSON is dumped with non-ASCII characters escaped.
+    '''
+    if isinstance(value, dict):
+        shortened = {}
+        collapsed = len(value) > max_items
+        for key, item in islice(value.items(), max_items):
+            shortened[key], item_collapsed = shorten_json(item, max_items, max_string_length)
+            collapsed = collapsed or item_collapsed
+        if len(value) > max_items:
+            shortened['...'] = f'{len(value) - max_items} more keys'
+        return shortened, collapsed
+
+    if isinstance(value, list):
+        shortened = []
+        collapsed = len(value) > max_items
+        for item in islice(value, max_items):
+            item, item_collapsed = shorten_json(item, max_items, max_string_length)
+            shortened.append(item)
+            collapsed = collapsed or item_collapsed
+        if len(value) > max_items:
+            shortened.append(f'... {len(value) - max_items} more items')
+        return shortened, collapsed
+
+    if isinstance(value, str) and len(value) > max_string_length:
+        return f'{value[:max_string_length]}... {len(value) - max_string_length} more characters', True
+
+    return value, False
+
+
+@dataclass
+class JSONText:
+    '''Titled JSON that is only serialized and laid out when it is rendered'''
+    title: str
+    value: Any
+    style: str
+
+    def __rich_console__(self, *args, **kwargs) -> 'RenderResult':
+        from rich.text import Text # pylint: disable=redefined-outer-name
+
+        text = Text(overflow='fold', style=self.style)
+        text.append(f'{self.title}\n')
+        text.append(pretty_json_dumps_(self.value))
+        yield text
+
+
 @dataclass
 class PrettyDecodedToken:
     token: str
     header: Dict
     payload: Dict
     verified: Optional[bool] # Signature Verification will be None for tokens decoded without public keys
+    segments: Optional[Tuple[str, str, str]] = None # Reuses the split from decoding when available
+    claim_errors: Optional[List[str]] = None # Claim Validation will be None for tokens decoded without claim rules
+    full: bool = False # Shows large values and long tokens in full instead of shortening them
+    encryption_header: Optional[Dict] = None # Shown for signed tokens that were decrypted from an encrypted token
 
-    def __rich_console__(self, *args, **kwargs) -> RenderResult:
+    def __rich_console__(self, *args, **kwargs) -> 'RenderResult':
         yield self._render_encoded_token_table()
         yield self._render_decoded_token_table()
 
-    def _render_encoded_token_table(self):
-        header, payload, signature = self.token.split('.')
+    def _render_encoded_token_table(self) -> 'Table':
+        from rich.text import Text # pylint: disable=redefined-outer-name
+        from rich.table import Table # pylint: disable=redefined-outer-name
+
+        segments = self.segments or self.token.split('.')
+        colors = ENCRYPTED_SEGMENT_COLORS if len(segments) == 5 else (HEADER_COLOR, PAYLOAD_COLOR, SIGNATURE_COLOR)
+        parts = [(segments[0], colors[0])]
+        for segment, color in zip(segments[1:], colors[1:]):
+            parts.extend([('.', DELIMITER_COLOR), (segment, color)])
 
         text = Text(overflow='fold')
-        text.append(header, style=HEADER_COLOR)
-        text.append('.', style=DELIMITER_COLOR)
-        text.append(payload, style=PAYLOAD_COLOR)
-        text.append('.', style=DELIMITER_COLOR)
-        text.append(signature, style=SIGNATURE_COLOR)
+        remaining = None if self.full else MAX_ENCODED_TOKEN_LENGTH
+        for part, style in parts:
+            if remaining is not None:
+                part, remaining = part[:remaining], max(0, remaining - len(part))
+            text.append(part, style=style)
+
+        hidden = sum(len(x) for x, _ in parts) - len(text)
+        if hidden:
+            text.append(f'... {hidden} more characters', style=SIGNATURE_SKIP_COLOR)
 
         table = Table(expand=True)
         table.add_column('Encoded Token')
@@ -49,19 +139,26 @@ class PrettyDecodedToken:
 
         return table
 
-    def _render_decoded_token_table(self):
+    def _render_decoded_token_table(self) -> 'Table':
+        from rich.text import Text # pylint: disable=redefined-outer-name
+        from rich.emoji import Emoji
+        from rich.table import Table # pylint: disable=redefined-outer-name
+
         table = Table(expand=True, leading=1)
         table.add_column('Decoded Token')
 
-        header_text = Text(overflow='fold')
-        header_text.append('Header\n', style=HEADER_COLOR)
-        header_text.append(pretty_json_dumps_(self.header), style=HEADER_COLOR)
-        table.add_row(header_text)
+        header, payload, collapsed = self.header, self.payload, False
+        if not self.full:
+            header, header_collapsed = shorten_json(header)
+            payload, payload_collapsed = shorten_json(payload)
+            collapsed = header_collapsed or payload_collapsed
+
+        # Claims that were only encrypted are shown with the encryption header as their header
+        if self.encryption_header is not None and self.encryption_header != self.header:
+            table.add_row(JSONText('Encryption Header', self.encryption_header, ENCRYPTION_HEADER_COLOR))
 
-        payload_text = Text(overflow='fold')
-        payload_text.append('Payload\n', style=PAYLOAD_COLOR)
-        payload_text.append(pretty_json_dumps_(self.payload), style=PAYLOAD_COLOR)
-        table.add_row(payload_text)
+        table.add_row(JSONText('Header', header, HEADER_COLOR))
+        table.add_row(JSONText('Payload', payload, PAYLOAD_COLOR))
 
         if self.verified is True:
             signature_text = Text(
@@ -83,18 +180,200 @@ class PrettyDecodedToken:
 
         table.add_row(signature_text)
 
+        if self.claim_errors is not None:
+            table.add_row(self._render_claims_text())
+
+        if collapsed:
+            table.add_row(Text('Large values were shortened, use --full to show everything.', style=SIGNATURE_SKIP_COLOR))
+
         return table
 
+    def _render_claims_text(self) -> 'Text':
+        from rich.text import Text # pylint: disable=redefined-outer-name
+        from rich.emoji import Emoji
+
+        if not self.claim_errors:
+            return Text(Emoji.replace('Claims Valid :blue_heart:'), style=CLAIMS_VALID_COLOR)
+
+        claims_text = Text(overflow='fold', style=CLAIMS_INVALID_COLOR)
+        claims_text.append(Emoji.replace('Invalid Claims :skull:'))
+        for error in self.claim_errors:
+            claims_text.append(f'\n{error}')
+        return claims_text
+
 
 @dataclass
 class JSONDecodedToken:
     header: Dict
     payload: Dict
+    claim_errors: Optional[List[str]] = None
+    encryption_header: Optional[Dict] = None
+
+    def as_dict(self) -> Dict:
+        decoded_token = {
+            'header': self.header,
+            'payload': self.payload,
+        }
+        if self.encryption_header is not None:
+            decoded_token['encryption_header'] = self.encryption_header
+        if self.claim_errors is not None:
+            decoded_token['claims'] = {'valid': not self.claim_errors, 'errors': self.claim_errors}
+
+        return decoded_token
+
+    def __str__(self) -> str:
+        return pretty_json_dumps_(self.as_dict())
+
+    def __rich_console__(self, *args, **kwargs) -> 'RenderResult':
+        yield str(self)
+
+
+@dataclass
+class PrettyTokenReport:
+    summary: Dict # Produced by TokenReport.summary
+
+    def __rich_console__(self, *args, **kwargs) -> 'RenderResult':
+        yield self._render_summary_table()
+        for field_name, title in (('iss', 'Issuer'), ('kid', 'Key ID'), ('alg', 'Algorithm'), ('sub', 'Subject')):
+            if self.summary[field_name]:
+                yield self._render_top_table(field_name, title)
+
+    @staticmethod
+    def _format_rate(rate: Optional[float]) -> str:
+        return '-' if rate is None else f'{rate:.2%}'
+
+    def _render_summary_table(self) -> 'Table':
+        from rich.table import Table # pylint: disable=redefined-outer-name
+
+        summary = self.summary
+        table = Table(title='Token Report', expand=True)
+        table.add_column('Tokens')
+        table.add_column('Count', justify='right')
+        table.add_column('Rate', justify='right')
+
+        table.add_row('Total', str(summary['tokens']), '')
+        table.add_row('Unique', str(summary['unique_tokens']), '')
+        table.add_row('Duplicates', str(summary['duplicate_tokens']), '')
+        table.add_row('Malformed', str(summary['malformed_tokens']), '')
+        table.add_row('Invalid Signatures', str(summary['invalid_signatures']), self._format_rate(summary['signature_failure_rate']), style=SIGNATURE_INVALID_COLOR if summary['invalid_signatures'] else None)
+        table.add_row('Expired', str(summary['expired_tokens']), self._format_rate(summary['expired_rate']))
+        table.add_row('Invalid Claims', str(summary['invalid_claims']), '', style=CLAIMS_INVALID_COLOR if summary['invalid_claims'] else None)
+        table.add_row('Distinct Subjects (approximate)', str(summary['distinct_subjects']), '')
+
+        return table
+
+    def _render_top_table(self, field_name: str, title: str) -> 'Table':
+        from rich.text import Text # pylint: disable=redefined-outer-name
+        from rich.table import Table # pylint: disable=redefined-outer-name
+
+        table = Table(expand=True)
+        table.add_column(f'{title} ({field_name})', overflow='fold')
+        table.add_column('Unique Tokens', justify='right')
+        for value, count in self.summary[field_name]:
+            # Claims come from untrusted tokens so they must not be parsed as console markup
+            table.add_row(Text(value), str(count))
+
+        return table
+
+
+class LiveTokenReport:
+    '''Token report redrawn by rich Live while tokens are still being added
+
+    Rates are measured over the frames drawn in the last few seconds. The lock has to
+    be held while adding to the report so that a frame never sees a partial update.
+    '''
+    def __init__(self, token_report: 'TokenReport', source: str, window: float = 10.0):
+        self.token_report = token_report
+        self.source = source
+        self.window = window
+        self.lock = Lock()
+        self.started = monotonic()
+        self._frames: Deque[Tuple[float, int, int]] = deque()
+
+    def __rich_console__(self, *args, **kwargs) -> 'RenderResult':
+        from rich.table import Table # pylint: disable=redefined-outer-name
+
+        with self.lock:
+            summary = self.token_report.summary()
+
+        now = monotonic()
+        failures = summary['malformed_tokens'] + summary['invalid_signatures'] + summary['invalid_claims']
+        self._frames.append((now, summary['tokens'], failures))
+        while len(self._frames) > 2 and now - self._frames[0][0] > self.window:
+            self._frames.popleft()
+
+        first_frame, _, first_failures = self._frames[0]
+        elapsed = now - first_frame
+        tokens_per_second = (summary['tokens'] - self._frames[0][1]) / elapsed if elapsed else 0.0
+        failures_per_second = (failures - first_failures) / elapsed if elapsed else 0.0
+
+        table = Table(title=f'Following {self.source}', expand=True, show_header=False)
+        table.add_column('Name')
+        table.add_column('Value', justify='right')
+        table.add_row('Running', f'{now - self.started:.0f}s')
+        table.add_row('Tokens/s', f'{tokens_per_second:,.1f}')
+        table.add_row('Failures/s', f'{failures_per_second:,.1f}', style=SIGNATURE_INVALID_COLOR if failures_per_second else None)
+
+        yield table
+        yield PrettyTokenReport(summary)
+
+
+@dataclass
+class PrettyTimings:
+    summary: Dict # Produced by StageTimer.summary
+
+    def __rich_console__(self, *args, **kwargs) -> 'RenderResult':
+        from rich.table import Table # pylint: disable=redefined-outer-name
+
+        summary = self.summary
+        caption = f'{summary["tokens"]} tokens in {summary["elapsed"]:.3f}s'
+        if summary['tokens_per_second'] is not None:
+            caption += f' ({summary["tokens_per_second"]:,.0f} tokens/s)'
+
+        table = Table(title='Timings', caption=caption, expand=True)
+        table.add_column('Stage', no_wrap=True)
+        for column in ('Count', 'Total', 'Mean', 'p50', 'p95', 'p99', 'Max'):
+            table.add_column(column, justify='right')
+
+        for stage, timings in summary['stages'].items():
+            table.add_row(stage, str(timings['count']), *(self._format_seconds(timings[x]) for x in ('total', 'mean', 'p50', 'p95', 'p99', 'max')))
+
+        yield table
+
+    @staticmethod
+    def _format_seconds(seconds: float) -> str:
+        if seconds >= 1:
+            return f'{seconds:.2f}s'
+        if seconds >= 1e-3:
+            return f'{seconds * 1e3:.2f}ms'
+        return f'{seconds * 1e6:.1f}us'
+
+
+@dataclass
+class PrettyKeySearch:
+    result: Dict # Produced by find_signing_keys
+
+    def __rich_console__(self, *args, **kwargs) -> 'RenderResult':
+        from rich.text import Text # pylint: disable=redefined-outer-name
+        from rich.table import Table # pylint: disable=redefined-outer-name
+
+        result = self.result
+        caption = f'Tried {result["tried_keys"]} of {result["indexed_keys"]} keys indexed from {result["indexed_files"]} files'
+        if not result['matches']:
+            table = Table(title='No Key Verified the Signature', title_style=SIGNATURE_INVALID_COLOR, caption=caption, expand=True, show_header=False)
+            table.add_column('Header')
+            table.add_row(JSONText('Header', result['header'], HEADER_COLOR))
+            yield table
+            return
+
+        table = Table(title='Signature Verified', title_style=SIGANTURE_VALID_COLOR, caption=caption, expand=True)
+        table.add_column('Path', overflow='fold')
+        table.add_column('Key ID (kid)', overflow='fold')
+        table.add_column('Key Type (kty)')
+        table.add_column('Thumbprint', overflow='fold')
+        for match in result['matches']:
+            key_type = match['kty'] if match['alg'] is None else f'{match["kty"]} ({match["alg"]})'
+            # File names and key parameters come from the searched directory so they must not be parsed as console markup
+            table.add_row(*(Text(str(x)) for x in (match['path'], match['kid'] or '-', key_type, match['thumbprint'] or '-')))
 
-    def __rich_console__(self, *args, **kwargs) -> RenderResult:
-        yield pretty_json_dumps_(
-            {
-                'header': self.header,
-                'payload': self.payload,
-            }
-        )
+        yield table
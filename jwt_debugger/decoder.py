@@ -1,16 +1,69 @@
 import re
 import json
 from io import TextIOWrapper
+from pathlib import Path
+from base64 import urlsafe_b64decode
+from typing import TYPE_CHECKING
 from typing import Dict
+from typing import List
+from typing import Tuple
 from typing import Union
+from typing import Iterable
 from typing import Optional
+from dataclasses import field
 from dataclasses import dataclass
 
-import requests
-from jwcrypto.jwk import JWK
-from jwcrypto.jwk import JWKSet
-from jwcrypto.jws import InvalidJWSSignature
-from jwcrypto.jwt import JWT
+from jwt_debugger.timings import timed
+
+
+# requests and jwcrypto (along with the cryptography backends) are imported where
+# they are needed so that decoding without verification stays cheap to start
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:
+    from jwcrypto.jwk import JWK
+    from jwcrypto.jwk import JWKSet
+    from requests import Session
+
+    from jwt_debugger.cache import HTTPCache
+    from jwt_debugger.claims import ClaimValidator
+    from jwt_debugger.compact import CompactDecodedToken
+    from jwt_debugger.decrypter import Decrypter
+    from jwt_debugger.keystore import KeyStore
+    from jwt_debugger.registry import IssuerRegistry
+    from jwt_debugger.results import VerificationCache
+
+
+# Exit codes distinguishing tokens that failed signature verification from tokens with invalid claims
+EXIT_INVALID_SIGNATURE = 1
+EXIT_INVALID_CLAIMS = 3
+
+# Seconds to wait for an identity provider to connect or send data before giving up
+HTTP_TIMEOUT = 10.0
+
+
+# Signing algorithm of keys that do not declare one by their key type and curve
+SIGNING_ALGORITHMS = {
+    ('RSA', None): 'RS256',
+    ('EC', 'P-256'): 'ES256',
+    ('EC', 'P-384'): 'ES384',
+    ('EC', 'P-521'): 'ES512',
+    ('EC', 'secp256k1'): 'ES256K',
+    ('OKP', 'Ed25519'): 'EdDSA',
+    ('OKP', 'Ed448'): 'EdDSA',
+    ('oct', None): 'HS256',
+}
+
+
+class MalformedToken(ValueError):
+    pass
+
+
+class DecryptionFailed(ValueError):
+    pass
+
+
+def signing_algorithm(jwk: Union[Dict, 'JWK']) -> Optional[str]:
+    return jwk.get('alg') or SIGNING_ALGORITHMS.get((jwk.get('kty'), jwk.get('crv')))
 
 
 @dataclass
@@ -19,29 +72,147 @@ class DecodedToken:
     header: Dict
     payload: Dict
     verified: Optional[bool] # Signature Verification will be None for tokens decoded without public keys
+    segments: Optional[Tuple[str, str, str]] = field(default=None, repr=False, compare=False)
+    claim_errors: Optional[List[str]] = None # Claim Validation will be None for tokens decoded without claim rules
+    encryption_header: Optional[Dict] = None # Protected header of the encrypted token (JWE) the token was decrypted from
+
+    @property
+    def claims_valid(self) -> Optional[bool]:
+        return None if self.claim_errors is None else not self.claim_errors
 
+    @property
+    def exit_code(self) -> int:
+        if self.verified is False:
+            return EXIT_INVALID_SIGNATURE
+        if self.claim_errors:
+            return EXIT_INVALID_CLAIMS
+        return 0
+
+    def compact(self, claims: Optional[Iterable[str]] = None) -> 'CompactDecodedToken':
+        '''Memory-lean copy for keeping many results, optionally with only the selected payload claims'''
+        from jwt_debugger.compact import CompactDecodedToken # pylint: disable=redefined-outer-name
+
+        return CompactDecodedToken.from_decoded_token(self, claims)
+
+
+@dataclass(frozen=True)
+class ParsedToken:
+    token: str
+    segments: Tuple[str, str, str]
+    header: Dict
+    payload: Dict
+
+
+def base64url_decode_json(segment: str) -> Dict:
+    '''Decode a base64url encoded JSON segment which may be missing its padding'''
+    return json.loads(urlsafe_b64decode(segment + '=' * (-len(segment) % 4)))
+
+
+def is_encrypted_token(token: str) -> bool:
+    '''Compact encrypted tokens (JWE) have five segments where signed tokens have three'''
+    return token.count('.') == 4
+
+
+@timed('parse')
+def parse_token(token: str) -> ParsedToken:
+    '''Split and decode a compact token once without constructing any jwcrypto objects'''
+    segments = tuple(token.split('.'))
+    if len(segments) == 5:
+        raise MalformedToken('Token is encrypted (JWE) and can only be decoded with a private key.')
+
+    if len(segments) != 3:
+        raise MalformedToken('Token must consist of a header, payload, and signature all separated by periods.')
 
-def decode_token(token: str, public_key: Optional[Union[JWK, JWKSet]] = None) -> DecodedToken:
     try:
-        jwt = JWT(jwt=token, key=public_key)
+        header = base64url_decode_json(segments[0])
+        payload = base64url_decode_json(segments[1])
+
+    except ValueError as e:
+        raise MalformedToken(f'Token header and payload must be base64url encoded JSON ({e}).') from e
+
+    if not isinstance(header, dict) or not isinstance(payload, dict):
+        raise MalformedToken('Token header and payload must be JSON objects.')
+
+    return ParsedToken(token, segments, header, payload)
+
+
+@timed('signature')
+def verify_signature(token: str, key: Union['JWK', 'JWKSet']) -> bool:
+    from jwcrypto.jwt import JWT
+    from jwcrypto.common import JWException
+
+    try:
+        # Only the signature is checked here, claims such as exp and nbf are left to the claim validator
+        JWT(jwt=token, key=key, check_claims=False)
+
+    except JWException:
+        return False
+
+    return True
+
 
-    except InvalidJWSSignature:
-        jwt = JWT(jwt=token)
-        verified = False
+@timed('decode')
+def decode_token(token: Union[str, ParsedToken], public_key: Optional[Union['JWK', 'JWKSet', 'KeyStore', 'IssuerRegistry']] = None, verification_cache: Optional['VerificationCache'] = None, claim_validator: Optional['ClaimValidator'] = None, decrypter: Optional['Decrypter'] = None) -> DecodedToken:
+    encryption_header = None
+    if decrypter is not None and isinstance(token, str) and is_encrypted_token(token):
+        decrypted_token = decrypter.decrypt(token)
+        encryption_header = decrypted_token.header
+        if not decrypted_token.nested:
+            try:
+                payload = json.loads(decrypted_token.plaintext)
+
+            except ValueError as e:
+                raise MalformedToken(f'Decrypted token must be a signed token or JSON claims ({e}).') from e
+
+            if not isinstance(payload, dict):
+                raise MalformedToken('Decrypted claims must be a JSON object.')
+
+            # Claims that were only encrypted have no signature to verify
+            claim_errors = None if claim_validator is None else claim_validator.validate(payload)
+            return DecodedToken(token, encryption_header, payload, None, None, claim_errors, encryption_header)
+
+        # Nested tokens are signed and then encrypted so the signed token is verified as usual
+        token = decrypted_token.plaintext.decode()
+
+    parsed_token = parse_token(token) if isinstance(token, str) else token
+    claim_errors = None if claim_validator is None else claim_validator.validate(parsed_token.payload)
+    if public_key is None:
+        return DecodedToken(parsed_token.token, parsed_token.header, parsed_token.payload, None, parsed_token.segments, claim_errors, encryption_header)
+
+    # Key resolvers (e.g. KeyStore and IssuerRegistry) narrow down keys using the unverified token
+    if hasattr(public_key, 'resolve_key'):
+        candidate_key = public_key.resolve_key(parsed_token.header, parsed_token.payload)
 
     else:
-        verified = None if public_key is None else True
+        candidate_key = public_key
+
+    verified = None
+    if verification_cache is not None and candidate_key is not None:
+        verified = verification_cache.get(parsed_token.token, candidate_key)
+
+    if verified is None:
+        # Key resolvers return no candidate when nothing could have signed the token
+        verified = candidate_key is not None and verify_signature(parsed_token.token, candidate_key)
+
+        if verification_cache is not None and candidate_key is not None:
+            verification_cache.put(parsed_token.token, candidate_key, verified, parsed_token.payload)
 
     return DecodedToken(
-        token,
-        json.loads(jwt.token.objects.get('protected')),
-        json.loads(jwt.token.objects.get('payload', b'').decode()),
-        verified
+        parsed_token.token,
+        parsed_token.header,
+        parsed_token.payload,
+        verified,
+        parsed_token.segments,
+        claim_errors,
+        encryption_header
     )
 
 
 PEM_HEADER_PATTERN = re.compile('.*-----BEGIN .+-----.+-----END .+-----.*', flags=re.DOTALL)
-def load_jwk_from_file(key: TextIOWrapper) -> JWK:
+@timed('key_parse')
+def load_jwk_from_file(key: TextIOWrapper) -> 'JWK':
+    from jwcrypto.jwk import JWK
+
     content = key.read()
     if PEM_HEADER_PATTERN.fullmatch(content):
         key = JWK.from_pem(content.encode())
@@ -52,38 +223,97 @@ def load_jwk_from_file(key: TextIOWrapper) -> JWK:
     return key
 
 
-def load_jwkset_from_oidc_url(url: str) -> JWKSet:
+@timed('key_parse')
+def load_jwk_from_secret(secret: str) -> 'JWK':
+    '''Symmetric key for verifying HMAC (HS256, HS384 and HS512) signatures with a shared secret'''
+    from jwcrypto.jwk import JWK
+    from jwcrypto.common import base64url_encode
+
+    return JWK(kty='oct', k=base64url_encode(secret.encode()))
+
+
+def load_jwks_from_path(path: Union[str, Path]) -> Dict:
+    '''Load JSON Web Key Set document from a JWKS, JWK or PEM file without parsing its keys'''
+    content = Path(path).read_text()
+    if PEM_HEADER_PATTERN.fullmatch(content):
+        from jwcrypto.jwk import JWK
+
+        return {'keys': [JWK.from_pem(content.encode()).export(as_dict=True)]}
+
+    document = json.loads(content)
+    return document if 'keys' in document else {'keys': [document]}
+
+
+@timed('jwks_fetch')
+def load_jwks_from_oidc_url(url: str, cache: Optional['HTTPCache'] = None, session: Optional['Session'] = None, timeout: float = HTTP_TIMEOUT) -> Dict:
+    '''Load JSON Web Key Set document from OpenID Connect JWKS endpoint without parsing its keys'''
+    if cache is not None:
+        return cache.get_json(url)
+
+    import requests
+
+    response = (requests if session is None else session).get(url, timeout=timeout)
+    response.raise_for_status()
+
+    return response.json()
+
+
+def load_jwkset_from_oidc_url(url: str, cache: Optional['HTTPCache'] = None, timeout: float = HTTP_TIMEOUT) -> 'JWKSet':
     '''Load JSON Web Key Set from OpenID Connect JWKS endpoint'''
-    response = requests.get(url)
+    from jwcrypto.jwk import JWKSet
+
+    if cache is not None:
+        return JWKSet.from_json(cache.get_text(url))
+
+    import requests
+
+    response = requests.get(url, timeout=timeout)
     response.raise_for_status()
 
     key_set = JWKSet.from_json(response.text)
     return key_set
 
 
-def resolve_jwks_uri_from_oidc_provider(provider_url: str) -> str:
-    '''Resolve JWKS Endpoint from OpenID Connect Provider url'''
+def resolve_oidc_configuration_url(provider_url: str) -> Optional[str]:
+    '''Resolve OpenID Connect Provider Configuration url returning None when the url already references a JWKS endpoint'''
     # Default IdentityServer4 jwks url
     #  reference: https://github.com/IdentityServer/IdentityServer4
     #  example:   https://demo.identityserver.io/.well-known/openid-configuration
     if provider_url.endswith('/.well-known/openid-configuration/jwks'):
-        return provider_url
+        return None
 
     # OpenID Provider Configuration
     #  reference: https://openid.net/specs/openid-connect-discovery-1_0.html#ProviderConfig
     if not provider_url.endswith('/.well-known/openid-configuration'):
         provider_url = provider_url[:-1] if provider_url.endswith('/') else provider_url
-        configuration_url = f'{provider_url}/.well-known/openid-configuration'
+        return f'{provider_url}/.well-known/openid-configuration'
 
-    else:
-        configuration_url = provider_url
+    return provider_url
 
-    configuration_response = requests.get(configuration_url)
-    configuration_response.raise_for_status()
 
-    configuration = configuration_response.json()
+def read_jwks_uri_from_oidc_configuration(configuration: Dict, configuration_url: str) -> str:
     jwks_uri = configuration.get('jwks_uri')
     if jwks_uri is None:
         raise KeyError(f'OpenID Connect Configuration({configuration_url}) does not contain jwks_uri endpoint.')
 
     return jwks_uri
+
+
+@timed('discovery')
+def resolve_jwks_uri_from_oidc_provider(provider_url: str, cache: Optional['HTTPCache'] = None, session: Optional['Session'] = None, timeout: float = HTTP_TIMEOUT) -> str:
+    '''Resolve JWKS Endpoint from OpenID Connect Provider url'''
+    configuration_url = resolve_oidc_configuration_url(provider_url)
+    if configuration_url is None:
+        return provider_url
+
+    if cache is not None:
+        configuration = cache.get_json(configuration_url)
+
+    else:
+        import requests
+
+        configuration_response = (requests if session is None else session).get(configuration_url, timeout=timeout)
+        configuration_response.raise_for_status()
+        configuration = configuration_response.json()
+
+    return read_jwks_uri_from_oidc_configuration(configuration, configuration_url)
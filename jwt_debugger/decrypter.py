@@ -0,0 +1,162 @@
+import json
+import zlib
+from typing import Dict
+from typing import Tuple
+from typing import Union
+from typing import TextIO
+from hashlib import blake2b
+from threading import Lock
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from jwcrypto.jwa import JWA
+from jwcrypto.jwe import JWE
+from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWKSet
+from jwcrypto.common import JWException
+from jwcrypto.common import base64url_decode
+from cryptography.exceptions import InvalidTag
+
+from jwt_debugger.decoder import MalformedToken
+from jwt_debugger.decoder import DecryptionFailed
+from jwt_debugger.decoder import PEM_HEADER_PATTERN
+from jwt_debugger.decoder import base64url_decode_json
+from jwt_debugger.timings import timed
+
+
+# Limit on the size of decompressed (zip DEF) claims, matching the limit jwcrypto 1.6 applies to plaintexts
+MAX_PLAINTEXT_SIZE = 100 * 1024 * 1024
+
+
+@timed('key_parse')
+def load_private_key(key: TextIO) -> Union[JWK, JWKSet]:
+    '''Load a private JSON Web Key or JSON Web Key Set in JSON or PEM format for decrypting tokens'''
+    content = key.read()
+    if PEM_HEADER_PATTERN.fullmatch(content):
+        private_key = JWK.from_pem(content.encode())
+
+    else:
+        document = json.loads(content)
+        private_key = JWKSet.from_json(content) if 'keys' in document else JWK(**document)
+
+    keys = private_key['keys'] if isinstance(private_key, JWKSet) else [private_key]
+    if not any(x.has_private or x.get('kty') == 'oct' for x in keys):
+        raise ValueError('JSON Web Key has no private or symmetric key material')
+
+    return private_key
+
+
+@dataclass(frozen=True)
+class DecryptedToken:
+    header: Dict # protected header of the encrypted token
+    plaintext: bytes
+
+    @property
+    def nested(self) -> bool:
+        '''Whether the plaintext is a signed token rather than claims
+
+        Issuers are meant to set cty to JWT for nested tokens but many leave it out.
+        '''
+        cty = self.header.get('cty')
+        if isinstance(cty, str) and cty.upper() == 'JWT':
+            return True
+        return not self.plaintext.lstrip().startswith(b'{') and self.plaintext.count(b'.') == 2
+
+
+class Decrypter:
+    '''Decrypt compact JWE tokens with private keys that are loaded once
+
+    Unwrapping the content encryption key (RSA-OAEP decryption or ECDH-ES key
+    agreement) is most of the cost of decrypting a token. Unwrapped keys are remembered
+    by a digest of the protected header, which carries kid and epk, and the encrypted
+    key so that tokens sharing a content encryption key (e.g. ECDH-ES with a reused
+    ephemeral key or issuers that reuse a wrapped key) only decrypt their content. The
+    content is always authenticated, so a remembered key never decrypts a token that
+    was tampered with.
+    '''
+    def __init__(self, private_key: Union[JWK, JWKSet], max_entries: int = 4096):
+        self.private_key = private_key
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._keys: 'OrderedDict[bytes, bytes]' = OrderedDict()
+
+    def __getstate__(self) -> Dict:
+        # Loaded private key objects can not be pickled so worker processes load them again
+        return {'private_key': self.private_key.export(as_dict=True), 'max_entries': self.max_entries}
+
+    def __setstate__(self, state: Dict) -> None:
+        document = state['private_key']
+        if 'keys' in document:
+            private_key = JWKSet()
+            private_key.import_keyset(json.dumps(document))
+
+        else:
+            private_key = JWK(**document)
+
+        self.__init__(private_key, state['max_entries']) # pylint: disable=unnecessary-dunder-call
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @timed('key_unwrap')
+    def _unwrap_and_decrypt(self, token: str) -> Tuple[bytes, bytes]:
+        jwe = JWE()
+        jwe.deserialize(token, self.private_key)
+        return jwe.payload, jwe.cek
+
+    @staticmethod
+    def _decrypt_content(header: Dict, segments: Tuple[str, ...], cek: bytes) -> bytes:
+        iv, ciphertext, tag = (base64url_decode(x) for x in segments[2:])
+        plaintext = JWA.encryption_alg(header['enc']).decrypt(cek, segments[0].encode(), iv, ciphertext, tag)
+        if header.get('zip') == 'DEF':
+            inflater = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+            plaintext = inflater.decompress(plaintext, MAX_PLAINTEXT_SIZE)
+            if inflater.unconsumed_tail or not inflater.eof:
+                raise DecryptionFailed(f'Decompressed token exceeds the maximum size ({MAX_PLAINTEXT_SIZE}).')
+
+        return plaintext
+
+    @timed('decrypt')
+    def decrypt(self, token: str) -> DecryptedToken:
+        segments = tuple(token.split('.'))
+        if len(segments) != 5:
+            raise MalformedToken('Encrypted token must consist of a header, encrypted key, initialization vector, ciphertext, and authentication tag all separated by periods.')
+
+        try:
+            header = base64url_decode_json(segments[0])
+
+        except ValueError as e:
+            raise MalformedToken(f'Token header must be base64url encoded JSON ({e}).') from e
+
+        if not isinstance(header, dict):
+            raise MalformedToken('Token header must be a JSON object.')
+
+        digest = blake2b(f'{segments[0]}.{segments[1]}'.encode(), digest_size=16).digest()
+        with self._lock:
+            cek = self._keys.get(digest)
+            if cek is None:
+                self.misses += 1
+            else:
+                self._keys.move_to_end(digest)
+                self.hits += 1
+
+        try:
+            if cek is not None:
+                return DecryptedToken(header, self._decrypt_content(header, segments, cek))
+
+            plaintext, cek = self._unwrap_and_decrypt(token)
+
+        except DecryptionFailed:
+            raise
+
+        except (JWException, ValueError, InvalidTag) as e:
+            raise DecryptionFailed(f'Token could not be decrypted with the private key ({str(e) or type(e).__name__}).') from e
+
+        with self._lock:
+            self._keys[digest] = cek
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+
+        return DecryptedToken(header, plaintext)
@@ -0,0 +1,256 @@
+import io
+import csv
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import BinaryIO
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+from types import ModuleType
+from itertools import chain
+from itertools import islice
+from dataclasses import dataclass
+
+from jwt_debugger.batch import update_exit_code
+from jwt_debugger.serialize import dumps_compact
+
+
+# pyarrow is an optional dependency (pip install jwt-debugger[columnar]) that is only
+# imported when writing Parquet or Arrow
+# pylint: disable=import-outside-toplevel
+
+
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+SAMPLE_SIZE = 1000
+RECORD_BATCH_SIZE = 65536
+
+# Columns describing the result of decoding, every other column is a header, encryption header or payload field (e.g. payload.sub)
+RECORD_COLUMNS = ('verified', 'claims_valid', 'claim_errors', 'error')
+FIELD_PREFIXES = ('header', 'encryption_header', 'payload')
+
+# Integers outside of this range do not fit an int64 column and are exported as strings
+MIN_INT64 = -2 ** 63
+MAX_INT64 = 2 ** 63 - 1
+
+
+def load_pyarrow() -> ModuleType:
+    try:
+        import pyarrow
+
+    except ImportError as e:
+        raise ImportError('Parquet and Arrow export require pyarrow (pip install jwt-debugger[columnar]).') from e
+
+    return pyarrow
+
+
+def parse_column(column: str) -> str:
+    '''Check that a column names a record column or a header, encryption header or payload field'''
+    prefix, _, name = column.partition('.')
+    if column not in RECORD_COLUMNS and (prefix not in FIELD_PREFIXES or not name):
+        raise ValueError(f'Column({column}) must be one of ({", ".join(RECORD_COLUMNS)}) or a field such as header.alg or payload.sub.')
+    return column
+
+
+def column_value(record: Dict, column: str) -> Any:
+    if column == 'verified':
+        return record.get('verified')
+    if column == 'error':
+        return record.get('error')
+    if column in ('claims_valid', 'claim_errors'):
+        return record.get('claims', {}).get('valid' if column == 'claims_valid' else 'errors')
+
+    # Claim names may contain periods (e.g. namespaced claims) so only the prefix is split off
+    prefix, _, name = column.partition('.')
+    fields = record.get(prefix)
+    return fields.get(name) if isinstance(fields, dict) else None
+
+
+def _value_type(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int' if MIN_INT64 <= value <= MAX_INT64 else 'string'
+    if isinstance(value, float):
+        return 'float'
+    return 'string' # strings along with objects and arrays which are exported as JSON
+
+
+def _merge_types(first: Optional[str], second: Optional[str]) -> Optional[str]:
+    if first is None or first == second:
+        return second
+    if second is None:
+        return first
+    if {first, second} == {'int', 'float'}:
+        return 'float'
+    return 'string'
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    type: str # bool, int, float or string
+
+
+def infer_columns(sample: Sequence[Dict], columns: Optional[Iterable[str]] = None) -> List[Column]:
+    '''Infer column types from a sample of records
+
+    Without a selection, every header, encryption header and payload field found in
+    the sample becomes a column (in the order they were first seen) after verified and
+    error, along with claims_valid and claim_errors when claims were validated. Columns
+    that are only null in the sample are strings.
+    '''
+    if columns is None:
+        names = {'verified': None}
+        if any('claims' in x for x in sample):
+            names.update({'claims_valid': None, 'claim_errors': None})
+        names['error'] = None
+
+        for prefix in FIELD_PREFIXES:
+            for record in sample:
+                fields = record.get(prefix)
+                if isinstance(fields, dict):
+                    names.update({f'{prefix}.{x}': None for x in fields if f'{prefix}.{x}' not in names})
+
+    else:
+        names = {parse_column(x): None for x in columns}
+
+    types = dict.fromkeys(names)
+    for record in sample:
+        for name in names:
+            types[name] = _merge_types(types[name], _value_type(column_value(record, name)))
+
+    return [Column(name, column_type or 'string') for name, column_type in types.items()]
+
+
+def _to_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return dumps_compact(value).decode()
+
+
+class CSVRecordBatchWriter:
+    '''Write record batches as CSV with JSON encoded objects and arrays'''
+    def __init__(self, stream: BinaryIO, columns: List[Column]):
+        self.mismatched_values = 0 # CSV is untyped so every value fits its column
+        self._stream = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+        self._writer = csv.writer(self._stream)
+        self._writer.writerow([x.name for x in columns])
+
+    def write_batch(self, values: List[List[Any]]) -> None:
+        self._writer.writerows(zip(*([_to_text(x) for x in column_values] for column_values in values)))
+
+    def close(self) -> None:
+        self._stream.flush()
+        self._stream.detach() # the caller owns the underlying stream
+
+
+class ArrowRecordBatchWriter:
+    '''Write record batches as Parquet or as an Arrow IPC file (Feather)
+
+    Values that do not match the type inferred for their column are written as null
+    and counted so that a sample that was not representative can be reported.
+    '''
+    def __init__(self, stream: BinaryIO, columns: List[Column], export_format: str = 'parquet'):
+        pyarrow = load_pyarrow()
+        self._pyarrow = pyarrow
+        self.columns = columns
+        self.mismatched_values = 0
+        self.schema = pyarrow.schema([(x.name, self._arrow_type(x.type)) for x in columns])
+        if export_format == 'parquet':
+            import pyarrow.parquet
+
+            self._writer = pyarrow.parquet.ParquetWriter(stream, self.schema)
+
+        else:
+            self._writer = pyarrow.ipc.new_file(stream, self.schema)
+
+    def _arrow_type(self, column_type: str) -> Any:
+        return {
+            'bool': self._pyarrow.bool_(),
+            'int': self._pyarrow.int64(),
+            'float': self._pyarrow.float64(),
+            'string': self._pyarrow.string(),
+        }[column_type]
+
+    def _convert(self, column_type: str, value: Any) -> Any:
+        if value is None or column_type == 'string':
+            return _to_text(value)
+
+        value_type = _value_type(value)
+        if value_type == column_type:
+            return value
+        if column_type == 'float' and value_type == 'int':
+            return float(value)
+
+        self.mismatched_values += 1
+        return None
+
+    def write_batch(self, values: List[List[Any]]) -> None:
+        arrays = [
+            self._pyarrow.array([self._convert(column.type, x) for x in column_values], type=self._arrow_type(column.type))
+            for column, column_values in zip(self.columns, values)
+        ]
+        self._writer.write_batch(self._pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+@dataclass
+class ExportSummary:
+    columns: List[Column]
+    rows: int = 0
+    batches: int = 0
+    mismatched_values: int = 0
+    exit_code: int = 0
+
+
+def export_records(records: Iterable[Dict], stream: BinaryIO, export_format: str = 'csv', columns: Optional[Iterable[str]] = None, sample_size: int = SAMPLE_SIZE, batch_size: int = RECORD_BATCH_SIZE) -> ExportSummary:
+    '''Write decoded records to a columnar format in record batches
+
+    Column types are inferred from the first sample_size records, after which records
+    are converted one batch at a time so that memory use only depends on the batch
+    size. Exporting straight from records skips serializing every token as JSON only
+    to parse it again for analytics.
+    '''
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Export format must be one of ({", ".join(EXPORT_FORMATS)}).')
+
+    # Options are checked before any record is decoded
+    columns = None if columns is None else [parse_column(x) for x in columns]
+    if export_format != 'csv':
+        load_pyarrow()
+
+    records = iter(records)
+    sample = list(islice(records, sample_size))
+    summary = ExportSummary(infer_columns(sample, columns))
+    if export_format == 'csv':
+        writer = CSVRecordBatchWriter(stream, summary.columns)
+
+    else:
+        writer = ArrowRecordBatchWriter(stream, summary.columns, export_format)
+
+    try:
+        records = chain(sample, records)
+        batch = list(islice(records, batch_size))
+        while batch:
+            for record in batch:
+                summary.exit_code = update_exit_code(summary.exit_code, record)
+
+            writer.write_batch([[column_value(x, column.name) for x in batch] for column in summary.columns])
+            summary.rows += len(batch)
+            summary.batches += 1
+            batch = list(islice(records, batch_size))
+
+    finally:
+        writer.close()
+        summary.mismatched_values = writer.mismatched_values
+
+    return summary
@@ -0,0 +1,103 @@
+import re
+import mmap
+from typing import Tuple
+from typing import Union
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from pathlib import Path
+from heapq import merge
+
+
+# Both patterns start with a literal so that the regular expression engine can skip
+# ahead with a fast substring search instead of attempting a match at every byte.
+# JWT shaped substrings rely on JSON headers always encoding to a leading eyJ while
+# any compact token following a Bearer scheme is picked up by the second pattern.
+# Five segment encrypted tokens are matched before three segment signed tokens.
+JWT_PATTERN = re.compile(rb'eyJ[A-Za-z0-9_\-]*(?:\.[A-Za-z0-9_\-]*\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+|\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]*)')
+BEARER_PATTERN = re.compile(rb'earer[ \t]+([A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]*)')
+TRAILING_BEARER_PATTERN = re.compile(rb'[Bb]earer[ \t]*\Z')
+TOKEN_CHARACTERS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-.'
+BASE64URL_CHARACTERS = frozenset(TOKEN_CHARACTERS[:-1])
+
+CHUNK_SIZE = 1 << 20
+MAX_TOKEN_LENGTH = 1 << 16
+
+
+def _find_jwts(buffer: Union[bytes, memoryview, mmap.mmap]) -> Iterator[Tuple[int, bytes]]:
+    for match in JWT_PATTERN.finditer(buffer):
+        start = match.start()
+        # Skip matches in the middle of longer base64url strings
+        if start == 0 or buffer[start - 1] not in BASE64URL_CHARACTERS:
+            yield start, match.group()
+
+
+def _find_bearer_tokens(buffer: Union[bytes, memoryview, mmap.mmap]) -> Iterator[Tuple[int, bytes]]:
+    for match in BEARER_PATTERN.finditer(buffer):
+        start, token = match.start(1), match.group(1)
+        scheme_start = match.start() - 1
+        if token.startswith(b'eyJ') or scheme_start < 0 or buffer[scheme_start] not in b'Bb':
+            continue # eyJ tokens are already found by the JWT pattern
+
+        if scheme_start == 0 or buffer[scheme_start - 1] not in BASE64URL_CHARACTERS:
+            yield start, token
+
+
+def extract_tokens(buffer: Union[bytes, memoryview, mmap.mmap]) -> Iterator[str]:
+    '''Find tokens in a buffer without copying it, in the order they appear'''
+    for _, token in merge(_find_jwts(buffer), _find_bearer_tokens(buffer)):
+        yield token.decode('ascii')
+
+
+def _scan_boundary(buffer: bytes) -> int:
+    '''Position up to which a buffer can be scanned without splitting a token that may continue in the next chunk'''
+    boundary = len(buffer.rstrip(TOKEN_CHARACTERS))
+    bearer = TRAILING_BEARER_PATTERN.search(buffer, max(0, boundary - 16), boundary)
+    if bearer is not None:
+        # Keep whatever precedes the scheme too so that it is still recognized as a separate word
+        boundary = bearer.start()
+        while boundary > 0 and buffer[boundary - 1] in BASE64URL_CHARACTERS:
+            boundary -= 1
+
+    # Runs of token characters longer than any token can not be held back indefinitely
+    if len(buffer) - boundary > MAX_TOKEN_LENGTH:
+        boundary = len(buffer)
+
+    return boundary
+
+
+def extract_tokens_from_chunks(chunks: Iterable[bytes]) -> Iterator[str]:
+    '''Find tokens in consecutive chunks of a binary stream
+
+    The tail of each chunk that could be the start of a token is carried over to the
+    next chunk so that tokens are never split, while memory use stays bounded by the
+    chunk size regardless of how large the input is.
+    '''
+    carry = b''
+    for chunk in chunks:
+        buffer = carry + chunk
+        boundary = _scan_boundary(buffer)
+        yield from extract_tokens(memoryview(buffer)[:boundary])
+        carry = buffer[boundary:]
+
+    yield from extract_tokens(carry)
+
+
+def extract_tokens_from_stream(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    '''Find tokens in a binary stream scanning it one chunk at a time'''
+    yield from extract_tokens_from_chunks(iter(lambda: stream.read(chunk_size), b''))
+
+
+def extract_tokens_from_path(path: Union[str, Path]) -> Iterator[str]:
+    '''Find tokens in a file by memory mapping it so the operating system pages it in as it is scanned'''
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        except (ValueError, OSError):
+            # Empty files and special files (e.g. pipes) can not be memory mapped
+            yield from extract_tokens_from_stream(f)
+            return
+
+        with buffer:
+            yield from extract_tokens(buffer)
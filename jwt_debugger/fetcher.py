@@ -0,0 +1,122 @@
+import asyncio
+from typing import Dict
+from typing import List
+from typing import Union
+from typing import Iterable
+from typing import Optional
+from functools import partial
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from jwt_debugger.cache import HTTPCache
+from jwt_debugger.decoder import HTTP_TIMEOUT
+from jwt_debugger.decoder import load_jwks_from_oidc_url
+from jwt_debugger.decoder import resolve_oidc_configuration_url
+from jwt_debugger.decoder import read_jwks_uri_from_oidc_configuration
+from jwt_debugger.keystore import KeyStore
+
+
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+class AsyncKeyFetcher:
+    '''Fetch OpenID Connect configuration and JSON Web Key Sets from many providers concurrently
+
+    Requests are blocking requests calls run on a thread pool from the event loop and
+    share one pooled session so connections are reused across providers. Concurrency
+    is limited per host, every request has a timeout and transient failures are
+    retried with exponential backoff.
+    '''
+    def __init__(self, max_connections: int = 32, per_host_limit: int = 4, timeout: float = HTTP_TIMEOUT, retries: int = 3, backoff: float = 0.5, cache: Optional[HTTPCache] = None):
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=per_host_limit)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __enter__(self) -> 'AsyncKeyFetcher':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    def _get_json(self, url: str) -> Dict:
+        if self.cache is not None:
+            return self.cache.get_json(url)
+
+        response = self._session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if attempt >= self.retries:
+            return False
+
+        if isinstance(error, requests.HTTPError):
+            return getattr(error.response, 'status_code', None) in RETRY_STATUS_CODES
+
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    async def get_json(self, url: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        async with self._host_semaphore(url):
+            attempt = 0
+            while True:
+                try:
+                    return await loop.run_in_executor(self._executor, self._get_json, url)
+
+                except requests.RequestException as e:
+                    if not self._should_retry(e, attempt):
+                        raise
+
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+
+    async def resolve_jwks_uri(self, provider_url: str) -> str:
+        configuration_url = resolve_oidc_configuration_url(provider_url)
+        if configuration_url is None:
+            return provider_url
+
+        configuration = await self.get_json(configuration_url)
+        return read_jwks_uri_from_oidc_configuration(configuration, configuration_url)
+
+    async def load_key_store(self, provider_url: str) -> KeyStore:
+        jwks_uri = await self.resolve_jwks_uri(provider_url)
+        keys = await self.get_json(jwks_uri)
+
+        # Refreshing on an unknown kid happens later from synchronous code
+        return KeyStore(partial(load_jwks_from_oidc_url, jwks_uri, cache=self.cache), keys=keys)
+
+    async def load_key_stores(self, provider_urls: Iterable[str], return_exceptions: bool = False) -> Dict[str, Union[KeyStore, BaseException]]:
+        provider_urls = list(dict.fromkeys(provider_urls))
+        results: List = await asyncio.gather(
+            *(self.load_key_store(x) for x in provider_urls),
+            return_exceptions=return_exceptions
+        )
+        return dict(zip(provider_urls, results))
+
+
+def load_key_stores_from_oidc_providers(provider_urls: Iterable[str], return_exceptions: bool = False, **kwargs) -> Dict[str, Union[KeyStore, BaseException]]:
+    '''Load key stores for many OpenID Connect Providers at once from synchronous code'''
+    with AsyncKeyFetcher(**kwargs) as fetcher:
+        return asyncio.run(fetcher.load_key_stores(provider_urls, return_exceptions=return_exceptions))
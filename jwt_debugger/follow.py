@@ -0,0 +1,79 @@
+import os
+import time
+from typing import Union
+from typing import BinaryIO
+from typing import Iterator
+from typing import Optional
+from pathlib import Path
+
+from jwt_debugger.extract import CHUNK_SIZE
+
+
+POLL_INTERVAL = 0.25
+FRAME_RATE = 4 # dashboard refreshes per second regardless of how fast tokens arrive
+
+
+def _is_rotated(f: BinaryIO, path: Union[str, Path]) -> bool:
+    '''Whether the path now refers to a different file, rewinding files that were truncated in place'''
+    try:
+        status = os.stat(path)
+
+    except FileNotFoundError:
+        return False # keep the current file until a new one is created
+
+    if status.st_ino != os.fstat(f.fileno()).st_ino:
+        return True
+
+    if status.st_size < f.tell():
+        f.seek(0) # e.g. logrotate copytruncate
+
+    return False
+
+
+def _open(path: Union[str, Path]) -> Optional[BinaryIO]:
+    try:
+        return open(path, 'rb') # pylint: disable=consider-using-with
+
+    except FileNotFoundError:
+        return None
+
+
+def _read_appended(f: Optional[BinaryIO], path: Union[str, Path], poll_interval: float, chunk_size: int) -> Iterator[bytes]:
+    try:
+        while True:
+            if f is None:
+                # Anything in a file created after following started is new
+                f = _open(path)
+                if f is None:
+                    time.sleep(poll_interval)
+                    continue
+
+            chunk = f.read(chunk_size)
+            if chunk:
+                yield chunk
+                continue
+
+            if _is_rotated(f, path):
+                f.close()
+                f = None
+                continue
+
+            time.sleep(poll_interval)
+
+    finally:
+        if f is not None:
+            f.close()
+
+
+def follow_file(path: Union[str, Path], from_start: bool = False, poll_interval: float = POLL_INTERVAL, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    '''Yield data appended to a file from now on as it is written, like tail -F
+
+    Existing data is skipped unless from_start is set. When the file is rotated, the
+    rest of the old file is read before switching to the new one, which is read from
+    its start. The file is polled while there is nothing to read.
+    '''
+    f = _open(path)
+    if f is not None and not from_start:
+        f.seek(0, os.SEEK_END)
+
+    return _read_appended(f, path, poll_interval, chunk_size)
@@ -0,0 +1,260 @@
+import os
+import json
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+from typing import Optional
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from concurrent.futures import ThreadPoolExecutor
+
+from jwcrypto.jwk import JWK
+from jwcrypto.common import JWException
+
+from jwt_debugger.cache import default_cache_directory
+from jwt_debugger.decoder import parse_token
+from jwt_debugger.decoder import signing_algorithm
+from jwt_debugger.decoder import verify_signature
+from jwt_debugger.decoder import load_jwks_from_path
+from jwt_debugger.timings import timed
+
+
+# Bumped whenever the layout of indexed keys changes so that older indexes are rebuilt
+INDEX_VERSION = 1
+
+# Key files are small, anything larger is a log, archive or binary that is not worth reading
+MAX_KEY_FILE_SIZE = 1024 * 1024
+
+# Key type of each family of signing algorithms (curves are told apart by signing_algorithm)
+ALGORITHM_KEY_TYPES = {
+    'RS': 'RSA',
+    'PS': 'RSA',
+    'ES': 'EC',
+    'Ed': 'OKP',
+    'HS': 'oct',
+}
+
+
+def default_index_path(directory: Union[str, Path]) -> Path:
+    directory = Path(directory).resolve()
+    return default_cache_directory() / 'keyindex' / f'{sha256(str(directory).encode()).hexdigest()}.json'
+
+
+@timed('key_parse')
+def _index_key_file(path: Path) -> List[Dict]:
+    '''Public parameters and identifiers of every key in a JWK, JWKS or PEM file'''
+    keys = []
+    for position, document in enumerate(load_jwks_from_path(path)['keys']):
+        key = JWK(**document)
+        symmetric = key.get('kty') == 'oct'
+        if not symmetric and key.get('use') == 'enc':
+            continue # encryption keys never sign tokens
+
+        # Shared secrets are read from the key file again when they are tried rather than copied to the index
+        keys.append({
+            'position': position,
+            'thumbprint': None if symmetric else key.thumbprint(),
+            'kid': key.get('kid'),
+            'alg': key.get('alg'),
+            'kty': key.get('kty'),
+            'crv': key.get('crv'),
+            'public': None if symmetric else key.export_public(as_dict=True),
+        })
+
+    return keys
+
+
+def is_compatible_key(key: Dict, alg: Optional[str]) -> bool:
+    '''Whether a key of this type (and curve) could have signed a token with this algorithm'''
+    if not isinstance(alg, str) or not alg or alg == 'none':
+        return False # the header is not validated so alg may be any JSON value
+
+    if key['alg'] is not None and key['alg'] != alg:
+        return False
+
+    kty = ALGORITHM_KEY_TYPES.get(alg[:2])
+    if kty is None:
+        return True # algorithms that are not known here are left to the signature check
+
+    if kty == 'EC':
+        return key['kty'] == 'EC' and signing_algorithm({'kty': 'EC', 'crv': key['crv']}) == alg
+    return key['kty'] == kty
+
+
+class KeyIndex:
+    '''Signing keys found in a directory tree of JWK, JWKS and PEM files
+
+    Every key is indexed by its RFC 7638 thumbprint, kid, alg and key type so that the
+    keys which could have signed a token are found without parsing any key files. The
+    index is kept on disk and files are only read again when their modification time
+    or size changed, so searching the same directory again skips parsing entirely.
+    Files that are not keys are remembered as well so that they are not read again.
+    '''
+    def __init__(self, directory: Union[str, Path], files: Optional[Dict[str, Dict]] = None):
+        self.directory = Path(directory).resolve()
+        self.files = files or {}
+        self.indexed_files = 0
+        self.reused_files = 0
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], index_path: Optional[Union[str, Path]] = None, use_cache: bool = True) -> 'KeyIndex':
+        '''Index a directory reusing the entries of files that did not change since it was last indexed'''
+        index_path = default_index_path(directory) if index_path is None else Path(index_path)
+        key_index = cls(directory)
+        if use_cache:
+            key_index.files = key_index._read_index(index_path)
+
+        if key_index.refresh() and use_cache:
+            key_index.save(index_path)
+
+        return key_index
+
+    def _read_index(self, index_path: Path) -> Dict[str, Dict]:
+        try:
+            with index_path.open() as f:
+                document = json.load(f)
+
+        except (OSError, ValueError):
+            return {}
+
+        if document.get('version') != INDEX_VERSION or document.get('directory') != str(self.directory):
+            return {}
+        return document['files']
+
+    def save(self, index_path: Union[str, Path]) -> None:
+        index_path = Path(index_path)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile('w', dir=index_path.parent, suffix='.tmp', delete=False) as f:
+            json.dump({'version': INDEX_VERSION, 'directory': str(self.directory), 'files': self.files}, f)
+
+        os.replace(f.name, index_path)
+
+    def _walk(self) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        for root, directories, names in os.walk(self.directory):
+            directories[:] = sorted(x for x in directories if not x.startswith('.'))
+            for name in sorted(names):
+                path = Path(root) / name
+                try:
+                    stat = path.stat()
+
+                except OSError:
+                    continue
+
+                if stat.st_size <= MAX_KEY_FILE_SIZE:
+                    files.append((path.relative_to(self.directory).as_posix(), stat))
+
+        return files
+
+    def refresh(self) -> bool:
+        '''Index new and modified files and forget removed ones returning whether anything changed'''
+        files = {}
+        for relative_path, stat in self._walk():
+            entry = self.files.get(relative_path)
+            if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                self.reused_files += 1
+
+            else:
+                try:
+                    keys = _index_key_file(self.directory / relative_path)
+
+                except (OSError, ValueError, TypeError, JWException):
+                    keys = []
+
+                entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'keys': keys}
+                self.indexed_files += 1
+
+            files[relative_path] = entry
+
+        changed = bool(self.indexed_files) or files.keys() != self.files.keys()
+        self.files = files
+        return changed
+
+    def __len__(self) -> int:
+        return sum(len(x['keys']) for x in self.files.values())
+
+    def keys(self) -> List[Dict]:
+        return [{'path': path, **key} for path, entry in self.files.items() for key in entry['keys']]
+
+    def candidates(self, header: Dict) -> List[List[Dict]]:
+        '''Keys that could have signed a token with this header, best candidates first
+
+        A key embedded in the header (jwk) is looked up by thumbprint. Otherwise keys
+        with the token's kid and keys without any kid are tried before keys with a
+        different kid, which are still tried because mislabelled keys are a common
+        reason for looking for the signing key in the first place.
+        '''
+        alg = header.get('alg')
+        keys = [x for x in self.keys() if is_compatible_key(x, alg)]
+
+        embedded_key = header.get('jwk')
+        if isinstance(embedded_key, dict):
+            try:
+                thumbprint = JWK(**embedded_key).thumbprint()
+
+            except (ValueError, TypeError, JWException):
+                return []
+
+            return [[x for x in keys if x['thumbprint'] == thumbprint]]
+
+        kid = header.get('kid')
+        return [
+            [x for x in keys if x['kid'] is None or x['kid'] == kid],
+            [x for x in keys if x['kid'] is not None and x['kid'] != kid],
+        ]
+
+    def load_key(self, key: Dict) -> JWK:
+        if key['public'] is not None:
+            return JWK(**key['public'])
+        return JWK(**load_jwks_from_path(self.directory / key['path'])['keys'][key['position']])
+
+
+def _identity(key: Dict) -> Tuple:
+    # Copies of a key share a thumbprint so they are only tried once
+    return (key['thumbprint'],) if key['thumbprint'] is not None else (key['path'], key['position'])
+
+
+def find_signing_keys(token: str, key_index: KeyIndex, workers: int = 8) -> Dict:
+    '''Search indexed keys for the keys that verify the signature of a token
+
+    Candidates are narrowed down by the token header and tried in parallel, stopping
+    after the first group of candidates in which a key verified the signature. Each
+    distinct key is only tried once and every file holding a copy of it is reported.
+    '''
+    parsed_token = parse_token(token)
+    candidates = key_index.candidates(parsed_token.header)
+
+    def verify(key: Dict) -> bool:
+        try:
+            return verify_signature(parsed_token.token, key_index.load_key(key))
+
+        except (OSError, ValueError, TypeError, JWException):
+            return False # key files that changed since they were indexed
+
+    tried = set()
+    verified = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for keys in candidates:
+            distinct_keys = {}
+            for key in keys:
+                if _identity(key) not in tried:
+                    distinct_keys.setdefault(_identity(key), key)
+
+            tried.update(distinct_keys)
+            for identity, result in zip(distinct_keys, executor.map(verify, distinct_keys.values())):
+                if result:
+                    verified.add(identity)
+
+            if verified:
+                break
+
+    matches = [x for keys in candidates for x in keys if _identity(x) in verified]
+    return {
+        'header': parsed_token.header,
+        'matches': [{x: key[x] for x in ('path', 'kid', 'alg', 'kty', 'thumbprint')} for key in matches],
+        'tried_keys': len(tried),
+        'indexed_keys': len(key_index),
+        'indexed_files': len(key_index.files),
+    }
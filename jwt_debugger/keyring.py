@@ -0,0 +1,117 @@
+import os
+import json
+import struct
+from typing import List
+from typing import Union
+from typing import Iterable
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWKSet
+from jwcrypto.jwk import InvalidJWKUsage
+from jwcrypto.jwk import InvalidJWKOperation
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.hazmat.primitives.serialization import PublicFormat
+from cryptography.hazmat.primitives.serialization import load_der_public_key
+
+from jwt_debugger.timings import timed
+
+
+KEYRING_MAGIC = b'JWTDKR\x00\x01'
+LENGTH = struct.Struct('>I')
+
+
+class InvalidKeyring(ValueError):
+    pass
+
+
+def prepare_key(key: JWK) -> JWK:
+    '''Load the public key object once so that every verification reuses it'''
+    # jwcrypto keeps the loaded key on the JWK which is otherwise built on first use
+    try:
+        key.get_op_key('verify')
+
+    except (InvalidJWKUsage, InvalidJWKOperation):
+        pass # encryption keys are never used for verification
+
+    return key
+
+
+def prepare_keys(keys: Union[JWK, JWKSet, Iterable[JWK]]) -> List[JWK]:
+    if isinstance(keys, JWK):
+        keys = [keys]
+
+    elif isinstance(keys, JWKSet):
+        keys = keys['keys']
+
+    return [prepare_key(x) for x in keys]
+
+
+def _public_der(key: JWK) -> bytes:
+    if key.get('kty') == 'oct':
+        return b''
+    return key.get_op_key('verify').public_bytes(Encoding.DER, PublicFormat.SubjectPublicKeyInfo)
+
+
+def write_keyring(keys: Union[JWK, JWKSet, Iterable[JWK]], path: Union[str, Path]) -> None:
+    '''Write public keys along with their DER encoding to a binary keyring
+
+    Each key is stored as its JSON Web Key parameters followed by the DER encoded
+    public key, both prefixed with their length, so that loading a keyring skips
+    validating and rebuilding keys from their JSON or PEM representation.
+    '''
+    path = Path(path)
+    chunks = [KEYRING_MAGIC]
+    for key in prepare_keys(keys):
+        if key.get('kty') == 'oct':
+            parameters = key.export(as_dict=True)
+        else:
+            parameters = key.export_public(as_dict=True)
+
+        encoded_parameters = json.dumps(parameters, separators=(',', ':')).encode()
+        der = _public_der(key)
+        chunks.extend([LENGTH.pack(len(encoded_parameters)), encoded_parameters, LENGTH.pack(len(der)), der])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile('wb', dir=path.parent, suffix='.tmp', delete=False) as f:
+        f.write(b''.join(chunks))
+
+    os.replace(f.name, path)
+
+
+@timed('key_parse')
+def read_keyring(path: Union[str, Path]) -> List[JWK]:
+    '''Read prepared keys from a binary keyring written by write_keyring'''
+    content = Path(path).read_bytes()
+    if not content.startswith(KEYRING_MAGIC):
+        raise InvalidKeyring(f'Path({path}) is not a jwt-debugger keyring.')
+
+    keys = []
+    offset = len(KEYRING_MAGIC)
+    try:
+        while offset < len(content):
+            (parameters_length,) = LENGTH.unpack_from(content, offset)
+            offset += LENGTH.size
+            parameters = json.loads(content[offset:offset + parameters_length])
+            offset += parameters_length
+
+            (der_length,) = LENGTH.unpack_from(content, offset)
+            offset += LENGTH.size
+            der = content[offset:offset + der_length]
+            offset += der_length
+
+            # Keyrings are written from keys that were already validated so the parameters
+            # are trusted and the public key object is restored directly from its DER encoding.
+            # This relies on how jwcrypto caches loaded keys, which setup.py pins to a range
+            # covered by test_read_keyring_matches_jwcrypto_keys
+            key = JWK()
+            dict.update(key, parameters)
+            if der:
+                key._cache_pub_k = load_der_public_key(der) # pylint: disable=protected-access,attribute-defined-outside-init
+            keys.append(key)
+
+    except (struct.error, ValueError) as e:
+        raise InvalidKeyring(f'Path({path}) is not a valid jwt-debugger keyring.') from e
+
+    return keys
@@ -0,0 +1,161 @@
+import time
+from typing import Dict
+from typing import List
+from typing import Union
+from typing import Callable
+from typing import Optional
+from typing import NamedTuple
+from functools import partial
+from threading import Lock
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWKSet
+
+from jwt_debugger.keyring import prepare_key
+from jwt_debugger.timings import timed
+
+
+@timed('key_parse')
+def _parse_key(document: Dict) -> JWK:
+    return prepare_key(JWK(**document))
+
+
+class _KeyIndex(NamedTuple):
+    documents: List[Dict]
+    parsed: List[Optional[JWK]]
+    by_kid: Dict[str, int]
+    by_alg: Dict[Optional[str], List[int]]
+
+
+class KeyStore:
+    '''JSON Web Keys indexed by kid and alg
+
+    Keys are kept as JSON until a token asks for them and are only parsed once.
+    A token with an unknown kid triggers a single reload of the key set which is
+    rate limited by min_refresh_interval so that rotated keys are picked up without
+    letting bad tokens hammer the provider.
+    '''
+    def __init__(self, load_keys: Callable[[], Dict], min_refresh_interval: float = 30.0, keys: Optional[Dict] = None):
+        self._load_keys = load_keys
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = Lock()
+        self._last_refresh = None
+        self._index = _KeyIndex([], [], {}, {})
+
+        # Key sets that were already fetched (e.g. concurrently) seed the store without loading them again
+        if keys is None:
+            self.refresh()
+
+        else:
+            self._update(keys)
+
+    @classmethod
+    def from_jwk(cls, jwk: Union[JWK, JWKSet]) -> 'KeyStore':
+        if isinstance(jwk, JWKSet):
+            document = jwk.export(as_dict=True)
+
+        else:
+            document = {'keys': [jwk.export(as_dict=True)]}
+
+        # Static keys can never be refreshed so there is no point in trying
+        return cls(partial(dict, document), min_refresh_interval=float('inf'))
+
+    @classmethod
+    def from_prepared_keys(cls, keys: List[JWK]) -> 'KeyStore':
+        '''Build a static key store from keys that were already parsed (e.g. read from a keyring)'''
+        document = {'keys': [dict(x) for x in keys]}
+        key_store = cls(partial(dict, document), min_refresh_interval=float('inf'), keys=document)
+        key_store._index.parsed[:] = keys
+        return key_store
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+
+        # Loaded public key objects can not be pickled so they are parsed again when needed
+        state['_index'] = self._index._replace(parsed=[None] * len(self._index.documents))
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._index.documents)
+
+    def refresh(self) -> None:
+        self._update(self._load_keys())
+
+    def _update(self, keys: Dict) -> None:
+        documents = list(keys.get('keys', []))
+
+        by_kid, by_alg = {}, {}
+        for position, document in enumerate(documents):
+            if document.get('kid') is not None:
+                by_kid[document['kid']] = position
+            by_alg.setdefault(document.get('alg'), []).append(position)
+
+        # Swapping the whole index keeps concurrent readers consistent without a lock
+        self._index = _KeyIndex(documents, [None] * len(documents), by_kid, by_alg)
+        self._last_refresh = time.monotonic()
+
+    def _refresh_if_allowed(self) -> bool:
+        with self._lock:
+            if time.monotonic() - self._last_refresh < self.min_refresh_interval:
+                return False
+
+            # Failed attempts count towards the rate limit as well so that an unreachable
+            # provider is not asked again for every token with an unknown kid
+            self._last_refresh = time.monotonic()
+            try:
+                self.refresh()
+
+            except Exception: # pylint: disable=broad-except
+                return False # keys are loaded by arbitrary callables, tokens stay unverified until a refresh succeeds
+
+            return True
+
+    @staticmethod
+    def _parse(index: _KeyIndex, position: int) -> JWK:
+        key = index.parsed[position]
+        if key is None:
+            key = _parse_key(index.documents[position])
+            index.parsed[position] = key
+        return key
+
+    def get_key(self, kid: Optional[str] = None, alg: Optional[str] = None) -> Optional[Union[JWK, JWKSet]]:
+        '''Find candidate keys for a token returning None when no key could have signed it'''
+        index = self._index
+        if kid is not None:
+            if not isinstance(kid, str):
+                return None # the header is not validated, a list or object kid can not name a key
+
+            position = index.by_kid.get(kid)
+            if position is None and self._refresh_if_allowed():
+                index = self._index
+                position = index.by_kid.get(kid)
+
+            return None if position is None else self._parse(index, position)
+
+        if alg is None:
+            candidates = list(range(len(index.documents)))
+
+        elif not isinstance(alg, str):
+            return None
+
+        else:
+            candidates = index.by_alg.get(alg, []) + index.by_alg.get(None, [])
+
+        if not candidates:
+            return None
+
+        if len(candidates) == 1:
+            return self._parse(index, candidates[0])
+
+        key_set = JWKSet()
+        for position in candidates:
+            key_set.add(self._parse(index, position))
+        return key_set
+
+    def resolve_key(self, header: Dict, unused_payload: Dict) -> Optional[Union[JWK, JWKSet]]:
+        return self.get_key(header.get('kid'), header.get('alg'))
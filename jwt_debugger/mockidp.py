@@ -0,0 +1,162 @@
+import json
+import time
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Optional
+from hashlib import sha256
+from threading import Lock
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwt import JWT
+
+from jwt_debugger.decoder import signing_algorithm
+
+
+CONFIGURATION_PATH = '/.well-known/openid-configuration'
+JWKS_PATH = '/jwks'
+TOKEN_PATH = '/token'
+
+
+class MockIdentityProviderHandler(BaseHTTPRequestHandler):
+    '''Serve discovery, the JSON Web Key Set and freshly signed tokens'''
+    server: 'MockIdentityProvider'
+
+    def do_GET(self) -> None: # pylint: disable=invalid-name
+        url = urlsplit(self.path)
+        self.server.count_request(url.path)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if url.path == CONFIGURATION_PATH:
+            self._send_document(self.server.configuration_document())
+
+        elif url.path == JWKS_PATH:
+            self._send_document(self.server.jwks_document())
+
+        elif url.path == TOKEN_PATH:
+            claims = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            token = self.server.mint_token(claims)
+            if token is None:
+                self.send_error(404, 'No private key is available for signing tokens.')
+                return
+
+            self._send_document(json.dumps({'id_token': token}).encode(), cacheable=False)
+
+        else:
+            self.send_error(404)
+
+    def _send_document(self, body: bytes, cacheable: bool = True) -> None:
+        etag = f'"{sha256(body).hexdigest()[:32]}"'
+        if cacheable and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if cacheable:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache' if self.server.max_age is None else f'public, max-age={self.server.max_age}')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None: # pylint: disable=arguments-differ
+        if self.server.verbose:
+            super().log_message(*args)
+
+
+class MockIdentityProvider(ThreadingHTTPServer):
+    '''Local stand-in for an OpenID Connect Provider
+
+    Publishes the given keys along with generated RSA keys so that discovery, key set
+    size and key rotation can be tested and benchmarked without network access.
+    Generated keys are replaced one at a time every rotate_every seconds, while given
+    keys are always published. Responses can be delayed to simulate a remote provider
+    and carry ETag and Cache-Control headers for exercising the on-disk cache.
+    '''
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], keys: Optional[List[JWK]] = None, key_count: int = 0, rotate_every: Optional[float] = None, latency: float = 0.0, max_age: Optional[int] = None, verbose: bool = False):
+        super().__init__(address, MockIdentityProviderHandler)
+        self.latency = latency
+        self.max_age = max_age
+        self.verbose = verbose
+        self.rotate_every = rotate_every
+        self.request_counts: Dict[str, int] = {}
+
+        self.keys = [x if x.get('kid') else JWK(**x, kid=x.thumbprint()) for x in keys or []]
+        if not self.keys or rotate_every:
+            key_count = max(key_count, 1) # there has to be a key to publish or rotate
+
+        self.rotations = 0
+        self._generated = 0
+        self.generated_keys = [self._generate_key() for _ in range(key_count)]
+        self._started = time.monotonic()
+        self._lock = Lock()
+
+    @property
+    def issuer(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count_request(self, path: str) -> None:
+        with self._lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def _generate_key(self) -> JWK:
+        self._generated += 1
+        return JWK.generate(kty='RSA', size=2048, kid=f'mock-{self._generated}', use='sig', alg='RS256')
+
+    def _rotate(self) -> None:
+        if not self.rotate_every:
+            return
+
+        rotations = int((time.monotonic() - self._started) // self.rotate_every)
+        if rotations <= self.rotations:
+            return
+
+        # After a long pause only the keys that will still be published are generated,
+        # the kids of skipped keys are used up so that they keep counting rotations
+        replaced = min(rotations - self.rotations, len(self.generated_keys))
+        self._generated += rotations - self.rotations - replaced
+        self.rotations = rotations
+        del self.generated_keys[:replaced]
+        self.generated_keys.extend(self._generate_key() for _ in range(replaced))
+
+    def published_keys(self) -> List[JWK]:
+        '''Keys in the order they are published, newest generated key last'''
+        with self._lock:
+            self._rotate()
+            return self.keys + self.generated_keys
+
+    def configuration_document(self) -> bytes:
+        return json.dumps({
+            'issuer': self.issuer,
+            'jwks_uri': f'{self.issuer}{JWKS_PATH}',
+            'token_endpoint': f'{self.issuer}{TOKEN_PATH}',
+            'response_types_supported': ['id_token'],
+            'subject_types_supported': ['public'],
+            'id_token_signing_alg_values_supported': sorted({signing_algorithm(x) for x in self.published_keys() if signing_algorithm(x)}),
+        }).encode()
+
+    def jwks_document(self) -> bytes:
+        return json.dumps({'keys': [x.export_public(as_dict=True) for x in self.published_keys()]}).encode()
+
+    def mint_token(self, claims: Dict) -> Optional[str]:
+        '''Sign a token with the newest private key that can sign'''
+        key = next((x for x in reversed(self.published_keys()) if x.has_private and signing_algorithm(x)), None)
+        if key is None:
+            return None
+
+        now = int(time.time())
+        claims = {'iss': self.issuer, 'sub': 'mock', 'iat': now, 'exp': now + 3600, **claims}
+        token = JWT(header={'typ': 'JWT', 'alg': signing_algorithm(key), 'kid': key['kid']}, claims=claims)
+        token.make_signed_token(key)
+        return token.serialize()
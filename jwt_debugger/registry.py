@@ -0,0 +1,120 @@
+import json
+import time
+from typing import Dict
+from typing import Union
+from typing import Optional
+from pathlib import Path
+from functools import partial
+from threading import Lock
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWKSet
+
+from jwt_debugger.cache import HTTPCache
+from jwt_debugger.decoder import load_jwks_from_path
+from jwt_debugger.decoder import load_jwks_from_oidc_url
+from jwt_debugger.decoder import resolve_jwks_uri_from_oidc_provider
+from jwt_debugger.keystore import KeyStore
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(('http://', 'https://'))
+
+
+class IssuerRegistry:
+    '''Route tokens to key stores by their iss claim
+
+    Each issuer maps to either an OpenID Connect Provider URL or a local JWKS, JWK
+    or PEM file. Key stores are built the first time an issuer is seen and reused
+    for the rest of the run. Providers that can not be reached resolve to no key and
+    are retried at most once every retry_interval seconds.
+    '''
+    def __init__(self, sources: Dict[str, str], cache: Optional[HTTPCache] = None, retry_interval: float = 30.0):
+        self.sources = sources
+        self.cache = cache
+        self.retry_interval = retry_interval
+        self._lock = Lock()
+        self._key_stores: Dict[str, KeyStore] = {}
+        self._failures: Dict[str, float] = {}
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], cache: Optional[HTTPCache] = None) -> 'IssuerRegistry':
+        '''Load a registry from a JSON file mapping issuers to provider urls or key files
+
+        Relative key file paths are resolved from the directory of the registry file.
+        '''
+        path = Path(path)
+        with path.open() as f:
+            sources = json.load(f).get('issuers', {})
+
+        return cls(
+            {iss: source if is_url(source) else str(path.parent / source) for iss, source in sources.items()},
+            cache=cache
+        )
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def _build_key_store(self, source: str) -> KeyStore:
+        if is_url(source):
+            jwks_uri = resolve_jwks_uri_from_oidc_provider(source, cache=self.cache)
+            return KeyStore(partial(load_jwks_from_oidc_url, jwks_uri, cache=self.cache))
+
+        return KeyStore(partial(load_jwks_from_path, source))
+
+    def key_store_for(self, iss: Optional[str]) -> Optional[KeyStore]:
+        if not isinstance(iss, str):
+            return None # unverified claims may hold any JSON value
+
+        key_store = self._key_stores.get(iss)
+        if key_store is not None or iss not in self.sources:
+            return key_store
+
+        with self._lock:
+            if iss not in self._key_stores:
+                source = self.sources[iss]
+                if not is_url(source):
+                    self._key_stores[iss] = self._build_key_store(source)
+
+                elif time.monotonic() - self._failures.get(iss, float('-inf')) < self.retry_interval:
+                    return None
+
+                else:
+                    try:
+                        self._key_stores[iss] = self._build_key_store(source)
+
+                    except Exception: # pylint: disable=broad-except
+                        self._failures[iss] = time.monotonic()
+                        return None # tokens stay unverified, matching a key store whose refresh failed
+
+            return self._key_stores[iss]
+
+    def prefetch(self) -> None:
+        '''Build key stores for every issuer, fetching OpenID Connect Providers concurrently'''
+        from jwt_debugger.fetcher import load_key_stores_from_oidc_providers # pylint: disable=import-outside-toplevel
+
+        missing = {iss: source for iss, source in self.sources.items() if iss not in self._key_stores}
+        provider_urls = [x for x in missing.values() if is_url(x)]
+        key_stores = load_key_stores_from_oidc_providers(provider_urls, return_exceptions=True, cache=self.cache) if provider_urls else {}
+
+        with self._lock:
+            for iss, source in missing.items():
+                if not is_url(source):
+                    self._key_stores[iss] = self._build_key_store(source)
+
+                elif isinstance(key_stores[source], KeyStore):
+                    self._key_stores[iss] = key_stores[source]
+
+                # Providers that failed are retried once the retry interval has passed
+                else:
+                    self._failures[iss] = time.monotonic()
+
+    def resolve_key(self, header: Dict, payload: Dict) -> Optional[Union[JWK, JWKSet]]:
+        key_store = self.key_store_for(payload.get('iss'))
+        return None if key_store is None else key_store.resolve_key(header, payload)
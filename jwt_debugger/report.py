@@ -0,0 +1,171 @@
+import time
+from math import log
+from typing import Any
+from typing import Set
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from hashlib import blake2b
+
+from jwt_debugger.decoder import EXIT_INVALID_CLAIMS
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+
+
+class TopK:
+    '''Space-Saving sketch tracking the most frequent values in constant memory
+
+    Counts are exact while there are fewer distinct values than the capacity. Past
+    that the least frequent value is replaced and its count inherited, so counts of
+    frequent values are overestimated by at most the count of the value they replaced.
+    '''
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+
+    def add(self, value: Any) -> None:
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+
+        elif len(counts) < self.capacity:
+            counts[value] = 1
+
+        else:
+            minimum = min(counts, key=counts.get)
+            counts[value] = counts.pop(minimum) + 1
+
+    def most_common(self, n: int = 10) -> List[Tuple[Any, int]]:
+        return sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:n]
+
+
+class HyperLogLog:
+    '''Approximate count of distinct values in constant memory (about 1% error with the default precision)'''
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def __len__(self) -> int:
+        registers = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / registers) * registers * registers / sum(2.0 ** -x for x in self.registers)
+
+        # Small cardinalities are estimated more accurately by linear counting
+        empty_registers = self.registers.count(0)
+        if estimate <= 2.5 * registers and empty_registers:
+            estimate = registers * log(registers / empty_registers)
+
+        return round(estimate)
+
+
+class TokenReport:
+    '''Aggregate decoded tokens into counts instead of printing each one
+
+    Identical tokens are only decoded and counted once by remembering a short digest
+    of each token. Every other statistic is kept in fixed size counters and sketches
+    so that their memory use does not grow with the size of the corpus.
+    '''
+    def __init__(self, top: int = 10, capacity: int = 1000, now: Optional[float] = None):
+        self.top = top
+        self.now = time.time() if now is None else now
+        self.seen: Set[bytes] = set()
+
+        self.tokens = 0
+        self.unique_tokens = 0
+        self.malformed = 0
+        self.verified = 0
+        self.invalid_signatures = 0
+        self.expired = 0
+        self.invalid_claims = 0
+
+        self.issuers = TopK(capacity)
+        self.kids = TopK(capacity)
+        self.algorithms = TopK(capacity)
+        self.subjects = TopK(top * 10) # subjects are usually unique per user so the sketch is kept small
+        self.distinct_subjects = HyperLogLog()
+
+    def deduplicate(self, tokens: Iterable[str]) -> Iterator[str]:
+        '''Pass through tokens that have not been seen before'''
+        for token in tokens:
+            self.tokens += 1
+            digest = blake2b(token.encode(), digest_size=16).digest()
+            if digest not in self.seen:
+                self.seen.add(digest)
+                yield token
+
+    def count(self, tokens: Iterable[str]) -> Iterator[str]:
+        '''Pass through every token without remembering it, for streams that never end'''
+        for token in tokens:
+            self.tokens += 1
+            yield token
+
+    def add(self, record: Dict) -> None:
+        '''Count a record produced by decoding a token in batch mode'''
+        self.unique_tokens += 1
+        if 'error' in record:
+            self.malformed += 1
+            return
+
+        header, payload = record['header'], record['payload']
+        if record['verified'] is True:
+            self.verified += 1
+
+        elif record['verified'] is False:
+            self.invalid_signatures += 1
+
+        if record.get('claims', {}).get('valid') is False:
+            self.invalid_claims += 1
+
+        exp = payload.get('exp')
+        if isinstance(exp, (int, float)) and exp <= self.now:
+            self.expired += 1
+
+        self.issuers.add(str(payload.get('iss')))
+        self.kids.add(str(header.get('kid')))
+        self.algorithms.add(str(header.get('alg')))
+        if payload.get('sub') is not None:
+            subject = str(payload['sub'])
+            self.subjects.add(subject)
+            self.distinct_subjects.add(subject)
+
+    def add_records(self, records: Iterable[Dict]) -> 'TokenReport':
+        for record in records:
+            self.add(record)
+        return self
+
+    @property
+    def exit_code(self) -> int:
+        if self.malformed or self.invalid_signatures:
+            return EXIT_INVALID_SIGNATURE
+        if self.invalid_claims:
+            return EXIT_INVALID_CLAIMS
+        return 0
+
+    def summary(self) -> Dict:
+        decoded = self.unique_tokens - self.malformed
+        checked = self.verified + self.invalid_signatures
+        return {
+            'tokens': self.tokens,
+            'unique_tokens': self.unique_tokens,
+            'duplicate_tokens': self.tokens - self.unique_tokens,
+            'malformed_tokens': self.malformed,
+            'invalid_signatures': self.invalid_signatures,
+            'signature_failure_rate': self.invalid_signatures / checked if checked else None,
+            'expired_tokens': self.expired,
+            'expired_rate': self.expired / decoded if decoded else None,
+            'invalid_claims': self.invalid_claims,
+            'distinct_subjects': len(self.distinct_subjects),
+            'iss': self.issuers.most_common(self.top),
+            'kid': self.kids.most_common(self.top),
+            'alg': self.algorithms.most_common(self.top),
+            'sub': self.subjects.most_common(self.top),
+        }
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+from typing import Dict
+from typing import Tuple
+from typing import Union
+from typing import Optional
+from hashlib import blake2b
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from collections import OrderedDict
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWKSet
+
+
+def key_thumbprint(key: Union[JWK, JWKSet]) -> str:
+    '''RFC 7638 thumbprint of a key or a combined thumbprint for every key in a set'''
+    if isinstance(key, JWKSet):
+        return ','.join(sorted(x.thumbprint() for x in key['keys']))
+    return key.thumbprint()
+
+
+class VerificationCache:
+    '''Bounded LRU cache of signature verification results
+
+    Entries are keyed by a digest of the token and the thumbprint of the key that
+    verified it so that repeated tokens skip the signature check. Only the result is
+    stored since the header and payload are cheap to decode again. Entries never
+    outlive the exp claim of their token and can optionally be persisted to disk.
+    '''
+    def __init__(self, max_entries: int = 100000, path: Optional[Union[str, Path]] = None):
+        self.max_entries = max_entries
+        self.path = None if path is None else Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._entries: 'OrderedDict[bytes, Tuple[bool, Optional[float]]]' = OrderedDict()
+        self._thumbprints: Dict[int, Tuple[Union[JWK, JWKSet], str]] = {}
+
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_thumbprints'] = {} # remembered keys may hold public key objects that can not be pickled
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _thumbprint(self, key: Union[JWK, JWKSet]) -> str:
+        # Keys are not hashable so thumbprints are remembered by identity while holding
+        # a reference to the key which guarantees the identity is not reused
+        cached = self._thumbprints.get(id(key))
+        if cached is None or cached[0] is not key:
+            if len(self._thumbprints) >= 1024: # key sets built per token should not pile up
+                self._thumbprints.clear()
+            cached = (key, key_thumbprint(key))
+            self._thumbprints[id(key)] = cached
+        return cached[1]
+
+    def _digest(self, token: str, key: Union[JWK, JWKSet]) -> bytes:
+        digest = blake2b(token.encode(), digest_size=16)
+        digest.update(b'\0')
+        digest.update(self._thumbprint(key).encode())
+        return digest.digest()
+
+    def get(self, token: str, key: Union[JWK, JWKSet]) -> Optional[bool]:
+        digest = self._digest(token, key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._entries[digest]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, key: Union[JWK, JWKSet], verified: bool, payload: Dict) -> None:
+        expires = payload.get('exp')
+        if not isinstance(expires, (int, float)):
+            expires = None
+
+        elif expires <= time.time():
+            return
+
+        digest = self._digest(token, key)
+        with self._lock:
+            self._entries[digest] = (verified, expires)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def load(self) -> None:
+        with self.path.open() as f:
+            entries = json.load(f)
+
+        now = time.time()
+        with self._lock:
+            for digest, verified, expires in entries[-self.max_entries:]:
+                if expires is None or expires > now:
+                    self._entries[bytes.fromhex(digest)] = (verified, expires)
+
+    def save(self) -> None:
+        now = time.time()
+        with self._lock:
+            entries = [[x.hex(), verified, expires] for x, (verified, expires) in self._entries.items() if expires is None or expires > now]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile('w', dir=self.path.parent, suffix='.tmp', delete=False) as f:
+            json.dump(entries, f)
+
+        os.replace(f.name, self.path)
@@ -0,0 +1,27 @@
+import json
+from typing import Any
+from functools import partial
+
+
+# orjson is an optional dependency (pip install jwt-debugger[fast]) that is several
+# times faster than the standard library when serializing many tokens
+try:
+    import orjson
+
+except ImportError: # pragma: no cover - depends on the environment
+    orjson = None
+
+
+_json_dumps_ = partial(json.dumps, separators=(',', ':'), ensure_ascii=False)
+
+
+def dumps_compact(value: Any) -> bytes:
+    '''Serialize a value as compact single line UTF-8 encoded JSON'''
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+
+        except TypeError:
+            pass # e.g. integers larger than 64 bits which the standard library handles
+
+    return _json_dumps_(value).encode()
@@ -0,0 +1,65 @@
+import os
+import json
+import stat
+from typing import Union
+from typing import Optional
+from typing import TYPE_CHECKING
+from socketserver import StreamRequestHandler
+from socketserver import ThreadingUnixStreamServer
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWKSet
+
+from jwt_debugger.batch import decode_token_as_record
+from jwt_debugger.client import request_decode
+from jwt_debugger.keystore import KeyStore
+from jwt_debugger.registry import IssuerRegistry
+from jwt_debugger.results import VerificationCache
+from jwt_debugger.serialize import dumps_compact
+
+
+# The decrypter is only imported by the serve command when a private key is given
+if TYPE_CHECKING:
+    from jwt_debugger.decrypter import Decrypter
+
+
+class DecodeRequestHandler(StreamRequestHandler):
+    '''Answer newline-delimited JSON decode requests until the client disconnects'''
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                token = json.loads(line).get('token', '')
+            except (ValueError, AttributeError):
+                record = {'error': 'Request must be a JSON object containing a token.'}
+            else:
+                record = decode_token_as_record(token, self.server.public_key, self.server.verification_cache, decrypter=self.server.decrypter)
+
+            self.wfile.write(dumps_compact(record) + b'\n')
+            self.wfile.flush()
+
+
+class DecodeServer(ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, public_key: Optional[Union[JWK, JWKSet, KeyStore, IssuerRegistry]] = None, verification_cache: Optional[VerificationCache] = None, decrypter: Optional['Decrypter'] = None):
+        self.public_key = public_key
+        self.verification_cache = verification_cache
+        self.decrypter = decrypter
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise OSError(f'Path({socket_path}) exists and is not a socket.')
+
+            # Only remove stale sockets so that a running server is never hijacked
+            try:
+                request_decode(socket_path, '')
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise OSError(f'Server is already listening on Socket({socket_path}).')
+
+        super().__init__(socket_path, DecodeRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
@@ -0,0 +1,177 @@
+import os
+import json
+from math import ceil
+from time import perf_counter
+from array import array
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Union
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from pathlib import Path
+from functools import wraps
+from tempfile import NamedTemporaryFile
+from contextlib import contextmanager
+
+
+# Stages in the order they run when decoding a token, decode spans decrypt (which spans key_unwrap), parse, claims and signature
+STAGES = ('discovery', 'jwks_fetch', 'key_parse', 'decode', 'decrypt', 'key_unwrap', 'parse', 'claims', 'signature', 'render')
+PERCENTILES = (50, 95, 99)
+TIMINGS_FORMATS = ('json', 'prometheus')
+
+# Instrumented functions record into this timer while one is active and only pay for a global lookup otherwise
+_active_timer: Optional['StageTimer'] = None
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    '''Record how long calls to a function take as a stage of the active timer'''
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            timer = _active_timer
+            if timer is None:
+                return function(*args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+
+            finally:
+                timer.record(stage, perf_counter() - start)
+
+        return wrapper
+    return decorator
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    '''Nearest-rank percentile of sorted samples'''
+    return samples[max(0, ceil(percentile / 100 * len(samples)) - 1)]
+
+
+class StageTimer:
+    '''Durations of instrumented stages collected while the timer is active
+
+    Every call is kept (as a compact array of doubles) so that batch runs can report
+    exact latency percentiles. Worker processes drain their samples after each token
+    and the parent extends its own timer with them.
+    '''
+    def __init__(self):
+        self.samples: Dict[str, array] = {}
+        self.started = perf_counter()
+        self.stopped: Optional[float] = None
+        self._previous_timer: Optional['StageTimer'] = None
+
+    def __enter__(self) -> 'StageTimer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> 'StageTimer':
+        '''Make this the timer that instrumented functions record into'''
+        global _active_timer # pylint: disable=global-statement
+        self._previous_timer, _active_timer = _active_timer, self
+        return self
+
+    def stop(self) -> None:
+        global _active_timer # pylint: disable=global-statement
+        _active_timer, self._previous_timer = self._previous_timer, None
+        self.stopped = perf_counter()
+
+    def record(self, stage: str, seconds: float) -> None:
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = array('d')
+        samples.append(seconds)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+
+        finally:
+            self.record(stage, perf_counter() - start)
+
+    def drain(self) -> Dict[str, List[float]]:
+        '''Remove and return the samples recorded so far'''
+        samples, self.samples = self.samples, {}
+        return {stage: x.tolist() for stage, x in samples.items()}
+
+    def extend(self, samples: Dict[str, Iterable[float]]) -> None:
+        for stage, seconds in samples.items():
+            if stage not in self.samples:
+                self.samples[stage] = array('d')
+            self.samples[stage].extend(seconds)
+
+    @property
+    def elapsed(self) -> float:
+        return (perf_counter() if self.stopped is None else self.stopped) - self.started
+
+    def summary(self) -> Dict:
+        stages = {}
+        for stage in sorted(self.samples, key=lambda x: (STAGES.index(x) if x in STAGES else len(STAGES), x)):
+            samples = sorted(self.samples[stage])
+            total = sum(samples)
+            stages[stage] = {
+                'count': len(samples),
+                'total': total,
+                'mean': total / len(samples),
+                **{f'p{x}': _percentile(samples, x) for x in PERCENTILES},
+                'max': samples[-1],
+            }
+
+        elapsed = self.elapsed
+        tokens = len(self.samples.get('decode', ()))
+        return {
+            'elapsed': elapsed,
+            'tokens': tokens,
+            'tokens_per_second': tokens / elapsed if elapsed else None,
+            'stages': stages,
+        }
+
+
+def _format_prometheus_value(value: Any) -> str:
+    return 'NaN' if value is None else repr(float(value))
+
+
+def format_prometheus(summary: Dict) -> str:
+    '''Format a timer summary in the Prometheus text exposition format'''
+    lines = [
+        '# HELP jwt_debugger_stage_seconds Time spent in each stage of decoding tokens.',
+        '# TYPE jwt_debugger_stage_seconds summary',
+    ]
+    for stage, stage_summary in summary['stages'].items():
+        for percentile in PERCENTILES:
+            lines.append(f'jwt_debugger_stage_seconds{{stage="{stage}",quantile="{percentile / 100}"}} {_format_prometheus_value(stage_summary[f"p{percentile}"])}')
+        lines.append(f'jwt_debugger_stage_seconds_sum{{stage="{stage}"}} {_format_prometheus_value(stage_summary["total"])}')
+        lines.append(f'jwt_debugger_stage_seconds_count{{stage="{stage}"}} {stage_summary["count"]}')
+
+    lines.extend([
+        '# HELP jwt_debugger_tokens_total Tokens decoded.',
+        '# TYPE jwt_debugger_tokens_total counter',
+        f'jwt_debugger_tokens_total {summary["tokens"]}',
+        '# HELP jwt_debugger_tokens_per_second Tokens decoded per second of elapsed time.',
+        '# TYPE jwt_debugger_tokens_per_second gauge',
+        f'jwt_debugger_tokens_per_second {_format_prometheus_value(summary["tokens_per_second"])}',
+        '# HELP jwt_debugger_elapsed_seconds Elapsed time of the run.',
+        '# TYPE jwt_debugger_elapsed_seconds gauge',
+        f'jwt_debugger_elapsed_seconds {_format_prometheus_value(summary["elapsed"])}',
+    ])
+    return '\n'.join(lines) + '\n'
+
+
+def write_timings(summary: Dict, path: Union[str, Path], timings_format: str = 'json') -> None:
+    '''Write a timer summary as JSON or Prometheus text, replacing the file atomically so collectors never read a partial file'''
+    if timings_format not in TIMINGS_FORMATS:
+        raise ValueError(f'Timings format must be one of ({", ".join(TIMINGS_FORMATS)}).')
+
+    path = Path(path)
+    content = json.dumps(summary, indent=4) + '\n' if timings_format == 'json' else format_prometheus(summary)
+    with NamedTemporaryFile('w', dir=path.parent, suffix='.tmp', delete=False) as f:
+        f.write(content)
+
+    os.replace(f.name, path)
@@ -0,0 +1,186 @@
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import List
+from typing import Union
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from pathlib import Path
+from functools import partial
+from threading import Lock
+from itertools import islice
+
+from jwt_debugger.decoder import DecodedToken
+from jwt_debugger.decoder import decode_token
+
+
+# jwcrypto, requests and asyncio are only imported by the methods that need them so
+# that importing the package stays cheap for the cli
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from jwcrypto.jwk import JWK
+    from jwcrypto.jwk import JWKSet
+    from requests import Session
+
+    from jwt_debugger.cache import HTTPCache
+    from jwt_debugger.claims import ClaimValidator
+    from jwt_debugger.compact import CompactDecodedToken
+    from jwt_debugger.decrypter import Decrypter
+    from jwt_debugger.keystore import KeyStore
+    from jwt_debugger.registry import IssuerRegistry
+    from jwt_debugger.results import VerificationCache
+
+
+class Verifier:
+    '''Decode and verify tokens with keys that are loaded once
+
+    A verifier is built from a JSON Web Key, a JSON Web Key Set, a shared secret, a
+    keyring, an issuer mapping or an OpenID Connect Provider and keeps the parsed keys
+    (and the HTTP session used to refresh them) for its lifetime. It is safe to share
+    between threads, e.g. across the workers of a web server.
+
+        verifier = Verifier.from_oidc_provider('https://accounts.google.com')
+        decoded_token = verifier.verify(token)
+        if decoded_token.verified and decoded_token.claims_valid is not False:
+            ...
+
+    Malformed tokens raise MalformedToken, while invalid signatures and claims are
+    reported on the returned DecodedToken. Encrypted tokens (JWE) are decrypted with
+    the private keys of a Decrypter when one is given.
+    '''
+    def __init__(self, public_key: Optional[Union['JWK', 'JWKSet', 'KeyStore', 'IssuerRegistry']] = None, claim_validator: Optional['ClaimValidator'] = None, verification_cache: Optional['VerificationCache'] = None, session: Optional['Session'] = None, max_workers: Optional[int] = None, decrypter: Optional['Decrypter'] = None):
+        self.public_key = public_key
+        self.claim_validator = claim_validator
+        self.verification_cache = verification_cache
+        self.decrypter = decrypter
+        self.max_workers = max_workers
+        self._session = session
+        self._executor: Optional['ThreadPoolExecutor'] = None
+        self._executor_lock = Lock()
+
+    @classmethod
+    def from_key_file(cls, path: Union[str, Path], **kwargs) -> 'Verifier':
+        '''Verify with a JSON Web Key or JSON Web Key Set in JSON or PEM format'''
+        from jwt_debugger.keystore import KeyStore
+        from jwt_debugger.decoder import load_jwks_from_path
+
+        return cls(KeyStore(partial(load_jwks_from_path, path), min_refresh_interval=float('inf')), **kwargs)
+
+    @classmethod
+    def from_jwks(cls, jwks: Union[Dict, 'JWK', 'JWKSet'], **kwargs) -> 'Verifier':
+        '''Verify with a JSON Web Key Set document or jwcrypto keys'''
+        from jwcrypto.jwk import JWK # pylint: disable=redefined-outer-name
+        from jwcrypto.jwk import JWKSet # pylint: disable=redefined-outer-name
+
+        from jwt_debugger.keystore import KeyStore
+
+        if isinstance(jwks, (JWK, JWKSet)):
+            return cls(KeyStore.from_jwk(jwks), **kwargs)
+
+        document = jwks if 'keys' in jwks else {'keys': [jwks]}
+        return cls(KeyStore(partial(dict, document), min_refresh_interval=float('inf')), **kwargs)
+
+    @classmethod
+    def from_secret(cls, secret: str, **kwargs) -> 'Verifier':
+        '''Verify HMAC signatures with a shared secret'''
+        from jwt_debugger.decoder import load_jwk_from_secret
+
+        return cls(load_jwk_from_secret(secret), **kwargs)
+
+    @classmethod
+    def from_keyring(cls, path: Union[str, Path], **kwargs) -> 'Verifier':
+        '''Verify with keys prepared by the keyring command'''
+        from jwt_debugger.keyring import read_keyring
+        from jwt_debugger.keystore import KeyStore
+
+        return cls(KeyStore.from_prepared_keys(read_keyring(path)), **kwargs)
+
+    @classmethod
+    def from_issuers(cls, path: Union[str, Path], cache: Optional['HTTPCache'] = None, **kwargs) -> 'Verifier':
+        '''Verify with keys chosen by the iss claim from an issuer mapping file'''
+        from jwt_debugger.registry import IssuerRegistry
+
+        registry = IssuerRegistry.from_file(path, cache=cache)
+        registry.prefetch()
+        return cls(registry, **kwargs)
+
+    @classmethod
+    def from_oidc_provider(cls, provider_url: str, cache: Optional['HTTPCache'] = None, session: Optional['Session'] = None, **kwargs) -> 'Verifier':
+        '''Verify with the JSON Web Key Set of an OpenID Connect Provider which is refreshed when keys rotate'''
+        import requests
+
+        from jwt_debugger.keystore import KeyStore
+        from jwt_debugger.decoder import load_jwks_from_oidc_url
+        from jwt_debugger.decoder import resolve_jwks_uri_from_oidc_provider
+
+        session = requests.Session() if session is None else session
+        jwks_uri = resolve_jwks_uri_from_oidc_provider(provider_url, cache=cache, session=session)
+        key_store = KeyStore(partial(load_jwks_from_oidc_url, jwks_uri, cache=cache, session=session))
+        return cls(key_store, session=session, **kwargs)
+
+    def __enter__(self) -> 'Verifier':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+        if self._session is not None:
+            self._session.close()
+
+    def verify(self, token: str) -> DecodedToken:
+        return decode_token(token, self.public_key, self.verification_cache, self.claim_validator, self.decrypter)
+
+    def _verify_all(self, tokens: List[str], return_exceptions: bool, compact: bool, claims: Optional[Iterable[str]]) -> List[Union[DecodedToken, 'CompactDecodedToken', Exception]]:
+        return list(self.verify_many(tokens, return_exceptions=return_exceptions, compact=compact, claims=claims))
+
+    def verify_many(self, tokens: Iterable[str], return_exceptions: bool = False, compact: bool = False, claims: Optional[Iterable[str]] = None) -> Iterator[Union[DecodedToken, 'CompactDecodedToken', Exception]]:
+        '''Lazily verify tokens, yielding decoding errors in place of their tokens when return_exceptions is set
+
+        With compact set, results are yielded as CompactDecodedToken (projected onto
+        claims when given) for callers that keep many of them.
+        '''
+        from jwcrypto.common import JWException
+
+        claims = None if claims is None else tuple(claims)
+        for token in tokens:
+            try:
+                decoded_token = self.verify(token)
+                yield decoded_token.compact(claims) if compact else decoded_token
+
+            except (JWException, ValueError) as e:
+                if not return_exceptions:
+                    raise
+                yield e
+
+    def _get_executor(self) -> 'ThreadPoolExecutor':
+        with self._executor_lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor # pylint: disable=redefined-outer-name
+
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='jwt-debugger')
+            return self._executor
+
+    async def averify_many(self, tokens: Iterable[str], return_exceptions: bool = False, chunk_size: int = 64, compact: bool = False, claims: Optional[Iterable[str]] = None) -> List[Union[DecodedToken, 'CompactDecodedToken', Exception]]:
+        '''Verify tokens on a thread pool without blocking the event loop, returning results in input order
+
+        Every result is held until all tokens are verified, so with compact set they are
+        compacted (and projected onto claims) on the thread pool as each chunk finishes.
+        '''
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        claims = None if claims is None else tuple(claims)
+        tokens = iter(tokens)
+        chunks = iter(lambda: list(islice(tokens, chunk_size)), [])
+        results = await asyncio.gather(*(loop.run_in_executor(executor, self._verify_all, x, return_exceptions, compact, claims) for x in chunks))
+        return [x for chunk in results for x in chunk]
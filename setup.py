@@ -20,8 +20,12 @@ setup(
         'click>=7.1.2',
         'rich>=9.0.1',
         'requests>=2.24.0',
-        'jwcrypto>=0.8',
+        'jwcrypto>=1.2,<2', # keyring restores keys through jwcrypto's key cache
     ],
+    extras_require={
+        'fast': ['orjson>=3.0.0'],
+        'columnar': ['pyarrow>=8.0.0'],
+    },
     entry_points={
         'console_scripts': [
             'jwt-debugger=jwt_debugger:cli'
@@ -6,6 +6,7 @@ from pathlib import Path
 
 from jwcrypto.jwk import JWK
 from jwcrypto.jwk import JWKSet
+from jwcrypto.jwt import JWT
 
 from jwt_debugger.decoder import DecodedToken
 
@@ -36,6 +37,14 @@ def load_public_key(example: Union[int, str], key_format: str = None) -> JWK:
         return JWK.from_pem(example_key_content)
 
 
+def get_private_key_path(example: Union[int, str]) -> Path:
+    return Path('.') / 'tests' / 'examples' / f'private_key-example_{example}.json'
+
+
+def load_private_key(example: Union[int, str]) -> JWK:
+    return JWK(**json.loads(get_private_key_path(example).read_text()))
+
+
 def get_public_keyset_path(example: Union[int, str]) -> Path:
     return Path('.') / 'tests' / 'examples' / f'public_keyset-example_{example}.json'
 
@@ -68,3 +77,13 @@ def load_decoded_token(example: Union[int, str], verified: Optional[bool] = None
         payload=token_as_json.get('payload', {}),
         verified=verified
     )
+
+
+def create_signed_token(private_key: JWK, claims: Dict, algorithm: str = 'RS256', kid: Optional[str] = None) -> str:
+    header = {'typ': 'JWT', 'alg': algorithm}
+    if kid is not None:
+        header['kid'] = kid
+
+    jwt = JWT(header=header, claims=claims)
+    jwt.make_signed_token(private_key)
+    return jwt.serialize()
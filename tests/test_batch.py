@@ -0,0 +1,94 @@
+import json
+from io import BytesIO
+from io import StringIO
+from unittest import TestCase
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import load_decoded_token_as_json
+from jwt_debugger.batch import read_tokens
+from jwt_debugger.batch import decode_tokens
+from jwt_debugger.batch import write_records
+from jwt_debugger.batch import decode_token_as_record
+from jwt_debugger.batch import decode_tokens_in_parallel
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+from jwt_debugger.timings import StageTimer
+
+
+class TestBatch(TestCase):
+    def test_read_tokens_skips_blank_lines(self):
+        stream = StringIO('first\n\n  second  \n\n')
+        self.assertEqual(list(read_tokens(stream)), ['first', 'second'])
+
+    def test_decode_token_as_record(self):
+        token = load_encoded_token('rsa256')
+        public_key = load_public_key('rsa256')
+        expect = load_decoded_token_as_json('rsa256')
+
+        record = decode_token_as_record(token, public_key)
+        self.assertEqual(record['header'], expect['header'])
+        self.assertEqual(record['payload'], expect['payload'])
+        self.assertTrue(record['verified'])
+
+    def test_decode_malformed_token_as_record(self):
+        record = decode_token_as_record('MALFORMED-TOKEN')
+        self.assertEqual(record['token'], 'MALFORMED-TOKEN')
+        self.assertIn('error', record)
+
+    def test_write_records(self):
+        public_key = load_public_key('rsa256')
+        tokens = [
+            load_encoded_token('rsa256'),
+            load_encoded_token('rsa256_with_invalid_signature'),
+        ]
+
+        stream = BytesIO()
+        exit_code = write_records(decode_tokens(tokens, public_key), stream)
+        lines = stream.getvalue().splitlines()
+
+        self.assertEqual(exit_code, EXIT_INVALID_SIGNATURE)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual([json.loads(x)['verified'] for x in lines], [True, False])
+
+    def test_decode_tokens_in_parallel_preserves_order(self):
+        public_key = load_public_key('rsa256')
+        valid_token = load_encoded_token('rsa256')
+        invalid_token = load_encoded_token('rsa256_with_invalid_signature')
+        tokens = [valid_token, invalid_token] * 50
+
+        records = list(decode_tokens_in_parallel(tokens, public_key, workers=2, chunk_size=4))
+        self.assertEqual([x['verified'] for x in records], [True, False] * 50)
+
+    def test_decode_tokens_in_parallel_reads_input_lazily(self):
+        token = load_encoded_token('rsa256')
+        read = []
+
+        def tokens():
+            while True:
+                read.append(token)
+                yield token
+
+        records = decode_tokens_in_parallel(tokens(), load_public_key('rsa256'), workers=2, chunk_size=4)
+        self.assertTrue(all(next(records)['verified'] for _ in range(100)))
+        records.close()
+
+        # At most workers * chunk_size * 4 tokens are in flight ahead of the records handed out
+        self.assertLessEqual(len(read), 100 + 2 * 4 * 4 + 1)
+
+    def test_decode_tokens_in_parallel_unordered(self):
+        public_key = load_public_key('rsa256')
+        tokens = [load_encoded_token('rsa256')] * 20
+
+        records = list(decode_tokens_in_parallel(tokens, public_key, workers=2, ordered=False, chunk_size=4))
+        self.assertEqual(len(records), 20)
+        self.assertTrue(all(x['verified'] for x in records))
+
+    def test_decode_tokens_in_parallel_collects_worker_timings(self):
+        public_key = load_public_key('rsa256')
+        tokens = [load_encoded_token('rsa256')] * 20
+
+        timer = StageTimer()
+        records = list(decode_tokens_in_parallel(tokens, public_key, workers=2, chunk_size=4, timer=timer))
+        self.assertEqual(len(records), 20)
+        self.assertEqual(len(timer.samples['decode']), 20)
+        self.assertEqual(len(timer.samples['signature']), 20)
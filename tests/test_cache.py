@@ -0,0 +1,123 @@
+import json
+import socket
+from pathlib import Path
+from threading import Thread
+from unittest import TestCase
+from http.server import HTTPServer
+from http.server import BaseHTTPRequestHandler
+from tempfile import TemporaryDirectory
+
+import requests
+
+from tests.helpers import get_public_keyset_path
+from jwt_debugger.cache import HTTPCache
+from jwt_debugger.cache import OfflineCacheMiss
+from jwt_debugger.cache import parse_cache_control
+from jwt_debugger.decoder import load_jwkset_from_oidc_url
+from jwt_debugger.decoder import resolve_jwks_uri_from_oidc_provider
+
+
+class StubOIDCProviderHandler(BaseHTTPRequestHandler):
+    requests = []
+    max_age = 0
+    etag = '"v1"'
+
+    def do_GET(self): # pylint: disable=invalid-name
+        self.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/.well-known/openid-configuration':
+            host, port = self.server.server_address
+            body = json.dumps({'jwks_uri': f'http://{host}:{port}/jwks'})
+        else:
+            body = get_public_keyset_path('rsa256').read_text()
+
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('Cache-Control', f'max-age={self.max_age}')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Cache-Control', f'public, max-age={self.max_age}')
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args): # pylint: disable=arguments-differ
+        pass
+
+
+class TestHTTPCache(TestCase):
+    def setUp(self):
+        StubOIDCProviderHandler.requests = []
+        StubOIDCProviderHandler.max_age = 0
+
+        self.server = HTTPServer(('127.0.0.1', 0), StubOIDCProviderHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.provider_url = f'http://{host}:{port}'
+
+        self.cache_directory = TemporaryDirectory() # pylint: disable=consider-using-with
+        self.cache_path = Path(self.cache_directory.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache_directory.cleanup()
+
+    def test_parse_cache_control(self):
+        self.assertEqual(
+            parse_cache_control('public, max-age=3600, no-cache'),
+            {'max_age': 3600, 'no_store': False, 'no_cache': True}
+        )
+        self.assertEqual(parse_cache_control(None), {'max_age': 0, 'no_store': False, 'no_cache': False})
+
+    def test_fresh_entries_are_served_from_cache(self):
+        StubOIDCProviderHandler.max_age = 3600
+        for _ in range(3):
+            cache = HTTPCache(self.cache_path)
+            jwks_uri = resolve_jwks_uri_from_oidc_provider(self.provider_url, cache=cache)
+            key_set = load_jwkset_from_oidc_url(jwks_uri, cache=cache)
+            self.assertIsNotNone(key_set.get_key('1'))
+
+        self.assertEqual(len(StubOIDCProviderHandler.requests), 2)
+
+    def test_stale_entries_are_revalidated(self):
+        for _ in range(2):
+            resolve_jwks_uri_from_oidc_provider(self.provider_url, cache=HTTPCache(self.cache_path))
+
+        self.assertEqual(
+            StubOIDCProviderHandler.requests,
+            [('/.well-known/openid-configuration', None), ('/.well-known/openid-configuration', '"v1"')]
+        )
+
+    def test_refresh_ignores_cache(self):
+        StubOIDCProviderHandler.max_age = 3600
+        resolve_jwks_uri_from_oidc_provider(self.provider_url, cache=HTTPCache(self.cache_path))
+        resolve_jwks_uri_from_oidc_provider(self.provider_url, cache=HTTPCache(self.cache_path, refresh=True))
+
+        self.assertEqual(StubOIDCProviderHandler.requests[-1], ('/.well-known/openid-configuration', None))
+        self.assertEqual(len(StubOIDCProviderHandler.requests), 2)
+
+    def test_offline(self):
+        with self.assertRaises(OfflineCacheMiss):
+            resolve_jwks_uri_from_oidc_provider(self.provider_url, cache=HTTPCache(self.cache_path, offline=True))
+
+        jwks_uri = resolve_jwks_uri_from_oidc_provider(self.provider_url, cache=HTTPCache(self.cache_path))
+        self.server.shutdown()
+
+        offline_jwks_uri = resolve_jwks_uri_from_oidc_provider(self.provider_url, cache=HTTPCache(self.cache_path, offline=True))
+        self.assertEqual(offline_jwks_uri, jwks_uri)
+
+    def test_unresponsive_provider_times_out(self):
+        # Connections are accepted by the listen backlog but never answered
+        with socket.socket() as listener:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            host, port = listener.getsockname()
+
+            with self.assertRaises(requests.Timeout):
+                resolve_jwks_uri_from_oidc_provider(f'http://{host}:{port}', cache=HTTPCache(self.cache_path, timeout=0.1))
+
+            with self.assertRaises(requests.Timeout):
+                resolve_jwks_uri_from_oidc_provider(f'http://{host}:{port}', timeout=0.1)
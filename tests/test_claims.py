@@ -0,0 +1,106 @@
+import json
+import pickle
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from jwt_debugger.claims import ClaimValidator
+from jwt_debugger.claims import InvalidClaimPolicy
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.decoder import EXIT_INVALID_CLAIMS
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+
+
+NOW = 1700000000
+
+
+class TestClaimValidator(TestCase):
+    def test_expired_token(self):
+        validator = ClaimValidator()
+        self.assertEqual(validator.validate({'exp': NOW + 1}, NOW), [])
+        self.assertEqual(validator.validate({'exp': NOW}, NOW), ['Claim(exp) token expired at 2023-11-14T22:13:20+00:00.'])
+
+    def test_leeway(self):
+        validator = ClaimValidator(leeway=60)
+        self.assertEqual(validator.validate({'exp': NOW - 30, 'nbf': NOW + 30}, NOW), [])
+        self.assertEqual(len(validator.validate({'exp': NOW - 90, 'nbf': NOW + 90}, NOW)), 2)
+
+    def test_non_numeric_dates(self):
+        errors = ClaimValidator().validate({'exp': 'tomorrow', 'nbf': None}, NOW)
+        self.assertEqual(errors, ['Claim(exp) is not a numeric date.'])
+
+    def test_out_of_range_dates(self):
+        errors = ClaimValidator().validate({'exp': -1e20, 'nbf': 1e20}, NOW)
+        self.assertEqual(errors, ['Claim(exp) token expired at -1e+20.', 'Claim(nbf) token is not valid before 1e+20.'])
+
+    def test_disabled_time_checks(self):
+        validator = ClaimValidator(verify_exp=False, verify_nbf=False)
+        self.assertEqual(validator.validate({'exp': NOW - 1, 'nbf': NOW + 1}, NOW), [])
+
+    def test_issuer(self):
+        validator = ClaimValidator(issuers=['https://issuer.example.com'])
+        self.assertEqual(validator.validate({'iss': 'https://issuer.example.com'}, NOW), [])
+        self.assertEqual(validator.validate({'iss': 'https://evil.example.com'}, NOW), ['Claim(iss) "https://evil.example.com" is not an expected issuer.'])
+        self.assertEqual(len(validator.validate({}, NOW)), 1)
+        self.assertEqual(validator.validate({'iss': ['https://issuer.example.com']}, NOW), ['Claim(iss) ["https://issuer.example.com"] is not an expected issuer.'])
+
+    def test_audience(self):
+        validator = ClaimValidator(audiences=['api'])
+        self.assertEqual(validator.validate({'aud': 'api'}, NOW), [])
+        self.assertEqual(validator.validate({'aud': ['web', 'api']}, NOW), [])
+        self.assertEqual(len(validator.validate({'aud': ['web']}, NOW)), 1)
+        self.assertEqual(len(validator.validate({'aud': {'api': True}}, NOW)), 1)
+
+    def test_required_claims(self):
+        validator = ClaimValidator(required=['sub', 'email', 'sub'])
+        self.assertEqual(validator.validate({'sub': '1', 'email': 'marty@example.com'}, NOW), [])
+        self.assertEqual(validator.validate({'sub': '1'}, NOW), ['Claim(email) is required.'])
+
+    def test_claim_rules(self):
+        validator = ClaimValidator.from_policy({
+            'claims': {
+                'email_verified': {'equals': True},
+                'tenant': {'one_of': ['ozark', 'chicago']},
+                'scope': {'contains': 'read'},
+                'email': {'pattern': r'.+@example\.com'},
+            }
+        })
+        payload = {'email_verified': True, 'tenant': 'ozark', 'scope': 'read write', 'email': 'marty@example.com'}
+        self.assertEqual(validator.validate(payload, NOW), [])
+
+        payload = {'email_verified': False, 'tenant': 'kansas', 'scope': ['write'], 'email': 'marty@example.org'}
+        self.assertEqual(len(validator.validate(payload, NOW)), 4)
+        self.assertEqual(validator.validate({}, NOW)[0], 'Claim(email_verified) is required.')
+
+    def test_invalid_policies(self):
+        for policy in ([], {'claims': {'sub': {}}}, {'claims': {'sub': {'matches': 'x'}}}, {'claims': {'sub': {'pattern': '('}}}, {'claims': {'tenant': {'one_of': 'ozark'}}}):
+            with self.assertRaises(InvalidClaimPolicy):
+                ClaimValidator.from_policy(policy)
+
+    def test_from_file_with_overrides(self):
+        with TemporaryDirectory() as directory:
+            policy_path = Path(directory) / 'policy.json'
+            policy_path.write_text(json.dumps({'iss': 'https://issuer.example.com', 'leeway': 5}))
+
+            validator = ClaimValidator.from_file(policy_path, issuers=('https://other.example.com',), leeway=10)
+            self.assertEqual(validator.issuers, {'https://issuer.example.com', 'https://other.example.com'})
+            self.assertEqual(validator.leeway, 10)
+
+    def test_can_be_pickled(self):
+        validator = pickle.loads(pickle.dumps(ClaimValidator(required=['sub'], rules={'email': {'pattern': '.+'}})))
+        self.assertEqual(validator.validate({}, NOW), ['Claim(sub) is required.', 'Claim(email) is required.'])
+
+    def test_decode_token_with_claim_validator(self):
+        token = load_encoded_token('rsa256')
+        decoded_token = decode_token(token, load_public_key('rsa256'), claim_validator=ClaimValidator(required=['email']))
+        self.assertFalse(decoded_token.claims_valid)
+        self.assertEqual(decoded_token.exit_code, EXIT_INVALID_CLAIMS)
+
+        decoded_token = decode_token(load_encoded_token('rsa256_with_invalid_signature'), load_public_key('rsa256'), claim_validator=ClaimValidator(required=['email']))
+        self.assertEqual(decoded_token.exit_code, EXIT_INVALID_SIGNATURE)
+
+        decoded_token = decode_token(token)
+        self.assertIsNone(decoded_token.claims_valid)
+        self.assertEqual(decoded_token.exit_code, 0)
@@ -1,5 +1,8 @@
 import json
+import time
 from json import JSONDecodeError
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from functools import partial
 from unittest.mock import patch
@@ -11,8 +14,13 @@ from tests.helpers import load_public_key
 from tests.helpers import load_encoded_token
 from tests.helpers import load_public_keyset
 from tests.helpers import get_public_key_path
+from tests.helpers import get_private_key_path
+from tests.helpers import get_public_keyset_path
+from tests.helpers import create_signed_token
 from tests.helpers import load_decoded_token_as_json
 from jwt_debugger.command import cli
+from jwt_debugger.decoder import EXIT_INVALID_CLAIMS
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
 
 
 OIDC_PROVIDER_URL = 'https://accounts.google.com/.well-known/openid-configuration'
@@ -34,6 +42,16 @@ class TestCLI(TestCase):
         )
         self.assertEqual(UsageError.exit_code, result.exit_code)
 
+    def test_help_lists_commands(self):
+        result = self.invoke_cli(['--help'])
+        self.assertEqual(0, result.exit_code)
+        for command in ('decode', 'serve', 'keyring', 'find-key', 'mock-idp'):
+            self.assertIn(command, result.output)
+
+        result = self.invoke_cli(['decode', '--help'])
+        self.assertEqual(0, result.exit_code)
+        self.assertIn('--public-key', result.output)
+
     def test_malformed_token(self):
         result = self.invoke_cli('MALFORMED-TOKEN')
         self.assertIn(
@@ -53,13 +71,72 @@ class TestCLI(TestCase):
             self.assertIn('Signature Verified', result.output)
             self.assertEqual(0, result.exit_code)
 
+    def test_decode_token_with_public_key_of_each_key_type(self):
+        for example in ('es256', 'eddsa', 'hs256'):
+            result = self.invoke_cli(['--public-key', get_public_key_path(example), '--format', 'raw', load_encoded_token(example)])
+            self.assertEqual(json.loads(result.output)['header']['alg'], load_decoded_token_as_json(example)['header']['alg'])
+            self.assertEqual(0, result.exit_code)
+
+    def test_decode_token_with_secret(self):
+        token = load_encoded_token('hs256')
+
+        result = self.invoke_cli(['--secret', 'a-string-secret-at-least-256-bits-long', token])
+        self.assertIn('Signature Verified', result.output)
+        self.assertEqual(0, result.exit_code)
+
+        result = self.invoke_cli([token], env={'JWT_DEBUGGER_SECRET': 'a-different-secret-at-least-256-bits'})
+        self.assertEqual(EXIT_INVALID_SIGNATURE, result.exit_code)
+
+        result = self.invoke_cli(['--secret', 'secret', '--public-key', get_public_key_path('hs256'), token])
+        self.assertIn('Error: The following options can not be used together (--secret, --public-key, --oidc-provider-url, --keyring, --issuers).', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_decode_encrypted_token_with_private_key(self):
+        token = load_encoded_token('rsa256_encrypted')
+        private_key_path = get_private_key_path('rsa_oaep')
+
+        result = self.invoke_cli(['--private-key', private_key_path, '--public-key', get_public_key_path('rsa256'), token])
+        self.assertIn('Encryption Header', result.output)
+        self.assertIn('Signature Verified', result.output)
+        self.assertEqual(0, result.exit_code)
+
+        result = self.invoke_cli(['--private-key', private_key_path, '--format', 'raw', load_encoded_token('encrypted_claims')])
+        self.assertEqual(json.loads(result.output)['payload'], load_decoded_token_as_json('rsa256')['payload'])
+        self.assertEqual(0, result.exit_code)
+
+        result = self.invoke_cli(['--private-key', get_public_key_path('rsa256'), token])
+        self.assertIn('Error: Private key could not be loaded (JSON Web Key has no private or symmetric key material).', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_decode_encrypted_token_without_private_key(self):
+        result = self.invoke_cli([load_encoded_token('rsa256_encrypted')])
+        self.assertIn('Error: Token is encrypted (JWE) and can only be decoded with a private key.', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_find_key(self):
+        examples_path = str(Path('.') / 'tests' / 'examples')
+        with TemporaryDirectory() as directory:
+            env = {'XDG_CACHE_HOME': directory}
+
+            result = self.invoke_cli(['find-key', '--format', 'json', examples_path, load_encoded_token('rsa256_kid_2')], env=env)
+            self.assertEqual([(x['path'], x['kid']) for x in json.loads(result.output)['matches']], [('public_keyset-example_rsa256.json', '2')])
+            self.assertEqual(0, result.exit_code)
+
+            result = self.invoke_cli(['find-key', examples_path], input=load_encoded_token('rsa256_with_invalid_signature'), env=env)
+            self.assertIn('No Key Verified the Signature', result.output)
+            self.assertEqual(EXIT_INVALID_SIGNATURE, result.exit_code)
+
+            result = self.invoke_cli(['find-key', '--no-cache', examples_path, 'MALFORMED-TOKEN'], env=env)
+            self.assertIn('Error: Token must consist of a header, payload, and signature all separated by periods.', result.output)
+            self.assertEqual(UsageError.exit_code, result.exit_code)
+
     def test_decode_token_with_oidc_provider_url(self):
         token = load_encoded_token('rsa256_kid_2')
-        public_key = load_public_keyset('rsa256')
+        public_keys = load_public_keyset('rsa256').export(as_dict=True)
 
-        with patch('jwt_debugger.command.load_jwkset_from_oidc_url', return_value=public_key) as load_jwkset_from_oidc_url_mock:
+        with patch('jwt_debugger.command.load_jwks_from_oidc_url', return_value=public_keys) as load_jwks_from_oidc_url_mock:
             result = self.invoke_cli(['--oidc-provider-url', OIDC_PROVIDER_URL, token])
-            load_jwkset_from_oidc_url_mock.assert_called_once()
+            load_jwks_from_oidc_url_mock.assert_called_once()
             self.assertIn('"kid": "2"', result.output)
             self.assertIn('Signature Verified', result.output)
             self.assertEqual(0, result.exit_code)
@@ -114,3 +191,200 @@ class TestCLI(TestCase):
             self.assertIn('Decoded Token', result.output)
             self.assertIn('Signature Verified', result.output)
             self.assertEqual(0, result.exit_code)
+
+    def test_decode_token_with_format_as_pretty_in_full(self):
+        token = load_encoded_token('rsa256')
+        for args in (['--format', 'pretty', token], ['--format', 'pretty', '--full', token]):
+            result = self.invoke_cli(args)
+            self.assertIn('Decoded Token', result.output)
+            self.assertNotIn('--full', result.output)
+            self.assertEqual(0, result.exit_code)
+
+    def test_decode_tokens_in_batch(self):
+        tokens = '\n'.join([load_encoded_token('rsa256'), load_encoded_token('rsa256')])
+        public_key = load_public_key('rsa256')
+        public_key_path = get_public_key_path('rsa256')
+
+        with patch('jwt_debugger.command.load_jwk_from_file', return_value=public_key) as load_jwk_from_file_mock:
+            result = self.invoke_cli(['--public-key', public_key_path, '--batch'], input=tokens)
+            load_jwk_from_file_mock.assert_called_once()
+
+            records = [json.loads(x) for x in result.output.splitlines()]
+            self.assertEqual(len(records), 2)
+            self.assertTrue(all(x['verified'] for x in records))
+            self.assertEqual(0, result.exit_code)
+
+    def test_decode_token_with_result_cache_file(self):
+        token = load_encoded_token('rsa256')
+        public_key_path = get_public_key_path('rsa256')
+
+        with TemporaryDirectory() as directory:
+            result_cache_path = Path(directory) / 'results.json'
+            for _ in range(2):
+                result = self.invoke_cli(['--public-key', public_key_path, '--result-cache-file', result_cache_path, '--format', 'json', token])
+                self.assertEqual(0, result.exit_code)
+
+            self.assertEqual(len(json.loads(result_cache_path.read_text())), 1)
+
+    def test_decode_token_with_profile_file(self):
+        token = load_encoded_token('rsa256')
+        public_key_path = get_public_key_path('rsa256')
+
+        with TemporaryDirectory() as directory:
+            profile_path = Path(directory) / 'timings.json'
+            result = self.invoke_cli(['--public-key', public_key_path, '--profile-file', profile_path, '--format', 'json', token])
+            self.assertEqual(0, result.exit_code)
+
+            timings = json.loads(profile_path.read_text())
+            self.assertEqual(timings['tokens'], 1)
+            self.assertEqual(list(timings['stages']), ['key_parse', 'decode', 'parse', 'signature', 'render'])
+
+    def test_decode_token_with_keyring(self):
+        token = load_encoded_token('rsa256_kid_2')
+        with TemporaryDirectory() as directory:
+            keyring_path = Path(directory) / 'keys.jwtkr'
+            result = self.invoke_cli(['keyring', '--output', keyring_path, str(get_public_keyset_path('rsa256'))])
+            self.assertEqual(0, result.exit_code)
+
+            result = self.invoke_cli(['--keyring', keyring_path, '--format', 'json', token])
+            self.assertEqual(0, result.exit_code)
+
+    def test_keyring_and_public_key(self):
+        token = load_encoded_token('rsa256')
+        public_key_path = get_public_key_path('rsa256')
+
+        result = self.invoke_cli(['--keyring', public_key_path, '--public-key', public_key_path, token])
+        self.assertIn('Error: The following options can not be used together (--keyring, --public-key, --oidc-provider-url).', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_decode_token_with_invalid_claims(self):
+        token = load_encoded_token('rsa256')
+        result = self.invoke_cli(['--require-claim', 'email', '--expected-issuer', 'https://issuer.example.com', token])
+        self.assertIn('Invalid Claims', result.output)
+        self.assertIn('Claim(email) is required.', result.output)
+        self.assertEqual(EXIT_INVALID_CLAIMS, result.exit_code)
+
+        result = self.invoke_cli(['--require-claim', 'sub', '--format', 'json', token])
+        self.assertEqual(json.loads(result.output)['claims'], {'valid': True, 'errors': []})
+        self.assertEqual(0, result.exit_code)
+
+    def test_decode_tokens_in_batch_with_invalid_claims(self):
+        tokens = '\n'.join([load_encoded_token('rsa256'), load_encoded_token('rsa256')])
+        result = self.invoke_cli(['--batch', '--require-claim', 'email'], input=tokens)
+
+        records = [json.loads(x) for x in result.output.splitlines()]
+        self.assertEqual([x['claims']['valid'] for x in records], [False, False])
+        self.assertEqual(EXIT_INVALID_CLAIMS, result.exit_code)
+
+    def test_decode_expired_token_with_public_key(self):
+        token = create_signed_token(load_public_key('hs256'), {'sub': 'faux-subject', 'exp': int(time.time()) - 3600}, algorithm='HS256')
+        public_key_path = get_public_key_path('hs256')
+
+        # Expired tokens still have a valid signature and are only rejected when claims are validated
+        result = self.invoke_cli(['--public-key', public_key_path, token])
+        self.assertIn('Signature Verified', result.output)
+        self.assertEqual(0, result.exit_code)
+
+        result = self.invoke_cli(['--public-key', public_key_path, '--validate-claims', token])
+        self.assertIn('Signature Verified', result.output)
+        self.assertIn('Invalid Claims', result.output)
+        self.assertEqual(EXIT_INVALID_CLAIMS, result.exit_code)
+
+    def test_decode_expired_tokens_in_batch_with_public_key(self):
+        tokens = '\n'.join([
+            create_signed_token(load_public_key('hs256'), {'sub': 'faux-subject', 'exp': int(time.time()) - 3600}, algorithm='HS256'),
+            load_encoded_token('hs256'),
+        ])
+        for workers in ('1', '2'):
+            result = self.invoke_cli(['--batch', '--workers', workers, '--public-key', get_public_key_path('hs256'), '--validate-claims'], input=tokens)
+            records = [json.loads(x) for x in result.output.splitlines()]
+            self.assertEqual([x.get('error') for x in records], [None, None])
+            self.assertEqual([x['verified'] for x in records], [True, True])
+            self.assertEqual([x['claims']['valid'] for x in records], [False, True])
+            self.assertEqual(EXIT_INVALID_CLAIMS, result.exit_code)
+
+    def test_decode_token_with_invalid_claims_policy(self):
+        token = load_encoded_token('rsa256')
+        result = self.invoke_cli(['--claims-policy', get_public_key_path('rsa256', 'pem'), token])
+        self.assertIn('is not valid JSON', result.output)
+        self.assertEqual(1, result.exit_code)
+
+    def test_extract_tokens_from_standard_input(self):
+        token = load_encoded_token('rsa256')
+        log = f'GET /callback?id_token={token} HTTP/1.1\nAuthorization: Bearer {token}\nnothing to see here\n'
+        result = self.invoke_cli(['--extract'], input=log)
+
+        records = [json.loads(x) for x in result.output.splitlines()]
+        self.assertEqual([x['payload']['sub'] for x in records], ['1234567890', '1234567890'])
+        self.assertEqual(0, result.exit_code)
+
+    def test_extract_tokens_from_missing_file(self):
+        result = self.invoke_cli(['--extract', 'does-not-exist.log'])
+        self.assertIn('Error: Path(does-not-exist.log) does not exist or is not a file.', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_decode_tokens_in_batch_as_report(self):
+        tokens = '\n'.join([load_encoded_token('rsa256'), load_encoded_token('rsa256'), load_encoded_token('rsa256_with_invalid_signature')])
+        public_key_path = get_public_key_path('rsa256')
+
+        result = self.invoke_cli(['--public-key', public_key_path, '--batch', '--report', '--format', 'json'], input=tokens)
+        summary = json.loads(result.output)
+        self.assertEqual((summary['tokens'], summary['unique_tokens'], summary['invalid_signatures']), (3, 2, 1))
+        self.assertEqual(1, result.exit_code)
+
+        result = self.invoke_cli(['--public-key', public_key_path, '--batch', '--report'], input=tokens)
+        self.assertIn('Token Report', result.output)
+        self.assertIn('Invalid Signatures', result.output)
+
+    def test_decode_tokens_in_batch_with_non_object_claims(self):
+        # The payload of the second token is the JSON array [1,2]
+        tokens = '\n'.join([load_encoded_token('rsa256'), 'e30.WzEsMl0.signature'])
+        for options in (['--validate-claims'], ['--report', '--format', 'json']):
+            result = self.invoke_cli(['--batch', *options], input=tokens)
+            self.assertIsInstance(result.exception, SystemExit)
+            self.assertEqual(1, result.exit_code)
+
+        result = self.invoke_cli(['--batch', '--validate-claims'], input=tokens)
+        records = [json.loads(x) for x in result.output.splitlines()]
+        self.assertEqual(records[1]['error'], 'Token header and payload must be JSON objects.')
+
+    def test_decode_token_as_raw_json(self):
+        token = load_encoded_token('rsa256')
+        expect = load_decoded_token_as_json('rsa256')
+
+        result = self.invoke_cli(['--format', 'raw', token])
+        self.assertEqual(len(result.output.splitlines()), 1)
+        self.assertEqual(json.loads(result.output), expect)
+        self.assertEqual(0, result.exit_code)
+
+    def test_decode_tokens_in_batch_with_token_argument(self):
+        token = load_encoded_token('rsa256')
+        result = self.invoke_cli(['--batch', token])
+        self.assertIn('Error: Tokens are read from standard input when using --batch.', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_follow_with_token_argument(self):
+        token = load_encoded_token('rsa256')
+        result = self.invoke_cli(['--follow', str(get_public_key_path('rsa256')), token])
+        self.assertIn('Error: The following options can not be used together (--follow, --batch, --extract, --connect, TOKEN).', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_decode_tokens_in_batch_as_csv(self):
+        tokens = '\n'.join([load_encoded_token('rsa256'), load_encoded_token('rsa256_with_invalid_signature')])
+        result = self.invoke_cli(['--batch', '--export', 'csv', '--column', 'verified', '--column', 'header.alg', '--public-key', get_public_key_path('rsa256')], input=tokens)
+        self.assertEqual(result.output.splitlines(), ['verified,header.alg', 'true,RS256', 'false,RS256'])
+        self.assertEqual(EXIT_INVALID_SIGNATURE, result.exit_code)
+
+        result = self.invoke_cli(['--batch', '--export', 'csv', '--column', 'sub'], input=tokens)
+        self.assertIn('Error: Column(sub) must be one of (verified, claims_valid, claim_errors, error) or a field such as header.alg or payload.sub.', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+        result = self.invoke_cli(['--batch', '--column', 'verified'], input=tokens)
+        self.assertIn('Error: The following options can only be used with --export (--output, --column).', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
+
+    def test_workers_without_batch(self):
+        token = load_encoded_token('rsa256')
+        result = self.invoke_cli(['--workers', '2', token])
+        self.assertIn('Error: The following options can only be used with --batch or --extract (--workers, --unordered, --report, --export).', result.output)
+        self.assertEqual(UsageError.exit_code, result.exit_code)
@@ -0,0 +1,74 @@
+import pickle
+from unittest import TestCase
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import load_decoded_token_as_json
+from jwt_debugger.batch import decode_token_as_record
+from jwt_debugger.claims import ClaimValidator
+from jwt_debugger.compact import CompactDecodedToken
+from jwt_debugger.decoder import DecodedToken
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.decoder import EXIT_INVALID_CLAIMS
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+
+
+class TestCompactDecodedToken(TestCase):
+    def test_compact_keeps_header_and_payload(self):
+        expected = load_decoded_token_as_json('rsa256')
+        compact_token = decode_token(load_encoded_token('rsa256'), load_public_key('rsa256')).compact()
+
+        self.assertFalse(hasattr(compact_token, '__dict__'))
+        self.assertEqual(compact_token.header, expected['header'])
+        self.assertEqual(compact_token.payload, expected['payload'])
+        self.assertTrue(compact_token.verified)
+        self.assertIsNone(compact_token.claims_valid)
+        self.assertEqual(compact_token.exit_code, 0)
+
+    def test_compact_without_segments(self):
+        decoded_token = DecodedToken('faux-token', {'alg': 'none'}, {'sub': '1'}, None)
+        self.assertEqual(decoded_token.compact().payload, {'sub': '1'})
+
+    def test_project_claims(self):
+        compact_token = decode_token(load_encoded_token('rsa256')).compact(claims=['sub', 'missing'])
+        self.assertEqual(compact_token.payload, {'sub': '1234567890'})
+        self.assertEqual(compact_token.project(['iat']).payload, {})
+
+        full_token = decode_token(load_encoded_token('rsa256')).compact()
+        self.assertEqual(full_token.project(['sub']), compact_token)
+        self.assertLess(compact_token.size, full_token.size)
+
+    def test_exit_code(self):
+        invalid_signature = decode_token(load_encoded_token('rsa256_with_invalid_signature'), load_public_key('rsa256')).compact()
+        self.assertEqual(invalid_signature.exit_code, EXIT_INVALID_SIGNATURE)
+
+        invalid_claims = decode_token(load_encoded_token('rsa256'), claim_validator=ClaimValidator(required=['nonce'])).compact()
+        self.assertFalse(invalid_claims.claims_valid)
+        self.assertEqual(invalid_claims.exit_code, EXIT_INVALID_CLAIMS)
+
+    def test_from_record(self):
+        record = decode_token_as_record(load_encoded_token('rsa256'), load_public_key('rsa256'), claim_validator=ClaimValidator())
+        compact_token = CompactDecodedToken.from_record(record, claims=['sub'])
+        self.assertEqual(compact_token.payload, {'sub': '1234567890'})
+        self.assertEqual(compact_token.claim_errors, ())
+
+        with self.assertRaises(ValueError):
+            CompactDecodedToken.from_record(decode_token_as_record('not-a-token'))
+
+    def test_pickle(self):
+        compact_token = decode_token(load_encoded_token('rsa256')).compact()
+        self.assertEqual(pickle.loads(pickle.dumps(compact_token)), compact_token)
+
+    def test_keeps_encryption_header(self):
+        encryption_header = {'alg': 'RSA-OAEP', 'enc': 'A256GCM', 'cty': 'JWT'}
+        decoded_token = DecodedToken('faux-token', {'alg': 'none'}, {'sub': '1'}, None, encryption_header=encryption_header)
+
+        compact_token = decoded_token.compact()
+        self.assertEqual(compact_token.encryption_header, encryption_header)
+        self.assertEqual(compact_token.project(['sub']).encryption_header, encryption_header)
+        self.assertEqual(pickle.loads(pickle.dumps(compact_token)), compact_token)
+        self.assertNotEqual(DecodedToken('faux-token', {'alg': 'none'}, {'sub': '1'}, None).compact(), compact_token)
+
+        record = {'header': {'alg': 'none'}, 'payload': {'sub': '1'}, 'verified': None, 'encryption_header': encryption_header}
+        self.assertEqual(CompactDecodedToken.from_record(record), compact_token)
+        self.assertIsNone(decode_token(load_encoded_token('rsa256')).compact().encryption_header)
@@ -0,0 +1,78 @@
+from io import StringIO
+from unittest import TestCase
+
+from rich.console import Console
+
+from tests.helpers import load_decoded_token
+from jwt_debugger.report import TokenReport
+from jwt_debugger.console import MAX_COLLECTION_ITEMS
+from jwt_debugger.console import MAX_ENCODED_TOKEN_LENGTH
+from jwt_debugger.console import PrettyKeySearch
+from jwt_debugger.console import PrettyDecodedToken
+from jwt_debugger.console import PrettyTokenReport
+from jwt_debugger.console import shorten_json
+
+
+def render(renderable) -> str:
+    console = Console(file=StringIO(), width=120)
+    console.print(renderable)
+    return console.file.getvalue()
+
+
+class TestConsole(TestCase):
+    def test_shorten_json(self):
+        value = {'groups': [f'group-{x}' for x in range(100)], 'blob': 'x' * 1000, 'sub': '1234567890'}
+        shortened, collapsed = shorten_json(value, max_items=3, max_string_length=10)
+
+        self.assertTrue(collapsed)
+        self.assertEqual(shortened['groups'], ['group-0', 'group-1', 'group-2', '... 97 more items'])
+        self.assertEqual(shortened['blob'], 'xxxxxxxxxx... 990 more characters')
+        self.assertEqual(shortened['sub'], '1234567890')
+
+        shortened, collapsed = shorten_json({str(x): x for x in range(5)}, max_items=3)
+        self.assertEqual(shortened, {'0': 0, '1': 1, '2': 2, '...': '2 more keys'})
+        self.assertEqual(shorten_json(value['groups'][:3], max_items=3), (value['groups'][:3], False))
+
+    def test_pretty_decoded_token_shortens_large_tokens(self):
+        decoded_token = load_decoded_token('rsa256')
+        payload = {**decoded_token.payload, 'groups': [f'group-{x:06d}' for x in range(1000)]}
+        token = f'{"h" * 100}.{"p" * 20000}.{"s" * 300}'
+
+        output = render(PrettyDecodedToken(token, decoded_token.header, payload, None))
+        self.assertIn(f'... {1000 - MAX_COLLECTION_ITEMS} more items', output)
+        self.assertIn(f'... {len(token) - MAX_ENCODED_TOKEN_LENGTH} more characters', output)
+        self.assertIn('use --full to show everything', output)
+        self.assertNotIn('group-000999', output)
+
+        output = render(PrettyDecodedToken(token, decoded_token.header, payload, None, full=True))
+        self.assertIn('group-000999', output)
+        self.assertNotIn('more items', output)
+
+    def test_pretty_decoded_token_small_tokens_are_not_shortened(self):
+        decoded_token = load_decoded_token('rsa256')
+        output = render(PrettyDecodedToken('header.payload.signature', decoded_token.header, decoded_token.payload, True))
+        self.assertIn('header.payload.signature', output)
+        self.assertNotIn('--full', output)
+
+    def test_pretty_token_report_does_not_render_markup_from_claims(self):
+        report = TokenReport()
+        report.add({'header': {'alg': 'RS256', 'kid': '[red]kid[/red]'}, 'payload': {'iss': '[bold]issuer', 'sub': '[link=https://example.com]subject[/link]'}, 'verified': None})
+
+        output = render(PrettyTokenReport(report.summary()))
+        self.assertIn('[red]kid[/red]', output)
+        self.assertIn('[bold]issuer', output)
+        self.assertIn('[link=https://example.com]subject[/link]', output)
+
+    def test_pretty_key_search_does_not_render_markup_from_keys(self):
+        result = {
+            'header': {'alg': 'RS256'},
+            'matches': [{'path': 'keys/[bold]key[/bold].json', 'kid': '[red]kid[/red]', 'alg': 'RS256', 'kty': 'RSA', 'thumbprint': 'thumbprint'}],
+            'tried_keys': 1,
+            'indexed_keys': 1,
+            'indexed_files': 1,
+        }
+
+        output = render(PrettyKeySearch(result))
+        self.assertIn('keys/[bold]key[/bold].json', output)
+        self.assertIn('[red]kid[/red]', output)
+        self.assertIn('RSA (RS256)', output)
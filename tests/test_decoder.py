@@ -7,9 +7,15 @@ from parameterized import parameterized
 from tests.helpers import load_public_key
 from tests.helpers import load_decoded_token
 from tests.helpers import load_encoded_token
+from tests.helpers import get_public_key_path
 from jwt_debugger.decoder import PEM_HEADER_PATTERN
 from jwt_debugger.decoder import DecodedToken
+from jwt_debugger.decoder import MalformedToken
+from jwt_debugger.decoder import parse_token
 from jwt_debugger.decoder import decode_token
+from jwt_debugger.decoder import signing_algorithm
+from jwt_debugger.decoder import load_jwk_from_file
+from jwt_debugger.decoder import load_jwk_from_secret
 
 
 class TestPEMRegex(TestCase):
@@ -20,6 +26,28 @@ class TestPEMRegex(TestCase):
         self.assertTrue(match)
 
 
+class TestParseToken(TestCase):
+    def test_parse_token(self):
+        encoded_token = load_encoded_token('rsa256')
+        expect = load_decoded_token('rsa256')
+
+        parsed_token = parse_token(encoded_token)
+        self.assertEqual(parsed_token.segments, tuple(encoded_token.split('.')))
+        self.assertEqual(parsed_token.header, expect.header)
+        self.assertEqual(parsed_token.payload, expect.payload)
+
+    @parameterized.expand([
+        ('MALFORMED-TOKEN',),
+        ('a.b.c.d',),
+        ('not-base64!.e30.signature',),
+        ('WzEsMl0.e30.signature',), # header is [1,2]
+        ('e30.MQ.signature',), # payload is 1
+    ])
+    def test_parse_malformed_token(self, encoded_token: str):
+        with self.assertRaises(MalformedToken):
+            parse_token(encoded_token)
+
+
 class TestDecodeToken(TestCase):
     def assertDecodedTokenEqual(self, first, second): # pylint: disable=invalid-name
         self.assertEqual(first.header, second.header)
@@ -37,6 +65,12 @@ class TestDecodeToken(TestCase):
         self.assertDecodedTokenEqual(decoded_token, expect)
         self.assertIsNone(decoded_token.verified)
 
+    def test_decode_parsed_token(self):
+        parsed_token = parse_token(load_encoded_token('rsa256'))
+        decoded_token = decode_token(parsed_token, load_public_key('rsa256'))
+        self.assertDecodedTokenEqual(decoded_token, load_decoded_token('rsa256', verified=True))
+        self.assertEqual(decoded_token.segments, parsed_token.segments)
+
     @parameterized.expand([
         (
             load_public_key('rsa256'),
@@ -58,3 +92,41 @@ class TestDecodeToken(TestCase):
         decoded_token = decode_token(encoded_token, public_key)
         self.assertDecodedTokenEqual(decoded_token, expect)
         self.assertIsNotNone(decoded_token.verified)
+
+    @parameterized.expand([
+        ('es256', 'rsa256', 'json'),
+        ('es256', 'rsa256', 'pem'),
+        ('eddsa', 'es256', 'json'),
+        ('eddsa', 'es256', 'pem'),
+        ('hs256', 'es256', 'json'),
+    ])
+    def test_decode_with_public_key_of_each_key_type(self, example: str, other_example: str, key_format: str):
+        with get_public_key_path(example, key_format).open() as f:
+            public_key = load_jwk_from_file(f)
+
+        decoded_token = decode_token(load_encoded_token(example), public_key)
+        self.assertDecodedTokenEqual(decoded_token, load_decoded_token(example, verified=True))
+
+        # Keys of another type never verify the token, whatever algorithm it claims
+        decoded_token = decode_token(load_encoded_token(example), load_public_key(other_example))
+        self.assertFalse(decoded_token.verified)
+
+    def test_decode_with_secret(self):
+        encoded_token = load_encoded_token('hs256')
+        self.assertTrue(decode_token(encoded_token, load_jwk_from_secret('a-string-secret-at-least-256-bits-long')).verified)
+        self.assertFalse(decode_token(encoded_token, load_jwk_from_secret('a-different-secret-at-least-256-bits')).verified)
+        self.assertFalse(decode_token(encoded_token, load_jwk_from_secret('short')).verified)
+        self.assertFalse(decode_token(load_encoded_token('rsa256'), load_jwk_from_secret('a-string-secret-at-least-256-bits-long')).verified)
+
+
+class TestSigningAlgorithm(TestCase):
+    @parameterized.expand([
+        ({'kty': 'RSA'}, 'RS256'),
+        ({'kty': 'RSA', 'alg': 'PS384'}, 'PS384'),
+        ({'kty': 'EC', 'crv': 'P-521'}, 'ES512'),
+        ({'kty': 'OKP', 'crv': 'Ed25519'}, 'EdDSA'),
+        ({'kty': 'oct'}, 'HS256'),
+        ({'kty': 'OKP', 'crv': 'X25519'}, None),
+    ])
+    def test_signing_algorithm(self, jwk: dict, expect: str):
+        self.assertEqual(signing_algorithm(jwk), expect)
@@ -0,0 +1,122 @@
+import json
+import pickle
+from io import StringIO
+from unittest import TestCase
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwt import JWT
+
+from tests.helpers import load_public_key
+from tests.helpers import load_private_key
+from tests.helpers import load_encoded_token
+from tests.helpers import load_decoded_token
+from tests.helpers import get_private_key_path
+from jwt_debugger.batch import decode_token_as_record
+from jwt_debugger.batch import decode_tokens_in_parallel
+from jwt_debugger.decoder import MalformedToken
+from jwt_debugger.decoder import DecryptionFailed
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.decrypter import Decrypter
+from jwt_debugger.decrypter import DecryptedToken
+from jwt_debugger.decrypter import load_private_key as load_private_key_from_file
+
+
+def tamper(token: str, segment: int) -> str:
+    segments = token.split('.')
+    segments[segment] = ('A' if segments[segment][0] != 'A' else 'B') + segments[segment][1:]
+    return '.'.join(segments)
+
+
+class TestDecrypter(TestCase):
+    def setUp(self):
+        self.decrypter = Decrypter(load_private_key('rsa_oaep'))
+
+    def test_decode_nested_token(self):
+        expect = load_decoded_token('rsa256', verified=True)
+        decoded_token = decode_token(load_encoded_token('rsa256_encrypted'), load_public_key('rsa256'), decrypter=self.decrypter)
+
+        self.assertEqual(decoded_token.token, load_encoded_token('rsa256'))
+        self.assertEqual((decoded_token.header, decoded_token.payload, decoded_token.verified), (expect.header, expect.payload, True))
+        self.assertEqual(decoded_token.encryption_header['enc'], 'A256GCM')
+        self.assertEqual(decoded_token.encryption_header['cty'], 'JWT')
+
+    def test_decode_encrypted_claims(self):
+        decoded_token = decode_token(load_encoded_token('encrypted_claims'), load_public_key('rsa256'), decrypter=self.decrypter)
+        self.assertEqual(decoded_token.payload, load_decoded_token('rsa256').payload)
+        self.assertEqual(decoded_token.header, decoded_token.encryption_header)
+        self.assertIsNone(decoded_token.verified)
+
+    def test_decode_encrypted_token_without_private_key(self):
+        with self.assertRaises(MalformedToken):
+            decode_token(load_encoded_token('rsa256_encrypted'))
+
+    def test_nested_with_non_string_cty(self):
+        self.assertFalse(DecryptedToken({'cty': ['JWT']}, b'{"sub": "subject"}').nested)
+        self.assertTrue(DecryptedToken({'cty': 1}, load_encoded_token('rsa256').encode()).nested)
+
+    def test_decode_encrypted_token_with_non_object_contents(self):
+        private_key = load_private_key('rsa_oaep')
+        token = JWT(header={'alg': 'RSA-OAEP', 'enc': 'A256GCM', 'cty': ['JWT']}, claims='[1, 2]')
+        token.make_encrypted_token(private_key)
+        with self.assertRaises(MalformedToken):
+            decode_token(token.serialize(), decrypter=self.decrypter)
+
+        segments = load_encoded_token('rsa256_encrypted').split('.')
+        with self.assertRaises(MalformedToken):
+            self.decrypter.decrypt('.'.join(['WzEsMl0'] + segments[1:]))
+
+    def test_decrypt_with_wrong_key(self):
+        decrypter = Decrypter(JWK.generate(kty='RSA', size=2048))
+        with self.assertRaises(DecryptionFailed):
+            decrypter.decrypt(load_encoded_token('rsa256_encrypted'))
+
+    def test_content_encryption_keys_are_reused(self):
+        token = load_encoded_token('rsa256_encrypted')
+        for _ in range(3):
+            self.assertTrue(self.decrypter.decrypt(token).nested)
+        self.assertEqual((self.decrypter.misses, self.decrypter.hits, len(self.decrypter)), (1, 2, 1))
+
+        # Remembered keys still authenticate the content
+        with self.assertRaises(DecryptionFailed):
+            self.decrypter.decrypt(tamper(token, 3))
+        self.assertEqual(self.decrypter.hits, 3)
+
+    def test_content_encryption_keys_with_reused_ephemeral_key(self):
+        private_key = JWK.generate(kty='EC', crv='P-256', kid='ecdh')
+        first = JWT(header={'alg': 'ECDH-ES', 'enc': 'A128GCM', 'kid': 'ecdh'}, claims={'sub': 'first'})
+        first.make_encrypted_token(private_key)
+        first = first.serialize()
+
+        # Reusing the protected header (and its epk) derives the same content encryption key
+        second = JWT(header={'alg': 'ECDH-ES', 'enc': 'A128GCM', 'kid': 'ecdh'}, claims={'sub': 'second'})
+        second.make_encrypted_token(private_key)
+        second = '.'.join(first.split('.')[:2] + second.serialize().split('.')[2:])
+
+        decrypter = Decrypter(private_key)
+        self.assertEqual(json.loads(decrypter.decrypt(first).plaintext), {'sub': 'first'})
+        with self.assertRaises(DecryptionFailed):
+            decrypter.decrypt(second)
+        self.assertEqual(decrypter.hits, 1)
+
+    def test_decrypter_can_be_pickled(self):
+        decrypter = pickle.loads(pickle.dumps(self.decrypter))
+        self.assertTrue(decrypter.decrypt(load_encoded_token('rsa256_encrypted')).nested)
+
+        tokens = [load_encoded_token('rsa256_encrypted'), load_encoded_token('encrypted_claims')] * 3
+        records = list(decode_tokens_in_parallel(tokens, load_public_key('rsa256'), workers=2, chunk_size=2, decrypter=self.decrypter))
+        self.assertEqual([x['verified'] for x in records], [True, None] * 3)
+
+    def test_decode_encrypted_token_as_record(self):
+        record = decode_token_as_record(load_encoded_token('rsa256_encrypted'), load_public_key('rsa256'), decrypter=self.decrypter)
+        self.assertEqual(record['encryption_header']['kid'], 'encryption-1')
+        self.assertTrue(record['verified'])
+
+        record = decode_token_as_record(tamper(load_encoded_token('rsa256_encrypted'), 4), decrypter=self.decrypter)
+        self.assertIn('could not be decrypted', record['error'])
+
+    def test_load_private_key(self):
+        with get_private_key_path('rsa_oaep').open() as f:
+            self.assertTrue(load_private_key_from_file(f).has_private)
+
+        with self.assertRaises(ValueError):
+            load_private_key_from_file(StringIO(json.dumps(load_public_key('rsa256').export_public(as_dict=True))))
@@ -0,0 +1,93 @@
+import csv
+from io import BytesIO
+from io import StringIO
+from unittest import TestCase
+from unittest import skipIf
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from jwt_debugger.batch import decode_tokens
+from jwt_debugger.claims import ClaimValidator
+from jwt_debugger.export import Column
+from jwt_debugger.export import infer_columns
+from jwt_debugger.export import export_records
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+
+except ImportError: # pragma: no cover - depends on the environment
+    pyarrow = None
+
+
+RECORDS = [
+    {'header': {'alg': 'RS256'}, 'payload': {'sub': 'a', 'exp': 1, 'scope': ['read'], 'https://example.com/role': 'admin'}, 'verified': True},
+    {'header': {'alg': 'RS256', 'kid': '2'}, 'payload': {'sub': 'b', 'exp': 2.5}, 'verified': False},
+    {'token': 'MALFORMED-TOKEN', 'error': 'Token must consist of a header, payload, and signature all separated by periods.'},
+]
+
+
+class TestExport(TestCase):
+    def test_infer_columns(self):
+        self.assertEqual(infer_columns(RECORDS), [
+            Column('verified', 'bool'),
+            Column('error', 'string'),
+            Column('header.alg', 'string'),
+            Column('header.kid', 'string'),
+            Column('payload.sub', 'string'),
+            Column('payload.exp', 'float'),
+            Column('payload.scope', 'string'),
+            Column('payload.https://example.com/role', 'string'),
+        ])
+
+        self.assertEqual(infer_columns(RECORDS, ['payload.exp', 'claims_valid']), [Column('payload.exp', 'float'), Column('claims_valid', 'string')])
+        with self.assertRaises(ValueError):
+            infer_columns(RECORDS, ['sub'])
+
+    def test_export_csv(self):
+        stream = BytesIO()
+        summary = export_records(RECORDS, stream, 'csv', ['verified', 'payload.sub', 'payload.scope', 'error'], batch_size=2)
+        self.assertEqual((summary.rows, summary.batches, summary.exit_code), (3, 2, EXIT_INVALID_SIGNATURE))
+        self.assertEqual(list(csv.reader(StringIO(stream.getvalue().decode()))), [
+            ['verified', 'payload.sub', 'payload.scope', 'error'],
+            ['true', 'a', '["read"]', ''],
+            ['false', 'b', '', ''],
+            ['', '', '', RECORDS[2]['error']],
+        ])
+
+    def test_export_decoded_tokens_with_claims(self):
+        tokens = [load_encoded_token('rsa256'), load_encoded_token('rsa256_with_invalid_signature')]
+        records = decode_tokens(tokens, load_public_key('rsa256'), claim_validator=ClaimValidator(required=('nonce',)))
+
+        stream = BytesIO()
+        summary = export_records(records, stream, 'csv')
+        rows = list(csv.DictReader(StringIO(stream.getvalue().decode())))
+        self.assertEqual([(x['verified'], x['claims_valid'], x['header.alg']) for x in rows], [('true', 'false', 'RS256'), ('false', 'false', 'RS256')])
+        self.assertEqual(rows[0]['claim_errors'], '["Claim(nonce) is required."]')
+        self.assertEqual(summary.exit_code, EXIT_INVALID_SIGNATURE)
+
+    @skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_export_parquet_and_arrow(self):
+        for export_format in ('parquet', 'arrow'):
+            stream = BytesIO()
+            summary = export_records(RECORDS, stream, export_format, batch_size=2)
+            self.assertEqual(summary.batches, 2)
+
+            stream.seek(0)
+            table = pyarrow.parquet.read_table(stream) if export_format == 'parquet' else pyarrow.ipc.open_file(stream).read_all()
+            self.assertEqual(str(table.schema.field('verified').type), 'bool')
+            self.assertEqual(str(table.schema.field('payload.exp').type), 'double')
+            self.assertEqual(table.column('payload.exp').to_pylist(), [1.0, 2.5, None])
+            self.assertEqual(table.column('payload.scope').to_pylist(), ['["read"]', None, None])
+
+    @skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_values_outside_of_the_sample_that_do_not_match_are_null(self):
+        records = [{'payload': {'exp': 1}}, {'payload': {'exp': 'tomorrow'}}]
+
+        stream = BytesIO()
+        summary = export_records(records, stream, 'parquet', sample_size=1)
+        self.assertEqual(summary.mismatched_values, 1)
+
+        stream.seek(0)
+        self.assertEqual(pyarrow.parquet.read_table(stream).column('payload.exp').to_pylist(), [1, None])
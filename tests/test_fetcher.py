@@ -0,0 +1,99 @@
+import json
+import asyncio
+from threading import Lock
+from threading import Thread
+from unittest import TestCase
+from http.server import ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
+
+from requests import HTTPError
+
+from tests.helpers import load_encoded_token
+from tests.helpers import get_public_keyset_path
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.fetcher import AsyncKeyFetcher
+from jwt_debugger.fetcher import load_key_stores_from_oidc_providers
+
+
+class StubOIDCProvidersHandler(BaseHTTPRequestHandler):
+    '''Serve a provider per path prefix (e.g. /issuer1) failing the first requests when asked to'''
+    lock = Lock()
+    requests = []
+    failures = 0
+    failure_status = 503
+
+    def do_GET(self): # pylint: disable=invalid-name
+        with self.lock:
+            self.requests.append(self.path)
+            fail = StubOIDCProvidersHandler.failures > 0
+            StubOIDCProvidersHandler.failures -= 1
+
+        if fail:
+            self.send_response(self.failure_status)
+            self.end_headers()
+            return
+
+        provider, _, path = self.path.lstrip('/').partition('/')
+        if path == '.well-known/openid-configuration':
+            host, port = self.server.server_address
+            body = json.dumps({'jwks_uri': f'http://{host}:{port}/{provider}/jwks'})
+        elif path == 'jwks':
+            body = get_public_keyset_path('rsa256').read_text()
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args): # pylint: disable=arguments-differ
+        pass
+
+
+class TestAsyncKeyFetcher(TestCase):
+    def setUp(self):
+        StubOIDCProvidersHandler.requests = []
+        StubOIDCProvidersHandler.failures = 0
+        StubOIDCProvidersHandler.failure_status = 503
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubOIDCProvidersHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.base_url = f'http://{host}:{port}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_load_key_stores(self):
+        provider_urls = [f'{self.base_url}/issuer{x}' for x in range(5)]
+        key_stores = load_key_stores_from_oidc_providers(provider_urls, backoff=0)
+
+        self.assertEqual(list(key_stores), provider_urls)
+        self.assertEqual(len(StubOIDCProvidersHandler.requests), 10)
+        for key_store in key_stores.values():
+            self.assertTrue(decode_token(load_encoded_token('rsa256_kid_2'), key_store).verified)
+
+    def test_retries_transient_failures(self):
+        StubOIDCProvidersHandler.failures = 2
+        key_stores = load_key_stores_from_oidc_providers([f'{self.base_url}/issuer'], backoff=0)
+
+        self.assertEqual(len(key_stores[f'{self.base_url}/issuer']), 2)
+        self.assertEqual(len(StubOIDCProvidersHandler.requests), 4)
+
+    def test_does_not_retry_client_errors(self):
+        provider_url = f'{self.base_url}/issuer/unknown/.well-known/openid-configuration/jwks'
+        key_stores = load_key_stores_from_oidc_providers([provider_url], return_exceptions=True, backoff=0)
+
+        self.assertIsInstance(key_stores[provider_url], HTTPError)
+        self.assertEqual(len(StubOIDCProvidersHandler.requests), 1)
+
+    def test_gives_up_after_retries(self):
+        StubOIDCProvidersHandler.failures = 10
+        with AsyncKeyFetcher(retries=1, backoff=0) as fetcher, self.assertRaises(HTTPError):
+            asyncio.run(fetcher.load_key_stores([f'{self.base_url}/issuer']))
+
+        self.assertEqual(len(StubOIDCProvidersHandler.requests), 2)
@@ -0,0 +1,82 @@
+import os
+import sys
+from io import StringIO
+from pathlib import Path
+from unittest import skipIf
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from rich.console import Console
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from jwt_debugger.batch import decode_token_as_record
+from jwt_debugger.follow import follow_file
+from jwt_debugger.report import TokenReport
+from jwt_debugger.console import LiveTokenReport
+
+
+class TestFollow(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'access.log'
+        self.path.write_bytes(b'existing\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def append(self, data: bytes) -> None:
+        with self.path.open('ab') as f:
+            f.write(data)
+
+    def test_follow_file_only_reads_new_data(self):
+        chunks = follow_file(self.path, poll_interval=0.01)
+        self.append(b'first\n')
+        self.assertEqual(next(chunks), b'first\n')
+
+        self.append(b'second\n')
+        self.assertEqual(next(chunks), b'second\n')
+        chunks.close()
+
+    def test_follow_file_from_start(self):
+        chunks = follow_file(self.path, from_start=True, poll_interval=0.01)
+        self.assertEqual(next(chunks), b'existing\n')
+        chunks.close()
+
+    @skipIf(sys.platform == 'win32', 'Windows does not allow renaming a file that the follower still has open')
+    def test_follow_file_across_rotation(self):
+        chunks = follow_file(self.path, poll_interval=0.01)
+        self.append(b'before\n')
+        self.assertEqual(next(chunks), b'before\n')
+
+        self.append(b'last line of old file\n')
+        os.rename(self.path, self.path.with_suffix('.log.1'))
+        self.path.write_bytes(b'first line of new file\n')
+
+        self.assertEqual(next(chunks), b'last line of old file\n')
+        self.assertEqual(next(chunks), b'first line of new file\n')
+        chunks.close()
+
+    def test_follow_file_after_truncation(self):
+        chunks = follow_file(self.path, poll_interval=0.01)
+        self.append(b'before truncation\n')
+        self.assertEqual(next(chunks), b'before truncation\n')
+
+        self.path.write_bytes(b'after\n')
+        self.assertEqual(next(chunks), b'after\n')
+        chunks.close()
+
+    def test_live_token_report(self):
+        token_report = TokenReport()
+        live_report = LiveTokenReport(token_report, 'access.log')
+        tokens = [load_encoded_token('rsa256'), load_encoded_token('rsa256_with_invalid_signature')]
+        for token in token_report.count(tokens):
+            token_report.add(decode_token_as_record(token, load_public_key('rsa256')))
+
+        console = Console(file=StringIO(), width=120)
+        console.print(live_report)
+        output = console.file.getvalue()
+        self.assertIn('Following access.log', output)
+        self.assertIn('Failures/s', output)
+        self.assertEqual(token_report.summary()['tokens'], 2)
+        self.assertEqual(token_report.summary()['invalid_signatures'], 1)
@@ -4,6 +4,7 @@ from unittest.mock import patch
 
 from parameterized import parameterized
 
+from jwt_debugger.decoder import HTTP_TIMEOUT
 from jwt_debugger.decoder import resolve_jwks_uri_from_oidc_provider
 
 
@@ -30,7 +31,7 @@ class TestOIDCProvider(TestCase):
     def test_jwks_from_provider_url(self, provider_url: str, configuration_url: str):
         with patch('requests.get', return_value=self._mock_configuration_response) as mock_requests_get:
             jwks_uri = resolve_jwks_uri_from_oidc_provider(provider_url)
-            mock_requests_get.assert_called_with(configuration_url)
+            mock_requests_get.assert_called_with(configuration_url, timeout=HTTP_TIMEOUT)
             self.assertEqual(jwks_uri, self._faux_jwks_uri)
 
     def test_configuration_does_not_include_jwks_uri(self):
@@ -0,0 +1,108 @@
+import os
+import json
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from jwcrypto.jwk import JWK
+from jwcrypto.jwt import JWT
+
+from tests.helpers import load_encoded_token
+from tests.helpers import get_public_key_path
+from tests.helpers import get_public_keyset_path
+from jwt_debugger.keyindex import KeyIndex
+from jwt_debugger.keyindex import is_compatible_key
+from jwt_debugger.keyindex import find_signing_keys
+
+
+class TestKeyIndex(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.keys_path = Path(self.directory.name) / 'keys'
+        self.index_path = Path(self.directory.name) / 'index.json'
+        shutil.copytree(Path('.') / 'tests' / 'examples', self.keys_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_find_signing_keys(self):
+        key_index = KeyIndex.load(self.keys_path, self.index_path)
+        for example, paths in (
+            ('rsa256', ['public_key-example_rsa256.json']),
+            ('rsa256_kid_2', ['public_keyset-example_rsa256.json']),
+            ('es256', ['public_key-example_es256.json', 'public_key-example_es256.pem']),
+            ('eddsa', ['public_key-example_eddsa.json', 'public_key-example_eddsa.pem']),
+            ('hs256', ['public_key-example_hs256.json']),
+            ('rsa256_with_invalid_signature', []),
+        ):
+            result = find_signing_keys(load_encoded_token(example), key_index, workers=2)
+            self.assertEqual([x['path'] for x in result['matches']], paths, example)
+
+    def test_candidates_are_narrowed_by_header(self):
+        key_index = KeyIndex.load(self.keys_path, self.index_path)
+
+        # Keys with the token's kid (and keys without one) are tried before other RSA keys
+        first, second = key_index.candidates({'alg': 'RS256', 'kid': '2'})
+        self.assertEqual([(x['path'], x['kid']) for x in first], [
+            ('public_key-example_rsa256.json', None),
+            ('public_key-example_rsa256_with_invalid_modulus.json', None),
+            ('public_keyset-example_rsa256.json', '2'),
+        ])
+        self.assertEqual([x['kid'] for x in second], ['1'])
+
+        embedded_key = json.loads(get_public_key_path('es256').read_text())
+        (keys,) = key_index.candidates({'alg': 'ES256', 'jwk': embedded_key})
+        self.assertEqual([x['path'] for x in keys], ['public_key-example_es256.json', 'public_key-example_es256.pem'])
+
+        result = find_signing_keys(load_encoded_token('rsa256_kid_2'), key_index)
+        self.assertEqual(result['tried_keys'], 3)
+
+    def test_is_compatible_key(self):
+        key = {'kty': 'EC', 'crv': 'P-256', 'alg': None}
+        self.assertTrue(is_compatible_key(key, 'ES256'))
+        self.assertFalse(is_compatible_key(key, 'ES384'))
+        self.assertFalse(is_compatible_key(key, 'RS256'))
+        self.assertFalse(is_compatible_key(key, 'none'))
+        self.assertFalse(is_compatible_key(key, ['ES256']))
+        self.assertFalse(is_compatible_key(key, {'alg': 'ES256'}))
+        self.assertFalse(is_compatible_key({'kty': 'RSA', 'crv': None, 'alg': 'RS256'}, 'PS256'))
+        self.assertTrue(is_compatible_key({'kty': 'RSA', 'crv': None, 'alg': None}, 'PS256'))
+
+    def test_index_is_refreshed_by_modification_time(self):
+        key_index = KeyIndex.load(self.keys_path, self.index_path)
+        self.assertEqual((key_index.indexed_files, key_index.reused_files), (len(key_index.files), 0))
+
+        with patch('jwt_debugger.keyindex._index_key_file') as index_key_file_mock:
+            key_index = KeyIndex.load(self.keys_path, self.index_path)
+            index_key_file_mock.assert_not_called()
+        self.assertEqual((key_index.indexed_files, key_index.reused_files), (0, len(key_index.files)))
+
+        # Rotating a key into a nested directory only reads the new file
+        key = JWK.generate(kty='RSA', size=2048, kid='rotated')
+        (self.keys_path / 'rotated').mkdir()
+        (self.keys_path / 'rotated' / 'key.json').write_text(key.export_public())
+        (self.keys_path / 'public_key-example_hs256.json').unlink()
+
+        key_index = KeyIndex.load(self.keys_path, self.index_path)
+        self.assertEqual(key_index.indexed_files, 1)
+        self.assertNotIn('public_key-example_hs256.json', key_index.files)
+
+        token = JWT(header={'alg': 'RS256', 'kid': 'rotated'}, claims={'sub': 'rotated'})
+        token.make_signed_token(key)
+        result = find_signing_keys(token.serialize(), key_index)
+        self.assertEqual(result['matches'], [{'path': 'rotated/key.json', 'kid': 'rotated', 'alg': None, 'kty': 'RSA', 'thumbprint': key.thumbprint()}])
+
+        # Replacing a key file in place is picked up by its modification time
+        path = self.keys_path / 'public_key-example_rsa256.json'
+        path.write_text(get_public_keyset_path('rsa256').read_text())
+        os.utime(path, ns=(0, 0))
+        key_index = KeyIndex.load(self.keys_path, self.index_path)
+        self.assertEqual(key_index.indexed_files, 1)
+        self.assertEqual(len(key_index.files['public_key-example_rsa256.json']['keys']), 2)
+
+    def test_index_does_not_keep_secrets(self):
+        KeyIndex.load(self.keys_path, self.index_path)
+        secret = json.loads(get_public_key_path('hs256').read_text())['k']
+        self.assertNotIn(secret, self.index_path.read_text())
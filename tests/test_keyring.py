@@ -0,0 +1,75 @@
+import pickle
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from jwcrypto.jwk import JWK
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import load_public_keyset
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.keyring import InvalidKeyring
+from jwt_debugger.keyring import KEYRING_MAGIC
+from jwt_debugger.keyring import prepare_key
+from jwt_debugger.keyring import read_keyring
+from jwt_debugger.keyring import write_keyring
+from jwt_debugger.keystore import KeyStore
+
+
+class TestKeyring(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.keyring_path = Path(self.directory.name) / 'keys.jwtkr'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_prepare_key_loads_public_key(self):
+        public_key = prepare_key(load_public_key('rsa256'))
+        self.assertIsNotNone(public_key._cache_pub_k) # pylint: disable=protected-access
+
+    def test_write_and_read_keyring(self):
+        public_keys = load_public_keyset('rsa256')
+        write_keyring(public_keys, self.keyring_path)
+
+        keys = read_keyring(self.keyring_path)
+        self.assertEqual(sorted(x.thumbprint() for x in keys), sorted(x.thumbprint() for x in public_keys['keys']))
+
+        key_store = KeyStore.from_prepared_keys(keys)
+        self.assertIs(key_store.get_key('2'), next(x for x in keys if x.get('kid') == '2'))
+        self.assertTrue(decode_token(load_encoded_token('rsa256_kid_2'), key_store).verified)
+
+    def test_read_keyring_matches_jwcrypto_keys(self):
+        # read_keyring bypasses the JWK constructor and fills in jwcrypto's cached public key,
+        # so this fails when a jwcrypto release changes either of them
+        public_key = load_public_key('rsa256')
+        write_keyring(public_key, self.keyring_path)
+
+        (key,) = read_keyring(self.keyring_path)
+        self.assertEqual(key, JWK(**public_key.export_public(as_dict=True)))
+        self.assertEqual(key.export_public(as_dict=True), public_key.export_public(as_dict=True))
+        self.assertIs(key.get_op_key('verify'), key._cache_pub_k) # pylint: disable=protected-access
+        self.assertEqual(key.get_op_key('verify').public_numbers(), public_key.get_op_key('verify').public_numbers())
+
+    def test_keyring_with_invalid_signature(self):
+        write_keyring(load_public_key('rsa256'), self.keyring_path)
+        key_store = KeyStore.from_prepared_keys(read_keyring(self.keyring_path))
+        self.assertFalse(decode_token(load_encoded_token('rsa256_with_invalid_signature'), key_store).verified)
+
+    def test_prepared_key_store_can_be_pickled(self):
+        write_keyring(load_public_key('rsa256'), self.keyring_path)
+        key_store = KeyStore.from_prepared_keys(read_keyring(self.keyring_path))
+        key_store = pickle.loads(pickle.dumps(key_store))
+        self.assertTrue(decode_token(load_encoded_token('rsa256'), key_store).verified)
+
+    def test_read_invalid_keyring(self):
+        self.keyring_path.write_text('{"keys": []}')
+        with self.assertRaises(InvalidKeyring):
+            read_keyring(self.keyring_path)
+
+    def test_read_truncated_keyring(self):
+        write_keyring(load_public_key('rsa256'), self.keyring_path)
+        self.keyring_path.write_bytes(self.keyring_path.read_bytes()[:len(KEYRING_MAGIC) + 16])
+        with self.assertRaises(InvalidKeyring):
+            read_keyring(self.keyring_path)
@@ -0,0 +1,70 @@
+import pickle
+from unittest import TestCase
+from unittest.mock import Mock
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import load_public_keyset
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.keystore import KeyStore
+
+
+class TestKeyStore(TestCase):
+    def setUp(self):
+        self.public_keys = load_public_keyset('rsa256').export(as_dict=True)
+
+    def test_get_key_by_kid(self):
+        key_store = KeyStore(Mock(return_value=self.public_keys))
+        self.assertEqual(key_store.get_key('2').get('kid'), '2')
+        self.assertIs(key_store.get_key('2'), key_store.get_key('2'))
+
+    def test_get_key_with_non_string_header_values(self):
+        load_keys = Mock(return_value=self.public_keys)
+        key_store = KeyStore(load_keys)
+        self.assertIsNone(key_store.get_key(['2']))
+        self.assertIsNone(key_store.get_key(alg={'alg': 'RS256'}))
+        self.assertEqual(load_keys.call_count, 1)
+
+    def test_get_key_by_alg(self):
+        key_store = KeyStore(Mock(return_value=self.public_keys))
+        self.assertEqual(len(key_store.get_key(alg='RS256')['keys']), 2)
+        self.assertIsNone(key_store.get_key(alg='ES256'))
+
+    def test_unknown_kid_refreshes_once(self):
+        first_keys = [x for x in self.public_keys['keys'] if x['kid'] == '1']
+        load_keys = Mock(side_effect=[{'keys': first_keys}, self.public_keys])
+        key_store = KeyStore(load_keys, min_refresh_interval=0)
+
+        self.assertEqual(key_store.get_key('2').get('kid'), '2')
+        self.assertEqual(load_keys.call_count, 2)
+
+    def test_failed_refresh_is_rate_limited(self):
+        first_keys = [x for x in self.public_keys['keys'] if x['kid'] == '1']
+        load_keys = Mock(side_effect=[{'keys': first_keys}, ConnectionError('unreachable'), self.public_keys])
+        key_store = KeyStore(load_keys, min_refresh_interval=60)
+        key_store._last_refresh -= 60 # pylint: disable=protected-access
+
+        self.assertIsNone(key_store.get_key('2'))
+        self.assertIsNone(key_store.get_key('2'))
+        self.assertEqual(load_keys.call_count, 2)
+        self.assertFalse(decode_token(load_encoded_token('rsa256_kid_2'), key_store).verified)
+
+    def test_unknown_kid_refresh_is_rate_limited(self):
+        load_keys = Mock(return_value=self.public_keys)
+        key_store = KeyStore(load_keys, min_refresh_interval=60)
+
+        self.assertIsNone(key_store.get_key('3'))
+        self.assertIsNone(key_store.get_key('3'))
+        self.assertEqual(load_keys.call_count, 1)
+
+    def test_decode_token(self):
+        key_store = KeyStore(Mock(return_value=self.public_keys))
+        self.assertTrue(decode_token(load_encoded_token('rsa256_kid_2'), key_store).verified)
+
+    def test_decode_token_without_matching_key(self):
+        key_store = KeyStore(Mock(return_value={'keys': []}))
+        self.assertFalse(decode_token(load_encoded_token('rsa256_kid_2'), key_store).verified)
+
+    def test_from_jwk_can_be_pickled(self):
+        key_store = pickle.loads(pickle.dumps(KeyStore.from_jwk(load_public_key('rsa256'))))
+        self.assertTrue(decode_token(load_encoded_token('rsa256'), key_store).verified)
@@ -0,0 +1,100 @@
+import json
+import time
+from threading import Thread
+from functools import partial
+from unittest import TestCase
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+
+import requests
+from jwcrypto.jwk import JWK
+
+from tests.helpers import create_signed_token
+from jwt_debugger.cache import HTTPCache
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.decoder import load_jwks_from_oidc_url
+from jwt_debugger.decoder import load_jwkset_from_oidc_url
+from jwt_debugger.decoder import resolve_jwks_uri_from_oidc_provider
+from jwt_debugger.keystore import KeyStore
+from jwt_debugger.mockidp import JWKS_PATH
+from jwt_debugger.mockidp import TOKEN_PATH
+from jwt_debugger.mockidp import MockIdentityProvider
+
+
+class TestMockIdentityProvider(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key = JWK.generate(kty='RSA', size=2048, kid='toolbox')
+
+    def start_server(self, **kwargs) -> MockIdentityProvider:
+        server = MockIdentityProvider(('127.0.0.1', 0), [self.private_key], **kwargs)
+        Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_discovery_and_key_set(self):
+        server = self.start_server(key_count=2)
+
+        jwks_uri = resolve_jwks_uri_from_oidc_provider(server.issuer)
+        self.assertEqual(jwks_uri, f'{server.issuer}{JWKS_PATH}')
+
+        jwkset = load_jwkset_from_oidc_url(jwks_uri)
+        self.assertEqual(sorted(x['kid'] for x in jwkset['keys']), ['mock-1', 'mock-2', 'toolbox'])
+        self.assertFalse(any(x.has_private for x in jwkset['keys']))
+
+        token = create_signed_token(self.private_key, {'sub': '1234567890'}, kid='toolbox')
+        self.assertTrue(decode_token(token, jwkset).verified)
+
+    def test_minted_token_verifies(self):
+        server = self.start_server()
+        token = requests.get(f'{server.issuer}{TOKEN_PATH}?sub=alice').json()['id_token']
+
+        jwks_uri = resolve_jwks_uri_from_oidc_provider(server.issuer)
+        decoded_token = decode_token(token, KeyStore(partial(load_jwks_from_oidc_url, jwks_uri)))
+        self.assertTrue(decoded_token.verified)
+        self.assertEqual(decoded_token.header['kid'], 'toolbox')
+        self.assertEqual(decoded_token.payload['sub'], 'alice')
+        self.assertEqual(decoded_token.payload['iss'], server.issuer)
+
+    def test_rotation_is_picked_up_by_key_store(self):
+        server = self.start_server(rotate_every=0.5)
+        jwks_uri = resolve_jwks_uri_from_oidc_provider(server.issuer)
+        key_store = KeyStore(partial(load_jwks_from_oidc_url, jwks_uri), min_refresh_interval=0)
+
+        time.sleep(0.5)
+        token = requests.get(f'{server.issuer}{TOKEN_PATH}').json()['id_token']
+        self.assertEqual(json.loads(requests.get(jwks_uri).text)['keys'][-1]['kid'], 'mock-2')
+        self.assertTrue(decode_token(token, key_store).verified)
+        self.assertEqual(len(key_store), 2)
+
+    def test_rotation_after_long_pause_only_generates_published_keys(self):
+        server = MockIdentityProvider(('127.0.0.1', 0), key_count=2, rotate_every=1.0)
+        self.addCleanup(server.server_close)
+
+        started = time.monotonic()
+        with patch.object(server, '_generate_key', wraps=server._generate_key) as generate_key, patch('time.monotonic', return_value=started + 1000): # pylint: disable=protected-access
+            keys = server.published_keys()
+
+        self.assertEqual(generate_key.call_count, 2)
+        self.assertEqual(server.rotations, 1000)
+        self.assertEqual([x['kid'] for x in keys], ['mock-1001', 'mock-1002'])
+
+    def test_cache_headers(self):
+        server = self.start_server(max_age=60)
+        with TemporaryDirectory() as directory:
+            cache = HTTPCache(directory)
+            for _ in range(2):
+                resolve_jwks_uri_from_oidc_provider(server.issuer, cache=cache)
+
+            response = requests.get(f'{server.issuer}{JWKS_PATH}')
+            self.assertEqual(response.headers['Cache-Control'], 'public, max-age=60')
+            self.assertEqual(requests.get(f'{server.issuer}{JWKS_PATH}', headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+
+        self.assertEqual(server.request_counts['/.well-known/openid-configuration'], 1)
+
+    def test_latency(self):
+        server = self.start_server(latency=0.2)
+        start = time.monotonic()
+        resolve_jwks_uri_from_oidc_provider(server.issuer)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
@@ -0,0 +1,100 @@
+import json
+import pickle
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+from functools import partial
+from tempfile import TemporaryDirectory
+
+from jwcrypto.jwk import JWK
+from click.testing import CliRunner
+
+from tests.helpers import create_signed_token
+from jwt_debugger.command import cli
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.registry import IssuerRegistry
+
+
+class TestIssuerRegistry(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory() # pylint: disable=consider-using-with
+        path = Path(self.directory.name)
+
+        self.keys = {x: JWK.generate(kty='RSA', size=2048, kid=x) for x in ('a', 'b')}
+        for kid, key in self.keys.items():
+            (path / f'{kid}.json').write_text(key.export_public())
+
+        self.registry_path = path / 'issuers.json'
+        self.registry_path.write_text(json.dumps({
+            'issuers': {
+                'https://a.example.com': 'a.json',
+                'https://b.example.com': 'b.json',
+                'https://oidc.example.com': 'https://oidc.example.com',
+            }
+        }))
+
+        runner = CliRunner()
+        self.invoke_cli = partial(runner.invoke, cli)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_token(self, kid: str, iss: str) -> str:
+        return create_signed_token(self.keys[kid], {'iss': iss, 'sub': 'subject'}, kid=kid)
+
+    def test_from_file(self):
+        registry = IssuerRegistry.from_file(self.registry_path)
+        self.assertEqual(registry.sources['https://a.example.com'], str(Path(self.directory.name) / 'a.json'))
+        self.assertEqual(registry.sources['https://oidc.example.com'], 'https://oidc.example.com')
+
+    def test_routes_by_issuer(self):
+        registry = IssuerRegistry.from_file(self.registry_path)
+        self.assertTrue(decode_token(self.create_token('a', 'https://a.example.com'), registry).verified)
+        self.assertTrue(decode_token(self.create_token('b', 'https://b.example.com'), registry).verified)
+        self.assertFalse(decode_token(self.create_token('a', 'https://b.example.com'), registry).verified)
+        self.assertFalse(decode_token(self.create_token('a', 'https://unknown.example.com'), registry).verified)
+
+    def test_non_string_issuer(self):
+        registry = IssuerRegistry.from_file(self.registry_path)
+        self.assertFalse(decode_token(self.create_token('a', ['https://a.example.com']), registry).verified)
+        self.assertFalse(decode_token(self.create_token('a', {'iss': 'https://a.example.com'}), registry).verified)
+
+    def test_key_stores_are_built_once(self):
+        registry = IssuerRegistry.from_file(self.registry_path)
+        with patch('jwt_debugger.registry.load_jwks_from_path', wraps=lambda x: {'keys': [json.loads(Path(x).read_text())]}) as load_mock:
+            for _ in range(3):
+                decode_token(self.create_token('a', 'https://a.example.com'), registry)
+            load_mock.assert_called_once()
+
+    def test_failed_provider_is_not_retried_for_every_token(self):
+        registry = IssuerRegistry.from_file(self.registry_path)
+        token = self.create_token('a', 'https://oidc.example.com')
+        with patch('jwt_debugger.registry.resolve_jwks_uri_from_oidc_provider', side_effect=ConnectionError('unreachable')) as resolve_mock:
+            for _ in range(3):
+                self.assertFalse(decode_token(token, registry).verified)
+            resolve_mock.assert_called_once()
+
+            registry.retry_interval = 0
+            self.assertFalse(decode_token(token, registry).verified)
+            self.assertEqual(resolve_mock.call_count, 2)
+
+    def test_prefetch_remembers_failed_providers(self):
+        registry = IssuerRegistry.from_file(self.registry_path)
+        failures = {'https://oidc.example.com': ConnectionError('unreachable')}
+        with patch('jwt_debugger.fetcher.load_key_stores_from_oidc_providers', return_value=failures):
+            registry.prefetch()
+
+        with patch('jwt_debugger.registry.resolve_jwks_uri_from_oidc_provider') as resolve_mock:
+            self.assertFalse(decode_token(self.create_token('a', 'https://oidc.example.com'), registry).verified)
+            self.assertTrue(decode_token(self.create_token('a', 'https://a.example.com'), registry).verified)
+            resolve_mock.assert_not_called()
+
+    def test_can_be_pickled(self):
+        registry = pickle.loads(pickle.dumps(IssuerRegistry.from_file(self.registry_path)))
+        self.assertTrue(decode_token(self.create_token('a', 'https://a.example.com'), registry).verified)
+
+    def test_cli_with_issuers(self):
+        token = self.create_token('b', 'https://b.example.com')
+        result = self.invoke_cli(['--issuers', str(self.registry_path), token])
+        self.assertIn('Signature Verified', result.output)
+        self.assertEqual(0, result.exit_code)
@@ -0,0 +1,83 @@
+import time
+from unittest import TestCase
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import create_signed_token
+from jwt_debugger.batch import decode_tokens
+from jwt_debugger.decoder import EXIT_INVALID_SIGNATURE
+from jwt_debugger.report import TopK
+from jwt_debugger.report import HyperLogLog
+from jwt_debugger.report import TokenReport
+
+
+class TestSketches(TestCase):
+    def test_top_k_is_exact_below_capacity(self):
+        top_k = TopK(capacity=10)
+        for value in ['a'] * 5 + ['b'] * 3 + ['c']:
+            top_k.add(value)
+        self.assertEqual(top_k.most_common(2), [('a', 5), ('b', 3)])
+
+    def test_top_k_keeps_frequent_values_past_capacity(self):
+        top_k = TopK(capacity=10)
+        for index in range(1000):
+            top_k.add('frequent' if index % 2 else f'rare-{index}')
+
+        self.assertEqual(len(top_k.counts), 10)
+        self.assertEqual(top_k.most_common(1)[0][0], 'frequent')
+        self.assertGreaterEqual(top_k.most_common(1)[0][1], 500)
+
+    def test_hyperloglog_estimate(self):
+        hyperloglog = HyperLogLog()
+        self.assertEqual(len(hyperloglog), 0)
+
+        for index in range(50000):
+            hyperloglog.add(f'subject-{index % 20000}')
+        self.assertAlmostEqual(len(hyperloglog), 20000, delta=20000 * 0.05)
+
+
+class TestTokenReport(TestCase):
+    def test_report(self):
+        public_key = load_public_key('rsa256')
+        valid_token = load_encoded_token('rsa256')
+        invalid_token = load_encoded_token('rsa256_with_invalid_signature')
+        tokens = [valid_token, valid_token, invalid_token, 'MALFORMED-TOKEN', valid_token]
+
+        report = TokenReport()
+        report.add_records(decode_tokens(report.deduplicate(tokens), public_key))
+        summary = report.summary()
+
+        self.assertEqual(summary['tokens'], 5)
+        self.assertEqual(summary['unique_tokens'], 3)
+        self.assertEqual(summary['duplicate_tokens'], 2)
+        self.assertEqual(summary['malformed_tokens'], 1)
+        self.assertEqual(summary['invalid_signatures'], 1)
+        self.assertEqual(summary['signature_failure_rate'], 0.5)
+        self.assertEqual(summary['alg'], [('RS256', 2)])
+        self.assertEqual(summary['sub'], [('1234567890', 2)])
+        self.assertEqual(summary['distinct_subjects'], 1)
+        self.assertEqual(report.exit_code, EXIT_INVALID_SIGNATURE)
+
+    def test_expired_tokens(self):
+        report = TokenReport(now=100)
+        report.add({'header': {}, 'payload': {'exp': 50}, 'verified': None})
+        report.add({'header': {}, 'payload': {'exp': 150}, 'verified': None})
+        self.assertEqual(report.summary()['expired_rate'], 0.5)
+        self.assertEqual(report.exit_code, 0)
+
+    def test_expired_tokens_with_public_key(self):
+        # Expired tokens have a valid signature and must not be counted as malformed
+        public_key = load_public_key('hs256')
+        tokens = [
+            create_signed_token(public_key, {'sub': 'expired', 'exp': int(time.time()) - 3600}, algorithm='HS256'),
+            create_signed_token(public_key, {'sub': 'valid', 'exp': int(time.time()) + 3600}, algorithm='HS256'),
+        ]
+
+        report = TokenReport()
+        report.add_records(decode_tokens(report.deduplicate(tokens), public_key))
+        summary = report.summary()
+
+        self.assertEqual(summary['malformed_tokens'], 0)
+        self.assertEqual(summary['invalid_signatures'], 0)
+        self.assertEqual(summary['expired_tokens'], 1)
+        self.assertEqual(report.exit_code, 0)
@@ -0,0 +1,73 @@
+import time
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from jwcrypto.jwk import JWK
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import create_signed_token
+from jwt_debugger.decoder import decode_token
+from jwt_debugger.results import VerificationCache
+
+
+class TestVerificationCache(TestCase):
+    def setUp(self):
+        self.token = load_encoded_token('rsa256')
+        self.public_key = load_public_key('rsa256')
+
+    def test_repeated_token_skips_signature_check(self):
+        verification_cache = VerificationCache()
+        self.assertTrue(decode_token(self.token, self.public_key, verification_cache).verified)
+
+        with patch('jwcrypto.jwt.JWT') as jwt:
+            self.assertTrue(decode_token(self.token, self.public_key, verification_cache).verified)
+            jwt.assert_not_called()
+
+        self.assertEqual((verification_cache.hits, verification_cache.misses), (1, 1))
+
+    def test_invalid_signature_is_cached(self):
+        verification_cache = VerificationCache()
+        token = load_encoded_token('rsa256_with_invalid_signature')
+        decode_token(token, self.public_key, verification_cache)
+        self.assertFalse(verification_cache.get(token, self.public_key))
+
+    def test_different_key_misses(self):
+        verification_cache = VerificationCache()
+        verification_cache.put(self.token, self.public_key, True, {})
+        self.assertIsNone(verification_cache.get(self.token, JWK.generate(kty='oct', size=256)))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        verification_cache = VerificationCache(max_entries=2)
+        verification_cache.put('first', self.public_key, True, {})
+        verification_cache.put('second', self.public_key, True, {})
+        verification_cache.get('first', self.public_key)
+        verification_cache.put('third', self.public_key, True, {})
+
+        self.assertEqual(len(verification_cache), 2)
+        self.assertIsNone(verification_cache.get('second', self.public_key))
+        self.assertTrue(verification_cache.get('first', self.public_key))
+
+    def test_entries_do_not_outlive_exp(self):
+        verification_cache = VerificationCache()
+        verification_cache.put('expired', self.public_key, True, {'exp': time.time() - 1})
+        self.assertEqual(len(verification_cache), 0)
+
+        verification_cache.put('expiring', self.public_key, True, {'exp': time.time() + 60})
+        with patch('time.time', return_value=time.time() + 120):
+            self.assertIsNone(verification_cache.get('expiring', self.public_key))
+
+    def test_save_and_load(self):
+        private_key = JWK.generate(kty='oct', size=256)
+        token = create_signed_token(private_key, {'sub': 'faux-subject', 'exp': int(time.time()) + 60}, algorithm='HS256')
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'results' / 'verification.json'
+            verification_cache = VerificationCache(path=path)
+            decode_token(token, private_key, verification_cache)
+            verification_cache.save()
+
+            reloaded_cache = VerificationCache(path=path)
+            self.assertEqual(len(reloaded_cache), 1)
+            self.assertTrue(reloaded_cache.get(token, private_key))
@@ -0,0 +1,22 @@
+import json
+from unittest import TestCase
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from jwt_debugger.serialize import dumps_compact
+
+
+class TestSerialize(TestCase):
+    def test_dumps_compact(self):
+        value = {'name': 'Marty Byrde', 'groups': ['ozark', 'chicago'], 'iat': 1516239022}
+        self.assertEqual(dumps_compact(value), b'{"name":"Marty Byrde","groups":["ozark","chicago"],"iat":1516239022}')
+
+    def test_dumps_compact_non_ascii(self):
+        self.assertEqual(json.loads(dumps_compact({'name': 'Wendy Byrde ♥'})), {'name': 'Wendy Byrde ♥'})
+
+    def test_dumps_compact_falls_back_to_json(self):
+        orjson = Mock()
+        orjson.dumps.side_effect = TypeError('Integer exceeds 64-bit range')
+        with patch('jwt_debugger.serialize.orjson', orjson):
+            self.assertEqual(dumps_compact({'nonce': 2 ** 70}), b'{"nonce":1180591620717411303424}')
+            orjson.dumps.assert_called_once()
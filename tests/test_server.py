@@ -0,0 +1,67 @@
+import os
+import socket
+from threading import Thread
+from functools import partial
+from unittest import SkipTest
+from unittest import TestCase
+from unittest.mock import patch
+from tempfile import TemporaryDirectory
+
+from click.testing import CliRunner
+
+
+# Unix domain socket servers can not be imported on platforms such as Windows
+if not hasattr(socket, 'AF_UNIX'):
+    raise SkipTest('Unix domain sockets are not supported on this platform.')
+
+# pylint: disable=wrong-import-position
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import get_public_key_path
+from jwt_debugger.client import request_decode
+from jwt_debugger.server import DecodeServer
+from jwt_debugger.command import cli
+
+
+class TestDecodeServer(TestCase):
+    def setUp(self):
+        self.socket_directory = TemporaryDirectory() # pylint: disable=consider-using-with
+        self.socket_path = os.path.join(self.socket_directory.name, 'jwt-debugger.sock')
+
+        self.server = DecodeServer(self.socket_path, load_public_key('rsa256'))
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+        runner = CliRunner()
+        self.invoke_cli = partial(runner.invoke, cli)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.socket_directory.cleanup()
+
+    def test_request_decode(self):
+        record = request_decode(self.socket_path, load_encoded_token('rsa256'))
+        self.assertTrue(record['verified'])
+
+        record = request_decode(self.socket_path, load_encoded_token('rsa256_with_invalid_signature'))
+        self.assertFalse(record['verified'])
+
+    def test_server_already_listening(self):
+        with self.assertRaises(OSError):
+            DecodeServer(self.socket_path)
+
+    def test_connect(self):
+        result = self.invoke_cli(['--connect', self.socket_path, load_encoded_token('rsa256')])
+        self.assertIn('Signature Verified', result.output)
+        self.assertEqual(0, result.exit_code)
+
+        result = self.invoke_cli(['--connect', self.socket_path, load_encoded_token('rsa256_with_invalid_signature')])
+        self.assertIn('Invalid Signature', result.output)
+        self.assertEqual(1, result.exit_code)
+
+    def test_connect_with_public_key(self):
+        public_key_path = get_public_key_path('rsa256')
+        with patch('jwt_debugger.command.load_jwk_from_file') as load_jwk_from_file_mock:
+            result = self.invoke_cli(['--connect', self.socket_path, '--public-key', public_key_path, load_encoded_token('rsa256')])
+            load_jwk_from_file_mock.assert_not_called()
+            self.assertIn('Error: Keys are loaded by the server when using --connect.', result.output)
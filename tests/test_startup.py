@@ -0,0 +1,88 @@
+import os
+import sys
+import socket
+import subprocess
+from typing import Set
+from typing import Tuple
+from threading import Thread
+from unittest import TestCase
+from unittest import skipUnless
+from tempfile import TemporaryDirectory
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import get_public_key_path
+
+
+# Generous budget for cumulative import time in microseconds so that slow CI runners
+# do not fail while still catching heavy dependencies creeping back into startup
+IMPORT_TIME_BUDGET = int(os.environ.get('JWT_DEBUGGER_IMPORT_TIME_BUDGET', 1_000_000))
+
+
+def run_with_import_time(*args: str) -> Tuple[Set[str], int]:
+    '''Run the cli with -X importtime returning imported modules and the cumulative import time'''
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'jwt_debugger', *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=False,
+    )
+
+    modules, total = set(), 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        if not name.startswith('  '): # top level imports include the time of nested imports
+            total += int(cumulative)
+
+    return modules, total
+
+
+class TestStartup(TestCase):
+    def assertNotImported(self, modules: Set[str], *names: str): # pylint: disable=invalid-name
+        for name in names:
+            self.assertNotIn(name, modules)
+
+    def test_json_without_public_key(self):
+        modules, total = run_with_import_time('--format', 'json', load_encoded_token('rsa256'))
+        self.assertNotImported(modules, 'requests', 'cryptography', 'jwcrypto.jwk', 'rich.console', 'rich.table')
+        self.assertLess(total, IMPORT_TIME_BUDGET)
+
+    def test_pretty_without_public_key(self):
+        modules, _ = run_with_import_time(load_encoded_token('rsa256'))
+        self.assertNotImported(modules, 'requests', 'cryptography', 'jwcrypto.jwk')
+        self.assertIn('rich.table', modules)
+
+    def test_json_with_public_key(self):
+        modules, _ = run_with_import_time('--public-key', str(get_public_key_path('rsa256')), '--format', 'json', load_encoded_token('rsa256'))
+        self.assertNotImported(modules, 'requests', 'rich.console')
+        self.assertIn('jwcrypto.jwk', modules)
+
+    @skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix domain sockets are not supported on this platform.')
+    def test_json_with_connect(self):
+        from jwt_debugger.server import DecodeServer # pylint: disable=import-outside-toplevel
+
+        with TemporaryDirectory() as directory:
+            server = DecodeServer(os.path.join(directory, 'jwt-debugger.sock'), load_public_key('rsa256'))
+            Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                modules, _ = run_with_import_time('--connect', server.server_address, '--format', 'json', load_encoded_token('rsa256'))
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        self.assertIn('jwt_debugger.client', modules)
+        self.assertNotImported(modules, 'requests', 'jwcrypto', 'jwcrypto.jwk', 'jwt_debugger.server')
+
+    def test_import_batch(self):
+        completed = subprocess.run(
+            [sys.executable, '-c', 'import sys, jwt_debugger.batch; print(*sorted(sys.modules))'],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        self.assertNotImported(set(completed.stdout.split()), 'requests', 'cryptography', 'jwcrypto.common', 'jwcrypto.jwk')
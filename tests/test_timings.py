@@ -0,0 +1,64 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from jwt_debugger.timings import StageTimer
+from jwt_debugger.timings import timed
+from jwt_debugger.timings import write_timings
+from jwt_debugger.timings import format_prometheus
+
+
+@timed('parse')
+def parse(value: int) -> int:
+    return value
+
+
+class TestTimings(TestCase):
+    def test_timed_only_records_while_active(self):
+        timer = StageTimer()
+        parse(1)
+        with timer:
+            self.assertEqual(parse(2), 2)
+        parse(3)
+
+        self.assertEqual(len(timer.samples['parse']), 1)
+
+    def test_summary_percentiles(self):
+        timer = StageTimer()
+        timer.extend({'decode': [x / 1000 for x in range(1, 101)], 'render': [0.5]})
+
+        summary = timer.summary()
+        self.assertEqual(summary['tokens'], 100)
+        self.assertEqual(list(summary['stages']), ['decode', 'render'])
+        self.assertEqual(summary['stages']['decode']['p50'], 0.05)
+        self.assertEqual(summary['stages']['decode']['p95'], 0.095)
+        self.assertEqual(summary['stages']['decode']['p99'], 0.099)
+        self.assertEqual(summary['stages']['decode']['max'], 0.1)
+
+    def test_drain(self):
+        timer = StageTimer()
+        timer.record('decode', 0.25)
+        self.assertEqual(timer.drain(), {'decode': [0.25]})
+        self.assertEqual(timer.samples, {})
+
+    def test_format_prometheus(self):
+        timer = StageTimer()
+        timer.extend({'signature': [0.25, 0.5]})
+        lines = format_prometheus(timer.summary()).splitlines()
+
+        self.assertIn('# TYPE jwt_debugger_stage_seconds summary', lines)
+        self.assertIn('jwt_debugger_stage_seconds{stage="signature",quantile="0.5"} 0.25', lines)
+        self.assertIn('jwt_debugger_stage_seconds_sum{stage="signature"} 0.75', lines)
+        self.assertIn('jwt_debugger_stage_seconds_count{stage="signature"} 2', lines)
+        self.assertIn('jwt_debugger_tokens_total 0', lines)
+
+    def test_write_timings(self):
+        timer = StageTimer()
+        timer.record('decode', 0.25)
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'timings.prom'
+            write_timings(timer.summary(), path, 'prometheus')
+            self.assertIn('jwt_debugger_tokens_total 1', path.read_text().splitlines())
+
+            with self.assertRaises(ValueError):
+                write_timings(timer.summary(), path, 'xml')
@@ -0,0 +1,103 @@
+import json
+import time
+import asyncio
+from unittest import TestCase
+from unittest.mock import Mock
+
+from jwcrypto.common import JWException
+
+from tests.helpers import load_public_key
+from tests.helpers import load_encoded_token
+from tests.helpers import load_public_keyset
+from tests.helpers import get_public_key_path
+from tests.helpers import get_public_keyset_path
+from tests.helpers import create_signed_token
+from jwt_debugger import Verifier
+from jwt_debugger import MalformedToken
+from jwt_debugger.claims import ClaimValidator
+from jwt_debugger.compact import CompactDecodedToken
+
+
+class TestVerifier(TestCase):
+    def test_verify_with_key_file(self):
+        with Verifier.from_key_file(get_public_key_path('rsa256')) as verifier:
+            self.assertTrue(verifier.verify(load_encoded_token('rsa256')).verified)
+            self.assertFalse(verifier.verify(load_encoded_token('rsa256_with_invalid_signature')).verified)
+
+        verifier = Verifier.from_key_file(get_public_keyset_path('rsa256'))
+        self.assertTrue(verifier.verify(load_encoded_token('rsa256_kid_2')).verified)
+
+    def test_verify_with_jwks(self):
+        document = json.loads(get_public_keyset_path('rsa256').read_text())
+        for jwks in (document, load_public_keyset('rsa256')):
+            self.assertTrue(Verifier.from_jwks(jwks).verify(load_encoded_token('rsa256_kid_2')).verified)
+
+        document = json.loads(get_public_key_path('rsa256').read_text())
+        for jwks in (document, load_public_key('rsa256')):
+            self.assertTrue(Verifier.from_jwks(jwks).verify(load_encoded_token('rsa256')).verified)
+
+    def test_verify_with_secret(self):
+        verifier = Verifier.from_secret('a-string-secret-at-least-256-bits-long')
+        self.assertTrue(verifier.verify(load_encoded_token('hs256')).verified)
+        self.assertFalse(verifier.verify(load_encoded_token('rsa256')).verified)
+
+    def test_verify_without_key(self):
+        self.assertIsNone(Verifier().verify(load_encoded_token('rsa256')).verified)
+
+    def test_verify_with_claim_validator(self):
+        verifier = Verifier.from_key_file(get_public_key_path('rsa256'), claim_validator=ClaimValidator(required=('nonce',)))
+        decoded_token = verifier.verify(load_encoded_token('rsa256'))
+        self.assertTrue(decoded_token.verified)
+        self.assertEqual(decoded_token.claim_errors, ['Claim(nonce) is required.'])
+
+    def test_verify_expired_token(self):
+        token = create_signed_token(load_public_key('hs256'), {'sub': 'faux-subject', 'exp': int(time.time()) - 3600}, algorithm='HS256')
+        verifier = Verifier.from_key_file(get_public_key_path('hs256'), claim_validator=ClaimValidator())
+
+        # Expiry is reported as a claim error rather than raised as a decoding error
+        for decoded_token in (verifier.verify(token), *verifier.verify_many([token])):
+            self.assertTrue(decoded_token.verified)
+            self.assertFalse(decoded_token.claims_valid)
+            self.assertEqual(len(decoded_token.claim_errors), 1)
+            self.assertIn('expired', decoded_token.claim_errors[0])
+
+    def test_verify_malformed_token(self):
+        with self.assertRaises(MalformedToken):
+            Verifier().verify('not-a-token')
+
+    def test_verify_many(self):
+        tokens = [load_encoded_token('rsa256'), 'not-a-token', load_encoded_token('rsa256_with_invalid_signature')]
+        verifier = Verifier.from_key_file(get_public_key_path('rsa256'))
+
+        results = list(verifier.verify_many(tokens, return_exceptions=True))
+        self.assertTrue(results[0].verified)
+        self.assertIsInstance(results[1], (JWException, ValueError))
+        self.assertFalse(results[2].verified)
+
+        with self.assertRaises(MalformedToken):
+            list(verifier.verify_many(tokens))
+
+    def test_averify_many(self):
+        tokens = [load_encoded_token('rsa256'), load_encoded_token('rsa256_with_invalid_signature')] * 5
+        with Verifier.from_key_file(get_public_key_path('rsa256'), max_workers=2) as verifier:
+            results = asyncio.run(verifier.averify_many(tokens, chunk_size=3))
+            self.assertEqual([x.verified for x in results], [True, False] * 5)
+
+            results = asyncio.run(verifier.averify_many(tokens, chunk_size=3, compact=True, claims=iter(['sub'])))
+            self.assertEqual([type(x) for x in results], [CompactDecodedToken] * 10)
+            self.assertEqual([x.verified for x in results], [True, False] * 5)
+            self.assertEqual([x.payload for x in results], [{'sub': '1234567890'}] * 10)
+
+    def test_from_oidc_provider_uses_session(self):
+        configuration_response = Mock()
+        configuration_response.json.return_value = {'jwks_uri': 'https://example.com/jwks'}
+        jwks_response = Mock()
+        jwks_response.json.return_value = {'keys': [json.loads(get_public_key_path('rsa256').read_text())]}
+
+        session = Mock()
+        session.get.side_effect = [configuration_response, jwks_response]
+        with Verifier.from_oidc_provider('https://example.com', session=session) as verifier:
+            self.assertTrue(verifier.verify(load_encoded_token('rsa256')).verified)
+
+        self.assertEqual([x.args[0] for x in session.get.call_args_list], ['https://example.com/.well-known/openid-configuration', 'https://example.com/jwks'])
+        session.close.assert_called_once()
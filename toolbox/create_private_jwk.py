@@ -4,16 +4,45 @@ from click import Choice
 from click import option
 from click import command
 from jwcrypto.jwk import JWK
+from click.exceptions import UsageError # pylint: disable=ungrouped-imports
+
+
+# Key generation parameters for each signing algorithm
+KEY_PARAMETERS = {
+    'HS256': {'kty': 'oct', 'size': 256},
+    'HS384': {'kty': 'oct', 'size': 384},
+    'HS512': {'kty': 'oct', 'size': 512},
+    'RS256': {'kty': 'RSA', 'size': 2048},
+    'RS384': {'kty': 'RSA', 'size': 2048},
+    'RS512': {'kty': 'RSA', 'size': 2048},
+    'PS256': {'kty': 'RSA', 'size': 2048},
+    'PS384': {'kty': 'RSA', 'size': 2048},
+    'PS512': {'kty': 'RSA', 'size': 2048},
+    'ES256': {'kty': 'EC', 'crv': 'P-256'},
+    'ES384': {'kty': 'EC', 'crv': 'P-384'},
+    'ES512': {'kty': 'EC', 'crv': 'P-521'},
+    'ES256K': {'kty': 'EC', 'crv': 'secp256k1'},
+    'EdDSA': {'kty': 'OKP', 'crv': 'Ed25519'},
+}
+
+
+def generate_jwk(alg: str = 'RS256', **kwargs) -> JWK:
+    '''Generates a private JSON Web Key for signing with an algorithm'''
+    return JWK.generate(alg=alg, use='sig', **KEY_PARAMETERS[alg], **kwargs)
 
 
 @command
+@option('--alg', type=Choice(list(KEY_PARAMETERS)), default='RS256', help='The signing algorithm the key is generated for.')
 @option('--format', 'output_format', type=Choice(['json', 'pem']), default='json', help='The output format for the private JSON Web Key.')
-def cli(output_format: str) -> None:
+def cli(alg: str, output_format: str) -> None:
     '''Creates a private JSON Web Key.'''
-    # Todo: Pass key parameters as cli options (e.g. alg, kty, use, ...).
-    jwk = JWK.generate(alg='RS256', kty='RSA', use='sig')
+    # Todo: Pass other key parameters as cli options (e.g. kid, use, ...).
+    jwk = generate_jwk(alg)
 
     if output_format == 'pem':
+        if jwk.get('kty') == 'oct':
+            raise UsageError('Symmetric keys can not be exported in PEM format.')
+
         private_key = jwk.export_to_pem(
             private_key=True,
             password=None
@@ -22,7 +51,7 @@ def cli(output_format: str) -> None:
 
     else:
         private_key = json.dumps(
-            jwk.export_private(as_dict=True),
+            jwk.export(private_key=True, as_dict=True),
             indent=4
         )
         print(private_key)
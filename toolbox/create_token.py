@@ -1,19 +1,37 @@
+import sys
 import json
+import time
 from io import TextIOWrapper
+from uuid import uuid4
+from string import Template
+from typing import Any
+from typing import Dict
+from typing import Tuple
+from typing import Iterator
 from typing import Optional
 from pathlib import Path as PathLibPath
+from multiprocessing import Pool
 
 from click import File
 from click import Path as ClickPath
+from click import IntRange
 from click import option
 from click import command
 from click import argument
 from jwcrypto.jwk import JWK
 from jwcrypto.jwk import JWKSet
+from jwcrypto.jws import JWSCore
 from jwcrypto.jwt import JWT
+from jwcrypto.common import json_encode
 from click.exceptions import UsageError
 from click.exceptions import ClickException
 
+from jwt_debugger.decoder import signing_algorithm
+
+
+# Variables available to string values in payload templates
+TEMPLATE_VARIABLES = ('index', 'uuid', 'now', 'exp')
+
 
 def open_jwk(jwk_path: PathLibPath) -> JWK:
     if jwk_path.suffix not in ('.json', '.pem'):
@@ -45,13 +63,124 @@ def get_jwk_from_jwkset(jwkset_path: PathLibPath, kid: Optional[str] = None) ->
     return jwk
 
 
+def get_signing_algorithm(jwk: JWK) -> str:
+    '''Algorithm declared by a key or the default one for its key type and curve'''
+    algorithm = signing_algorithm(jwk)
+    if algorithm is None:
+        raise ClickException(f'JSON Web Key of type({jwk.get("kty")}) does not declare a signing algorithm (alg).')
+
+    return algorithm
+
+
+def create_token(jwk: JWK, claims: Dict, include_kid: bool = False) -> str:
+    '''Signs claims with a JSON Web Key returning the encoded token'''
+    algorithm = get_signing_algorithm(jwk)
+    header = {'typ': 'JWT', 'alg': algorithm}
+    if include_kid:
+        header['kid'] = jwk.get('kid')
+
+    jwt = JWT(header=header, claims=claims)
+    jwt.make_signed_token(jwk)
+    return jwt.serialize()
+
+
+class ClaimsTemplate:
+    '''Payload template rendered with per token variables
+
+    String values may reference $index, $uuid, $now and $exp (now plus the lifetime).
+    A value consisting of a single variable keeps its type so that "exp": "$exp"
+    renders as a number. Only templated claims are rendered for each token.
+    '''
+    def __init__(self, template: Dict, lifetime: int = 3600):
+        self.lifetime = lifetime
+        self.static = {k: v for k, v in template.items() if not self._is_template(v)}
+        self.dynamic = [(k, Template(v)) for k, v in template.items() if self._is_template(v)]
+
+    @staticmethod
+    def _is_template(value: Any) -> bool:
+        return isinstance(value, str) and any(f'${x}' in value for x in TEMPLATE_VARIABLES)
+
+    def render(self, index: int) -> Dict:
+        claims = dict(self.static)
+        if not self.dynamic:
+            return claims
+
+        now = int(time.time())
+        variables = {'index': index, 'uuid': uuid4().hex, 'now': now, 'exp': now + self.lifetime}
+        for name, template in self.dynamic:
+            variable = template.template[1:].strip('{}')
+            if template.template in (f'${variable}', f'${{{variable}}}') and variable in variables:
+                claims[name] = variables[variable]
+            else:
+                claims[name] = template.safe_substitute(variables)
+
+        return claims
+
+
+class TokenMinter:
+    '''Signs many tokens with a key that is only loaded once'''
+    def __init__(self, jwk: JWK, include_kid: bool = False):
+        self.jwk = jwk
+        self.algorithm = get_signing_algorithm(jwk)
+        header = {'typ': 'JWT', 'alg': self.algorithm}
+        if include_kid:
+            header['kid'] = jwk.get('kid')
+        self.header = json_encode(header)
+
+    def mint(self, claims: Dict) -> str:
+        # Signing with the JWS core skips the claim handling that JWT performs for every token
+        signature = JWSCore(self.algorithm, self.jwk, self.header, json_encode(claims)).sign()
+        return f"{signature['protected']}.{signature['payload'].decode()}.{signature['signature']}"
+
+
+# Minter and template created once per worker process by the pool initializer
+_worker_minter: Optional[TokenMinter] = None
+_worker_template: Optional[ClaimsTemplate] = None
+
+
+def _initialize_worker(jwk: Dict, include_kid: bool, template: Dict, lifetime: int) -> None:
+    global _worker_minter, _worker_template # pylint: disable=global-statement
+    _worker_minter = TokenMinter(JWK(**jwk), include_kid)
+    _worker_template = ClaimsTemplate(template, lifetime)
+
+
+def _mint_chunk(chunk: Tuple[int, int]) -> str:
+    start, stop = chunk
+    return ''.join(f'{_worker_minter.mint(_worker_template.render(x))}\n' for x in range(start, stop))
+
+
+def _chunks(count: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, count, chunk_size):
+        yield start, min(start + chunk_size, count)
+
+
+def mint_tokens(jwk: JWK, template: Dict, count: int, workers: int = 1, include_kid: bool = False, lifetime: int = 3600, chunk_size: int = 256) -> Iterator[str]:
+    '''Mint tokens in order yielding newline-delimited chunks so that they can be streamed to a file'''
+    if workers <= 1:
+        _initialize_worker(jwk.export(as_dict=True), include_kid, template, lifetime)
+        yield from map(_mint_chunk, _chunks(count, chunk_size))
+        return
+
+    # Keys are shipped to the workers as JSON since loaded key objects can not be pickled
+    with Pool(workers, initializer=_initialize_worker, initargs=(jwk.export(as_dict=True), include_kid, template, lifetime)) as pool:
+        yield from pool.imap(_mint_chunk, _chunks(count, chunk_size))
+
+
 @command()
 @option('--jwk', 'jwk_path', type=ClickPath(exists=True, dir_okay=False, path_type=PathLibPath), help='Private JSON Web Key in JSON or PEM format for signing.')
 @option('--jwkset', 'jwkset_path', type=ClickPath(exists=True, dir_okay=False, path_type=PathLibPath), help='Private JSON Web Key Set for signing.')
 @option('--kid', type=str, help='Unique identifier for a key to use from a JSON Web Key Set.')
+@option('--count', type=IntRange(min=1), default=1, help='Number of tokens to mint from the payload template.')
+@option('--workers', type=IntRange(min=1), default=1, help='Number of processes used for signing tokens.')
+@option('--lifetime', type=int, default=3600, help='Seconds added to the current time for the $exp template variable.')
+@option('--output', type=File('w'), default='-', help='File to write newline-delimited tokens to.')
 @argument('payload', type=File(), required=True)
-def cli(payload: TextIOWrapper, jwk_path: Optional[PathLibPath] = None, jwkset_path: Optional[PathLibPath] = None, kid: Optional[str] = None) -> None:
-    '''Creates an encoded JSON Web Token.'''
+def cli(payload: TextIOWrapper, jwk_path: Optional[PathLibPath] = None, jwkset_path: Optional[PathLibPath] = None, kid: Optional[str] = None, count: int = 1, workers: int = 1, lifetime: int = 3600, output: Optional[TextIOWrapper] = None) -> None:
+    '''Creates encoded JSON Web Tokens.
+
+    The payload is a template whose string values may reference $index, $uuid, $now
+    and $exp so that every token minted with --count is unique.
+    '''
     if all([jwk_path, jwkset_path]):
         raise UsageError('The following options can not be used together (--jwk, --jwkset).')
 
@@ -64,17 +193,14 @@ def cli(payload: TextIOWrapper, jwk_path: Optional[PathLibPath] = None, jwkset_p
     else:
         raise UsageError('Must provide either --jwk or --jwkset options.')
 
-    algorithm = jwk.get('alg', 'RS256')
-    header = {'typ': 'JWT', 'alg': algorithm}
-    if jwkset_path:
-        header['kid'] = jwk.get('kid')
+    started = time.perf_counter()
+    for chunk in mint_tokens(jwk, json.load(payload), count, workers, include_kid=jwkset_path is not None, lifetime=lifetime):
+        output.write(chunk)
+    output.flush()
 
-    payload = json.load(payload)
-    jwt = JWT(header=header, claims=payload)
-
-    jwt.make_signed_token(jwk)
-    token = jwt.serialize()
-    print(token)
+    if count > 1:
+        elapsed = time.perf_counter() - started
+        print(f'Minted {count} tokens in {elapsed:.2f}s ({count / elapsed:.0f} tokens/s).', file=sys.stderr)
 
 
 if __name__ == '__main__':